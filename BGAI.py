@@ -11,8 +11,8 @@ st.set_page_config(
 )
 
 try:
-    from backend import models, database, auth, crud, schemas
-    models.Base.metadata.create_all(bind=database.engine)
+    from backend import models, database, auth, crud, schemas, migrations
+    migrations.init_db(database.engine)
 except Exception as e:
     st.error("CRITICAL IMPORT ERROR — check your backend setup.")
     st.code(traceback.format_exc())
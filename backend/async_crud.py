@@ -0,0 +1,191 @@
+"""
+async_crud.py — Async Database Operations for the BGAI API
+===========================================================
+``AsyncSession`` counterparts of the ``crud`` functions used by the
+FastAPI routes, so a request waiting on the database yields the event
+loop instead of blocking it.
+
+Reads are native ``select()`` statements awaited on the async driver.
+Writes that maintain ``user_stats`` delegate to the synchronous ``crud``
+implementation through ``AsyncSession.run_sync`` so there is exactly one
+copy of the counter bookkeeping. CPU-bound password hashing runs in the same
+thread pool as the routes' other blocking work (``run_in_threadpool``).
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas, auth, crud
+
+
+# ---------------------------------------------------------------------------
+# Keyset Pagination
+# ---------------------------------------------------------------------------
+
+async def _keyset_page(
+    db: AsyncSession, stmt, model, limit: int, cursor: Optional[str], scalars: bool = True
+) -> Tuple[list, Optional[str]]:
+    """Async twin of ``crud._keyset_page`` for a ``select()`` statement."""
+    criterion = crud._keyset_criterion(model, cursor)
+    if criterion is not None:
+        stmt = stmt.where(criterion)
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    result = await db.execute(stmt)
+    rows = list(result.scalars() if scalars else result.all())
+    return crud._split_page(rows, limit)
+
+
+# ---------------------------------------------------------------------------
+# Users
+# ---------------------------------------------------------------------------
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    """Return the User row matching *email*, or None."""
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    """Hash password (in a worker thread) and persist a new User record."""
+    hashed_pw = await run_in_threadpool(auth.get_password_hash, user.password)
+    db_user = models.User(
+        email=user.email,
+        name=user.name,
+        password=hashed_pw,
+        company=user.company or "",
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+# ---------------------------------------------------------------------------
+# Business Data
+# ---------------------------------------------------------------------------
+
+async def create_business_data(
+    db: AsyncSession, data: schemas.BusinessDataCreate, user_id: int
+) -> models.BusinessData:
+    """Persist a new BusinessData record for *user_id*."""
+    return await db.run_sync(crud.create_business_data, data, user_id)
+
+
+async def get_business_data_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    data_filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[models.BusinessData], Optional[str]]:
+    """Return one newest-first page of *user_id*'s BusinessData plus the next cursor."""
+    bd = models.BusinessData
+    stmt = select(bd).where(bd.user_id == user_id)
+    for key, value in (data_filters or {}).items():
+        stmt = stmt.where(crud._json_field_equals(db.sync_session, bd.data, key, value))
+    return await _keyset_page(db, stmt, bd, limit, cursor)
+
+
+async def get_business_data_rows(
+    db: AsyncSession,
+    user_id: int,
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list:
+    """Typed-column rows of *user_id*'s filtered BusinessData (see ``crud.get_business_data_rows``)."""
+    return await db.run_sync(crud.get_business_data_rows, user_id, data_type, region, start, end)
+
+
+# ---------------------------------------------------------------------------
+# Predictions
+# ---------------------------------------------------------------------------
+
+async def create_prediction(
+    db: AsyncSession,
+    prediction: schemas.PredictionCreate,
+    result: dict,
+    user_id: int,
+) -> models.Prediction:
+    """Persist a Prediction record with the ML engine output."""
+    return await db.run_sync(crud.create_prediction, prediction, result, user_id)
+
+
+async def create_pending_prediction(
+    db: AsyncSession, prediction: schemas.PredictionCreate, user_id: int
+) -> models.Prediction:
+    """Persist a Prediction in ``pending`` state for a queued job."""
+    return await db.run_sync(crud.create_pending_prediction, prediction, user_id)
+
+
+async def get_prediction(db: AsyncSession, pred_id: int, user_id: int) -> Optional[models.Prediction]:
+    """Return a single prediction owned by *user_id*, full payloads included, or None."""
+    result = await db.execute(
+        select(models.Prediction).where(
+            models.Prediction.id == pred_id, models.Prediction.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+
+async def get_predictions_page(
+    db: AsyncSession, user_id: int, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[models.Prediction], Optional[str]]:
+    """Return one newest-first page of *user_id*'s predictions plus the next cursor."""
+    stmt = select(models.Prediction).where(models.Prediction.user_id == user_id)
+    return await _keyset_page(db, stmt, models.Prediction, limit, cursor)
+
+
+async def get_prediction_summaries_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_forecast: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Keyset-paginated summary rows (no input/output payloads) for *user_id*."""
+    stmt = (
+        select(*crud._prediction_summary_columns(include_forecast))
+        .where(models.Prediction.user_id == user_id)
+    )
+    return await _keyset_page(db, stmt, models.Prediction, limit, cursor, scalars=False)
+
+
+# ---------------------------------------------------------------------------
+# Feedback & Integrations
+# ---------------------------------------------------------------------------
+
+async def create_feedback(
+    db: AsyncSession, feedback: schemas.FeedbackCreate, user_id: int
+) -> models.Feedback:
+    """Persist a user feedback entry."""
+    db_fb = models.Feedback(**feedback.model_dump(), user_id=user_id)
+    db.add(db_fb)
+    await db.commit()
+    await db.refresh(db_fb)
+    return db_fb
+
+
+async def get_integrations(db: AsyncSession, user_id: int) -> List[models.Integration]:
+    """Return all integrations for *user_id*."""
+    result = await db.execute(
+        select(models.Integration)
+        .where(models.Integration.user_id == user_id)
+        .order_by(models.Integration.created_at.desc())
+    )
+    return list(result.scalars())
+
+
+async def create_integration(
+    db: AsyncSession, integration: schemas.IntegrationCreate, user_id: int
+) -> models.Integration:
+    """Persist a new service integration."""
+    return await db.run_sync(crud.create_integration, integration, user_id)
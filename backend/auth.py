@@ -18,7 +18,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import database, models, schemas
 
@@ -117,7 +118,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
 ) -> models.User:
     """
     FastAPI dependency that decodes the Bearer token, validates it,
@@ -138,7 +139,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,183 @@
+"""
+compute.py — CPU Budget for BGAI Model Fits
+============================================
+Every sklearn fit in ``ml_engine`` borrows its threads from one
+process-wide :data:`budget` instead of asking for ``n_jobs=-1``. Concurrent
+predictions (API requests, Streamlit sessions, batch fits) therefore
+share ``BGAI_COMPUTE_THREADS`` threads (default: all CPUs) rather than each
+claiming every core.
+
+A fit asks for the threads it could use; once at least one is free it is
+granted the smaller of that, ``BGAI_COMPUTE_MAX_PER_FIT`` and a fair share
+of the budget given how many fits are running or waiting. Fits wait in
+FIFO order and the time spent waiting is reported by :func:`stats`.
+
+The budget is per process; ``jobs`` divides the CPUs between its worker
+processes so the pool as a whole stays within the machine.
+
+Estimators that take ``n_jobs`` get the grant directly. OpenMP code
+(histogram boosting) reads the calling thread's OpenMP thread count, which
+:func:`openmp_threads` sets for that thread alone, so concurrent fits each
+run on their own grant.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import collections
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CPU_COUNT = os.cpu_count() or 1
+TOTAL_THREADS = int(os.getenv("BGAI_COMPUTE_THREADS", 0)) or CPU_COUNT
+MAX_PER_FIT = int(os.getenv("BGAI_COMPUTE_MAX_PER_FIT", 0)) or TOTAL_THREADS
+
+# Waits kept for the percentile figures in stats()
+_WAIT_WINDOW = 1000
+
+
+class ComputeBudget:
+    """
+    Counting semaphore over CPU threads with FIFO hand-out, per-fit caps
+    and wait-time accounting.
+    """
+
+    def __init__(self, total: int = TOTAL_THREADS, max_per_fit: int = MAX_PER_FIT) -> None:
+        self._cond = threading.Condition()
+        self._queue: "collections.deque[object]" = collections.deque()
+        self._waits: "collections.deque[float]" = collections.deque(maxlen=_WAIT_WINDOW)
+        self._in_use = 0
+        self._active = 0
+        self._counters = {"grants": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        self.resize(total, max_per_fit)
+
+    def resize(self, total: int, max_per_fit: Optional[int] = None) -> None:
+        """Change the thread budget; running fits keep what they were granted."""
+        with self._cond:
+            self.total = max(1, int(total))
+            self.max_per_fit = max(1, min(int(max_per_fit or self.total), self.total))
+            self._cond.notify_all()
+
+    def _grant(self, want: int) -> int:
+        free = self.total - self._in_use
+        fair = max(1, self.total // (self._active + 1 + len(self._queue)))
+        return max(1, min(want, self.max_per_fit, free, fair))
+
+    @contextmanager
+    def allocate(self, want: Optional[int] = None) -> Iterator[int]:
+        """
+        Block until threads are available, then yield how many this fit may
+        use (at least 1, at most *want*; default: ``max_per_fit``).
+        """
+        want = max(1, want or self.max_per_fit)
+        ticket = object()
+        start = time.perf_counter()
+        with self._cond:
+            self._queue.append(ticket)
+            while self._queue[0] is not ticket or self._in_use >= self.total:
+                self._cond.wait()
+            self._queue.popleft()
+            granted = self._grant(want)
+            self._in_use += granted
+            self._active += 1
+            waited = time.perf_counter() - start
+            self._record_wait(waited)
+            # The next fit in line may fit in what is left
+            self._cond.notify_all()
+        try:
+            yield granted
+        finally:
+            with self._cond:
+                self._in_use -= granted
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _record_wait(self, waited: float) -> None:
+        self._counters["grants"] += 1
+        self._waits.append(waited)
+        if waited > 0.001:
+            self._counters["waited"] += 1
+        self._counters["wait_seconds"] += waited
+        self._counters["max_wait_seconds"] = max(self._counters["max_wait_seconds"], waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget occupancy and queue wait times (p50 / p95 over recent fits)."""
+        with self._cond:
+            waits = sorted(self._waits)
+            grants = self._counters["grants"]
+
+            def _pct(q: float) -> float:
+                return round(waits[min(len(waits) - 1, int(q * len(waits)))], 4) if waits else 0.0
+
+            return {
+                "total_threads":    self.total,
+                "max_per_fit":      self.max_per_fit,
+                "threads_in_use":   self._in_use,
+                "running_fits":     self._active,
+                "waiting_fits":     len(self._queue),
+                "grants":           grants,
+                "waited":           self._counters["waited"],
+                "mean_wait_s":      round(self._counters["wait_seconds"] / grants, 4) if grants else 0.0,
+                "p50_wait_s":       _pct(0.5),
+                "p95_wait_s":       _pct(0.95),
+                "max_wait_s":       round(self._counters["max_wait_seconds"], 4),
+            }
+
+
+budget = ComputeBudget()
+
+
+def allocate(want: Optional[int] = None):
+    """Shorthand for ``budget.allocate(want)``."""
+    return budget.allocate(want)
+
+
+def stats() -> Dict[str, Any]:
+    """Counters of the process-wide budget."""
+    return budget.stats()
+
+
+# ---------------------------------------------------------------------------
+# OpenMP thread count of the calling thread
+# ---------------------------------------------------------------------------
+
+_openmp_libs: List[Any] = []
+_openmp_lock = threading.Lock()
+
+
+def _openmp_controllers() -> List[Any]:
+    """threadpoolctl controllers of the loaded OpenMP runtimes (scanned until one is found)."""
+    with _openmp_lock:
+        if not _openmp_libs:
+            from threadpoolctl import ThreadpoolController
+
+            _openmp_libs.extend(ThreadpoolController().select(user_api="openmp").lib_controllers)
+        return list(_openmp_libs)
+
+
+@contextmanager
+def openmp_threads(n_threads: int) -> Iterator[None]:
+    """
+    Run OpenMP regions started by the calling thread on at most *n_threads*
+    threads inside the block. ``omp_set_num_threads`` sets the calling
+    thread's ``nthreads-var`` only, so fits on other threads are untouched
+    and restoring this thread's previous value cannot undo theirs. Unlike
+    ``threadpoolctl.threadpool_limits`` no process-wide state is saved or
+    restored.
+    """
+    libs = _openmp_controllers()
+    previous = [lib.get_num_threads() for lib in libs]
+    for lib in libs:
+        lib.set_num_threads(max(1, int(n_threads)))
+    try:
+        yield
+    finally:
+        for lib, n in zip(libs, previous):
+            lib.set_num_threads(n)
@@ -8,14 +8,115 @@ Author: Ujjwal Tiwari
 Version: 3.0.0
 """
 
-from datetime import datetime
-from typing import List, Optional
-
+import base64
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, case, func, insert, literal, literal_column, or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from . import models, schemas, auth
 
 
+# ---------------------------------------------------------------------------
+# Keyset Pagination
+# ---------------------------------------------------------------------------
+
+def _encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Return an opaque, URL-safe cursor for the ``(created_at, id)`` sort key."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of :func:`_encode_cursor`. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def _keyset_criterion(model, cursor: Optional[str]):
+    """WHERE clause selecting rows strictly after *cursor*, or None without one."""
+    if not cursor:
+        return None
+    created_at, row_id = _decode_cursor(cursor)
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < row_id),
+    )
+
+
+def _split_page(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the ``limit + 1`` look-ahead row and derive the next cursor from the last row."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _keyset_page(query, model, limit: int, cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+    """
+    Apply newest-first keyset pagination on ``(created_at, id)`` to *query*.
+
+    Instead of OFFSET, the page starts strictly after the last row of the
+    previous page, so every page costs the same index range scan no matter
+    how deep it is. Returns ``(rows, next_cursor)``; ``next_cursor`` is None
+    on the last page.
+    """
+    criterion = _keyset_criterion(model, cursor)
+    if criterion is not None:
+        query = query.filter(criterion)
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    return _split_page(rows, limit)
+
+
+# ---------------------------------------------------------------------------
+# JSON payload filters (per-backend operators)
+# ---------------------------------------------------------------------------
+
+_JSON_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def _json_field_equals(db: Session, column, key: str, value: Any):
+    """
+    Return a server-side predicate for ``column[key] == value``.
+
+    PostgreSQL uses JSONB containment (``@>``), which the GIN index on the
+    payload can serve; SQLite compares the typed ``JSON_EXTRACT`` result.
+    Both match on JSON type, so ``3`` and ``"3"`` are different values.
+    Only scalars can be matched; ``None`` matches an explicit JSON ``null``,
+    not a missing key.
+    """
+    if not _JSON_KEY_RE.match(key):
+        raise ValueError("JSON filter keys may only contain letters, digits and underscores.")
+    if isinstance(value, (dict, list)):
+        raise ValueError("JSON filter values must be a string, number, boolean or null.")
+    if db.get_bind().dialect.name == "postgresql":
+        return type_coerce(column, JSONB).contains({key: value})
+    path = f'$."{key}"'
+    # JSON_EXTRACT turns null into SQL NULL and booleans into 1 / 0, so
+    # JSON_TYPE tells them apart from a missing key and from numbers
+    json_type = func.json_type(column, path)
+    if value is None:
+        return json_type == "null"
+    if isinstance(value, bool):
+        return json_type == ("true" if value else "false")
+    if isinstance(value, (int, float)):
+        return and_(json_type.in_(("integer", "real")), func.json_extract(column, path) == value)
+    return func.json_extract(column, path) == value
+
+
 # ---------------------------------------------------------------------------
 # Users
 # ---------------------------------------------------------------------------
@@ -83,6 +184,37 @@ def change_password(db: Session, user_id: int, new_password: str) -> bool:
 # Business Data
 # ---------------------------------------------------------------------------
 
+def extract_hot_fields(data: Any) -> Dict[str, Any]:
+    """
+    Return the typed ``region`` / ``value`` / ``event_date`` column values
+    for a BusinessData payload. Missing or unparseable fields become None.
+    """
+    fields: Dict[str, Any] = {"region": None, "value": None, "event_date": None}
+    if not isinstance(data, dict):
+        return fields
+
+    region = data.get("region")
+    if region is not None and region != "":
+        fields["region"] = str(region)
+
+    value = data.get("value")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        fields["value"] = float(value)
+    elif isinstance(value, str):
+        try:
+            fields["value"] = float(value)
+        except ValueError:
+            pass
+
+    raw_date = data.get("date")
+    if isinstance(raw_date, str) and len(raw_date) >= 10:
+        try:
+            fields["event_date"] = date.fromisoformat(raw_date[:10])
+        except ValueError:
+            pass
+    return fields
+
+
 def create_business_data(
     db: Session, data: schemas.BusinessDataCreate, user_id: int
 ) -> models.BusinessData:
@@ -92,13 +224,51 @@ def create_business_data(
         data=data.data,
         description=data.description or "",
         user_id=user_id,
+        **extract_hot_fields(data.data),
     )
     db.add(db_data)
+    db.flush()
+    _bump_user_stats(db, user_id, total_data_records=1)
     db.commit()
     db.refresh(db_data)
     return db_data
 
 
+def bulk_create_business_data(
+    db: Session, records: List[schemas.BusinessDataCreate], user_id: int
+) -> int:
+    """
+    Insert many BusinessData records for *user_id* in one transaction.
+
+    Rows go through a single Core executemany on the table — no ORM objects,
+    no RETURNING, no refresh. Returns the number of rows inserted.
+    """
+    if not records:
+        return 0
+    # Render the shared timestamp as a SQL literal once per batch rather than
+    # running the DateTime bind processor for every row of the executemany.
+    now = literal(datetime.utcnow(), DateTime).compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    stamp = literal_column(str(now))
+    db.execute(
+        insert(models.BusinessData.__table__).values(timestamp=stamp, created_at=stamp),
+        [
+            {
+                "user_id":     user_id,
+                "data_type":   rec.data_type,
+                "data":        rec.data,
+                "description": rec.description or "",
+                **extract_hot_fields(rec.data),
+            }
+            for rec in records
+        ],
+    )
+    _bump_user_stats(db, user_id, total_data_records=len(records))
+    db.commit()
+    return len(records)
+
+
 def get_business_data(db: Session, user_id: int) -> List[models.BusinessData]:
     """Return all BusinessData records for *user_id*, newest first."""
     return (
@@ -109,6 +279,25 @@ def get_business_data(db: Session, user_id: int) -> List[models.BusinessData]:
     )
 
 
+def get_business_data_page(
+    db: Session,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    data_filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[models.BusinessData], Optional[str]]:
+    """
+    Return one newest-first page of *user_id*'s BusinessData plus the next cursor.
+
+    *data_filters* (``{key: value}``) are matched against the JSON payload
+    inside the database rather than in Python.
+    """
+    query = db.query(models.BusinessData).filter(models.BusinessData.user_id == user_id)
+    for key, value in (data_filters or {}).items():
+        query = query.filter(_json_field_equals(db, models.BusinessData.data, key, value))
+    return _keyset_page(query, models.BusinessData, limit, cursor)
+
+
 def get_business_data_by_type(
     db: Session, user_id: int, data_type: str
 ) -> List[models.BusinessData]:
@@ -124,6 +313,143 @@ def get_business_data_by_type(
     )
 
 
+def get_business_data_record(
+    db: Session, record_id: int, user_id: int
+) -> Optional[models.BusinessData]:
+    """Return a single BusinessData record owned by *user_id*, or None."""
+    return (
+        db.query(models.BusinessData)
+        .filter(models.BusinessData.id == record_id, models.BusinessData.user_id == user_id)
+        .first()
+    )
+
+
+def _business_data_criteria(
+    user_id: int,
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list:
+    """WHERE criteria shared by the filtered BusinessData queries (dates are inclusive)."""
+    bd = models.BusinessData
+    criteria = [bd.user_id == user_id]
+    if data_type:
+        criteria.append(bd.data_type == data_type)
+    if region:
+        criteria.append(bd.region == region)
+    if start:
+        criteria.append(bd.timestamp >= datetime.combine(start, datetime.min.time()))
+    if end:
+        criteria.append(bd.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return criteria
+
+
+def get_business_data_filtered(
+    db: Session,
+    user_id: int,
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[models.BusinessData]:
+    """Return *user_id*'s BusinessData matching the type / region / date filters, newest first."""
+    return (
+        db.query(models.BusinessData)
+        .filter(*_business_data_criteria(user_id, data_type, region, start, end))
+        .order_by(models.BusinessData.created_at.desc())
+        .all()
+    )
+
+
+def get_business_data_rows(
+    db: Session,
+    user_id: int,
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list:
+    """
+    Like :func:`get_business_data_filtered` but projects only the typed
+    columns (id, data_type, timestamp, region, value, event_date) — the JSON
+    payload is never loaded.
+    """
+    bd = models.BusinessData
+    return (
+        db.query(bd.id, bd.data_type, bd.timestamp, bd.region, bd.value, bd.event_date)
+        .filter(*_business_data_criteria(user_id, data_type, region, start, end))
+        .order_by(bd.created_at.desc())
+        .all()
+    )
+
+
+def get_business_data_facets(db: Session, user_id: int) -> dict:
+    """Return the distinct data types and regions plus the timestamp range for *user_id*."""
+    bd = models.BusinessData
+    types = [
+        t for (t,) in db.query(bd.data_type)
+        .filter(bd.user_id == user_id)
+        .distinct()
+        .order_by(bd.data_type)
+    ]
+    regions = [
+        r for (r,) in db.query(bd.region)
+        .filter(bd.user_id == user_id, bd.region.isnot(None))
+        .distinct()
+        .order_by(bd.region)
+    ]
+    first_ts, last_ts = (
+        db.query(func.min(bd.timestamp), func.max(bd.timestamp))
+        .filter(bd.user_id == user_id)
+        .one()
+    )
+    return {"data_types": types, "regions": regions, "first_timestamp": first_ts, "last_timestamp": last_ts}
+
+
+def get_business_data_summary(
+    db: Session,
+    user_id: int,
+    group_by: str = "data_type",
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[dict]:
+    """
+    Aggregate the ``value`` column per *group_by* (``"data_type"`` or
+    ``"region"``) in SQL. Returns ``[{key, count, total, mean, max, min}]``;
+    records without a region are grouped under ``"Unknown"``.
+    """
+    bd = models.BusinessData
+    if group_by == "data_type":
+        key = bd.data_type
+    elif group_by == "region":
+        key = func.coalesce(bd.region, "Unknown")
+    else:
+        raise ValueError("group_by must be 'data_type' or 'region'.")
+    value = func.coalesce(bd.value, 0.0)
+    rows = (
+        db.query(
+            key.label("key"),
+            func.count(bd.id),
+            func.sum(value),
+            func.avg(value),
+            func.max(value),
+            func.min(value),
+        )
+        .filter(*_business_data_criteria(user_id, data_type, region, start, end))
+        .group_by(key)
+        .order_by(key)
+        .all()
+    )
+    return [
+        {"key": k, "count": int(n), "total": float(total or 0.0), "mean": float(mean or 0.0),
+         "max": float(vmax or 0.0), "min": float(vmin or 0.0)}
+        for k, n, total, mean, vmax, vmin in rows
+    ]
+
+
 def delete_business_data(db: Session, record_id: int, user_id: int) -> bool:
     """Delete a single BusinessData record owned by *user_id*. Returns True if deleted."""
     record = (
@@ -134,6 +460,8 @@ def delete_business_data(db: Session, record_id: int, user_id: int) -> bool:
     if not record:
         return False
     db.delete(record)
+    db.flush()
+    _bump_user_stats(db, user_id, total_data_records=-1)
     db.commit()
     return True
 
@@ -145,6 +473,8 @@ def delete_all_user_data(db: Session, user_id: int) -> int:
         .filter(models.BusinessData.user_id == user_id)
         .delete()
     )
+    if count:
+        _bump_user_stats(db, user_id, total_data_records=-count)
     db.commit()
     return count
 
@@ -172,11 +502,124 @@ def create_prediction(
         user_id=user_id,
     )
     db.add(db_pred)
+    db.flush()
+    _bump_user_stats(db, user_id, **_prediction_deltas(db_pred))
     db.commit()
     db.refresh(db_pred)
     return db_pred
 
 
+def create_pending_prediction(
+    db: Session, prediction: schemas.PredictionCreate, user_id: int
+) -> models.Prediction:
+    """Persist a Prediction in ``pending`` state; a job fills in the result later."""
+    db_pred = models.Prediction(
+        name=prediction.name,
+        model_type=prediction.model_type,
+        input_data=prediction.input_data,
+        status="pending",
+        user_id=user_id,
+    )
+    db.add(db_pred)
+    db.flush()
+    _bump_user_stats(db, user_id, **_prediction_deltas(db_pred))
+    db.commit()
+    db.refresh(db_pred)
+    return db_pred
+
+
+def complete_prediction(db: Session, pred_id: int, result: dict) -> Optional[models.Prediction]:
+    """
+    Store the ML engine *result* on a pending prediction and mark it
+    completed or failed. Returns None if the prediction was deleted meanwhile.
+    """
+    record = db.get(models.Prediction, pred_id)
+    if record is None:
+        return None
+    before = _prediction_deltas(record)
+    metrics = result.get("metrics", {})
+    record.output_data = result
+    record.confidence = result.get("confidence")
+    record.accuracy_score = metrics.get("r2_score")
+    record.status = "completed" if "error" not in result else "failed"
+    db.flush()
+    after = _prediction_deltas(record)
+    deltas = {k: after.get(k, 0) - before.get(k, 0) for k in set(before) | set(after)}
+    _bump_user_stats(db, record.user_id, **{k: v for k, v in deltas.items() if v})
+    db.commit()
+    db.refresh(record)
+    return record
+
+
+def touch_pending_predictions(db: Session, pred_ids: Tuple[int, ...]) -> int:
+    """
+    Heartbeat: bump ``updated_at`` on those of *pred_ids* still ``pending``,
+    so another API process's :func:`fail_stale_predictions` sees that a job
+    still holds them. Returns the rows touched.
+    """
+    if not pred_ids:
+        return 0
+    touched = (
+        db.query(models.Prediction)
+        .filter(models.Prediction.id.in_(pred_ids), models.Prediction.status == "pending")
+        .update({models.Prediction.updated_at: datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return touched
+
+
+def fail_stale_predictions(
+    db: Session, idle_since: datetime, error: str, exclude: Tuple[int, ...] = ()
+) -> int:
+    """
+    Mark every prediction still ``pending`` that no process has touched
+    (see :func:`touch_pending_predictions`) since *idle_since* as failed
+    with *error* — its job was lost to a restart, a crashed worker or a
+    cancelled queue. Ids in *exclude* (jobs still running in this process)
+    are left alone. Returns the rows failed.
+    """
+    last_seen = func.coalesce(models.Prediction.updated_at, models.Prediction.created_at)
+    query = db.query(models.Prediction.id).filter(
+        models.Prediction.status == "pending",
+        last_seen < idle_since,
+    )
+    if exclude:
+        query = query.filter(models.Prediction.id.notin_(exclude))
+    stale = [pred_id for (pred_id,) in query.order_by(models.Prediction.id)]
+    for pred_id in stale:
+        complete_prediction(db, pred_id, {"error": error})
+    return len(stale)
+
+
+def append_prediction_values(
+    db: Session, pred_id: int, values: List[Dict[str, Any]], result: dict
+) -> Optional[models.Prediction]:
+    """
+    Record an incremental update: append *values* to the prediction's
+    input data (so a refit reproduces the history) and store the updated
+    *result*. Metrics and confidence are unchanged, so are the user stats.
+    Columnar input data gets each record's fields appended to its columns.
+    The row is read ``FOR UPDATE`` (a no-op on SQLite, whose writers are
+    serialised anyway).
+    """
+    record = db.get(models.Prediction, pred_id, with_for_update=True)
+    if record is None:
+        return None
+    input_data = dict(record.input_data or {})
+    if "columns" in input_data:
+        input_data["columns"] = {
+            name: list(col) + [row.get(name) for row in values]
+            for name, col in input_data["columns"].items()
+        }
+    else:
+        input_data["values"] = list(input_data.get("values", [])) + list(values)
+    record.input_data = input_data
+    record.output_data = result
+    db.commit()
+    db.refresh(record)
+    return record
+
+
 def get_predictions(db: Session, user_id: int) -> List[models.Prediction]:
     """Return all predictions for *user_id*, newest first."""
     return (
@@ -187,6 +630,77 @@ def get_predictions(db: Session, user_id: int) -> List[models.Prediction]:
     )
 
 
+def get_predictions_page(
+    db: Session, user_id: int, limit: int = 100, cursor: Optional[str] = None
+) -> Tuple[List[models.Prediction], Optional[str]]:
+    """Return one newest-first page of *user_id*'s predictions plus the next cursor."""
+    query = db.query(models.Prediction).filter(models.Prediction.user_id == user_id)
+    return _keyset_page(query, models.Prediction, limit, cursor)
+
+
+def get_prediction(db: Session, pred_id: int, user_id: int) -> Optional[models.Prediction]:
+    """Return a single prediction owned by *user_id*, full payloads included, or None."""
+    return (
+        db.query(models.Prediction)
+        .filter(models.Prediction.id == pred_id, models.Prediction.user_id == user_id)
+        .first()
+    )
+
+
+def _prediction_summary_columns(include_forecast: bool = False) -> list:
+    """
+    The scalar Prediction columns only. ``input_data`` / ``output_data`` are
+    never selected; *include_forecast* projects just ``output_data["forecast"]``
+    out of the payload in SQL.
+    """
+    p = models.Prediction
+    columns = [p.id, p.name, p.model_type, p.status, p.confidence, p.accuracy_score, p.created_at]
+    if include_forecast:
+        columns.append(p.output_data["forecast"].label("forecast"))
+    return columns
+
+
+def _prediction_summary_query(db: Session, user_id: int, include_forecast: bool = False):
+    """Query :func:`_prediction_summary_columns` for *user_id*'s predictions."""
+    return (
+        db.query(*_prediction_summary_columns(include_forecast))
+        .filter(models.Prediction.user_id == user_id)
+    )
+
+
+def get_prediction_summaries(
+    db: Session,
+    user_id: int,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_forecast: bool = False,
+) -> list:
+    """
+    Return lightweight rows (id, name, model_type, status, confidence,
+    accuracy_score, created_at[, forecast]) for *user_id*'s predictions,
+    newest first — for list views that never show the full payloads.
+    """
+    q = _prediction_summary_query(db, user_id, include_forecast)
+    if status:
+        q = q.filter(models.Prediction.status == status)
+    q = q.order_by(models.Prediction.created_at.desc(), models.Prediction.id.desc())
+    if limit is not None:
+        q = q.limit(limit)
+    return q.all()
+
+
+def get_prediction_summaries_page(
+    db: Session,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_forecast: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Keyset-paginated variant of :func:`get_prediction_summaries`."""
+    query = _prediction_summary_query(db, user_id, include_forecast)
+    return _keyset_page(query, models.Prediction, limit, cursor)
+
+
 def get_predictions_filtered(
     db: Session, user_id: int, status: Optional[str] = None
 ) -> List[models.Prediction]:
@@ -206,7 +720,10 @@ def delete_prediction(db: Session, pred_id: int, user_id: int) -> bool:
     )
     if not record:
         return False
+    deltas = {k: -v for k, v in _prediction_deltas(record).items()}
     db.delete(record)
+    db.flush()
+    _bump_user_stats(db, user_id, **deltas)
     db.commit()
     return True
 
@@ -244,6 +761,9 @@ def create_integration(
     """Persist a new service integration."""
     db_integ = models.Integration(**integration.model_dump(), user_id=user_id)
     db.add(db_integ)
+    db.flush()
+    if db_integ.is_active:
+        _bump_user_stats(db, user_id, active_integrations=1)
     db.commit()
     db.refresh(db_integ)
     return db_integ
@@ -260,6 +780,8 @@ def toggle_integration(db: Session, integ_id: int, user_id: int) -> Optional[mod
         return None
     record.is_active = not record.is_active
     record.updated_at = datetime.utcnow()
+    db.flush()
+    _bump_user_stats(db, user_id, active_integrations=1 if record.is_active else -1)
     db.commit()
     db.refresh(record)
     return record
@@ -269,22 +791,150 @@ def toggle_integration(db: Session, integ_id: int, user_id: int) -> Optional[mod
 # Aggregated Stats (Dashboard KPIs)
 # ---------------------------------------------------------------------------
 
-def get_user_stats(db: Session, user_id: int) -> dict:
+_STATS_COUNTERS = (
+    "total_predictions",
+    "completed_predictions",
+    "failed_predictions",
+    "confidence_sum",
+    "confidence_count",
+    "total_data_records",
+    "active_integrations",
+)
+
+
+def _prediction_deltas(pred: models.Prediction) -> dict:
+    """Return the UserStats counter increments contributed by a single prediction."""
+    deltas = {"total_predictions": 1}
+    if pred.status == "completed":
+        deltas["completed_predictions"] = 1
+    elif pred.status == "failed":
+        deltas["failed_predictions"] = 1
+    if pred.confidence is not None:
+        deltas["confidence_sum"] = pred.confidence
+        deltas["confidence_count"] = 1
+    return deltas
+
+
+def _compute_user_stats(db: Session, user_id: int) -> dict:
     """
-    Return a dict with aggregated KPI counts for the dashboard summary card.
+    Recompute the raw UserStats counters for *user_id* from the source tables
+    using SQL aggregates in a single round trip.
+    """
+    pred = models.Prediction
+
+    data_count = (
+        db.query(func.count(models.BusinessData.id))
+        .filter(models.BusinessData.user_id == user_id)
+        .scalar_subquery()
+    )
+    active_integrations = (
+        db.query(func.count(models.Integration.id))
+        .filter(
+            models.Integration.user_id == user_id,
+            models.Integration.is_active.is_(True),
+        )
+        .scalar_subquery()
+    )
+
+    row = (
+        db.query(
+            func.count(pred.id),
+            func.coalesce(func.sum(case((pred.status == "completed", 1), else_=0)), 0),
+            func.coalesce(func.sum(case((pred.status == "failed", 1), else_=0)), 0),
+            func.coalesce(func.sum(pred.confidence), 0.0),
+            func.count(pred.confidence),
+            data_count,
+            active_integrations,
+        )
+        .filter(pred.user_id == user_id)
+        .one()
+    )
+    return {
+        name: (float(value or 0.0) if name == "confidence_sum" else int(value or 0))
+        for name, value in zip(_STATS_COUNTERS, row)
+    }
+
+
+def _bump_user_stats(db: Session, user_id: int, **deltas) -> None:
+    """
+    Apply counter *deltas* to the UserStats row of *user_id* inside the
+    caller's transaction. Pending changes must already be flushed.
+
+    The increment is a single ``UPDATE … SET col = col + :delta`` so concurrent
+    writers never lose updates. If the user has no stats row yet it is seeded
+    from a full recount, which already reflects the flushed change.
+    """
+    stats = models.UserStats
+    values = {getattr(stats, name): getattr(stats, name) + delta for name, delta in deltas.items()}
+    values[stats.updated_at] = datetime.utcnow()
+
+    def _apply() -> int:
+        return (
+            db.query(stats)
+            .filter(stats.user_id == user_id)
+            .update(values, synchronize_session=False)
+        )
+
+    if _apply():
+        return
+    try:
+        with db.begin_nested():
+            db.add(models.UserStats(user_id=user_id, **_compute_user_stats(db, user_id)))
+    except IntegrityError:
+        # A concurrent writer seeded the row first; its recount cannot see
+        # our uncommitted change, so apply the deltas on top of it.
+        _apply()
+
+
+def rebuild_user_stats(db: Session, user_id: Optional[int] = None) -> int:
     """
-    predictions   = get_predictions(db, user_id)
-    data_records  = get_business_data(db, user_id)
-    integrations  = get_integrations(db, user_id)
+    Recompute UserStats from the source tables, repairing any drift.
+
+    Rebuilds a single user when *user_id* is given, otherwise every user.
+    Returns the number of stats rows written.
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = [uid for (uid,) in db.query(models.User.id).order_by(models.User.id)]
+
+    for uid in user_ids:
+        counters = _compute_user_stats(db, uid)
+        row = db.get(models.UserStats, uid)
+        if row is None:
+            db.add(models.UserStats(user_id=uid, **counters))
+        else:
+            for name, value in counters.items():
+                setattr(row, name, value)
+            row.updated_at = datetime.utcnow()
+    db.commit()
+    return len(user_ids)
 
-    confidences = [p.confidence for p in predictions if p.confidence is not None]
-    avg_confidence = round(sum(confidences) / len(confidences), 4) if confidences else 0.0
 
+def get_user_stats(db: Session, user_id: int) -> dict:
+    """
+    Return a dict with aggregated KPI counts for the dashboard summary card.
+
+    Served from the incrementally maintained ``user_stats`` row (a primary-key
+    lookup). Users without one yet get the counters recomputed from the
+    source tables; nothing is written — the row is seeded by the user's
+    next write (see ``_bump_user_stats``) or by :func:`rebuild_user_stats`.
+    """
+    row = db.get(models.UserStats, user_id)
+    if row is None:
+        counters = _compute_user_stats(db, user_id)
+    else:
+        counters = {name: getattr(row, name) for name in _STATS_COUNTERS}
+
+    avg_confidence = (
+        round(counters["confidence_sum"] / counters["confidence_count"], 4)
+        if counters["confidence_count"] else 0.0
+    )
     return {
-        "total_predictions":     len(predictions),
-        "total_data_records":    len(data_records),
-        "active_integrations":   sum(1 for i in integrations if i.is_active),
+        "total_predictions":     counters["total_predictions"],
+        "total_data_records":    counters["total_data_records"],
+        "active_integrations":   counters["active_integrations"],
         "avg_confidence":        avg_confidence,
-        "completed_predictions": sum(1 for p in predictions if p.status == "completed"),
-        "failed_predictions":    sum(1 for p in predictions if p.status == "failed"),
+        "completed_predictions": counters["completed_predictions"],
+        "failed_predictions":    counters["failed_predictions"],
     }
@@ -1,19 +1,198 @@
-from sqlalchemy import create_engine
+"""
+database.py — Engine & Session Factory for BGAI
+================================================
+Builds the SQLAlchemy engine from environment configuration.
+
+``BGAI_DATABASE_URL`` selects the backend — SQLite (default, ``site.db``
+in the project root) or PostgreSQL (``postgresql+psycopg://…``). Every
+backend gets explicit pool sizing and pre-ping; SQLite additionally gets
+its performance profile applied to each new DBAPI connection:
+
+* ``journal_mode=WAL``     — readers no longer block the writer (and vice versa)
+* ``synchronous=NORMAL``   — safe with WAL, avoids an fsync per commit
+* ``busy_timeout``         — wait for the write lock instead of failing with
+  "database is locked"
+* ``cache_size`` / ``mmap_size`` / ``temp_store=MEMORY`` — keep hot pages,
+  memory-mapped reads and temp b-trees out of the I/O path
+
+Every value can be overridden through ``BGAI_DATABASE_URL`` /
+``BGAI_SQLITE_*`` / ``BGAI_DB_*`` environment variables (see ``.env.example``).
+
+Two engines share that configuration: the synchronous ``engine`` used by
+Streamlit, migrations and the CLI, and an asyncio engine (aiosqlite /
+asyncpg) behind ``AsyncSessionLocal`` used by the FastAPI routes.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
-import os
+load_dotenv()
+
+logger = logging.getLogger("bgai.database")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Navigate up one level if needed, or keep in backend. check structure.
-# Currently site.db is in root. backend/database.py is in backend/.
-# So we need to go up one level.
+# site.db lives in the project root, one level above backend/
 ROOT_DIR = os.path.dirname(BASE_DIR)
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(ROOT_DIR, 'site.db')}"
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(ROOT_DIR, 'site.db')}"
+SQLALCHEMY_DATABASE_URL = os.getenv("BGAI_DATABASE_URL", "").strip() or DEFAULT_DATABASE_URL
+
+# asyncio driver used for each backend unless the sync URL already names one
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+_ASYNC_CAPABLE_DRIVERS = ("aiosqlite", "asyncpg", "psycopg")
+
+
+def _async_url(url: str) -> str:
+    """Derive the asyncio URL (``sqlite+aiosqlite``, ``postgresql+asyncpg``) from *url*."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in _ASYNC_CAPABLE_DRIVERS or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+ASYNC_DATABASE_URL = (
+    os.getenv("BGAI_ASYNC_DATABASE_URL", "").strip() or _async_url(SQLALCHEMY_DATABASE_URL)
 )
+
+
+# ---------------------------------------------------------------------------
+# Configuration helpers
+# ---------------------------------------------------------------------------
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_choice(name: str, default: str, choices: tuple) -> str:
+    value = os.getenv(name, default).strip().upper()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# SQLite performance profile
+# ---------------------------------------------------------------------------
+
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": _env_choice(
+        "BGAI_SQLITE_JOURNAL_MODE", "WAL",
+        ("WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"),
+    ),
+    "synchronous":  _env_choice("BGAI_SQLITE_SYNCHRONOUS", "NORMAL", ("OFF", "NORMAL", "FULL", "EXTRA")),
+    "busy_timeout": _env_int("BGAI_SQLITE_BUSY_TIMEOUT_MS", 5000),
+    # Negative cache_size is interpreted by SQLite as KiB rather than pages
+    "cache_size":   -_env_int("BGAI_SQLITE_CACHE_SIZE_KB", 64 * 1024),
+    "mmap_size":    _env_int("BGAI_SQLITE_MMAP_SIZE_BYTES", 256 * 1024 * 1024),
+    "temp_store":   _env_choice("BGAI_SQLITE_TEMP_STORE", "MEMORY", ("DEFAULT", "FILE", "MEMORY")),
+}
+
+POOL_SETTINGS: Dict[str, Any] = {
+    "pool_size":     _env_int("BGAI_DB_POOL_SIZE", 5),
+    "max_overflow":  _env_int("BGAI_DB_MAX_OVERFLOW", 10),
+    "pool_timeout":  _env_int("BGAI_DB_POOL_TIMEOUT_S", 30),
+    "pool_recycle":  _env_int("BGAI_DB_POOL_RECYCLE_S", -1),
+    "pool_pre_ping": _env_bool("BGAI_DB_POOL_PRE_PING", True),
+}
+
+
+def _engine_kwargs(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Return backend-specific ``create_engine`` / ``create_async_engine`` kwargs for *url*."""
+    parsed = make_url(url)
+    pool_class = AsyncAdaptedQueuePool if is_async else QueuePool
+    if parsed.get_backend_name() != "sqlite":
+        return {"poolclass": pool_class, **POOL_SETTINGS}
+
+    connect_args: Dict[str, Any] = {
+        # Driver-level lock wait, kept in step with PRAGMA busy_timeout
+        "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+    }
+    if not is_async:
+        connect_args["check_same_thread"] = False
+    if parsed.database in (None, "", ":memory:"):
+        # An in-memory database only exists on its one connection
+        return {"poolclass": StaticPool, "connect_args": connect_args}
+    return {"poolclass": pool_class, "connect_args": connect_args, **POOL_SETTINGS}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Run the SQLite performance profile on every new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs(SQLALCHEMY_DATABASE_URL))
+
+IS_SQLITE = engine.dialect.name == "sqlite"
+IS_POSTGRES = engine.dialect.name == "postgresql"
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+
+def describe_engine() -> Dict[str, Any]:
+    """
+    Return the effective engine profile — backend, pool settings and, on
+    SQLite, the PRAGMA values actually reported by a live connection.
+    """
+    effective: Dict[str, Any] = {}
+    with engine.connect() as conn:
+        if IS_SQLITE:
+            for name in SQLITE_PRAGMAS:
+                effective[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        else:
+            conn.exec_driver_sql("SELECT 1")
+    pool: Dict[str, Any] = {"class": type(engine.pool).__name__}
+    if isinstance(engine.pool, QueuePool):
+        pool.update(POOL_SETTINGS)
+    return {
+        "url":       engine.url.render_as_string(hide_password=True),
+        "async_url": make_url(ASYNC_DATABASE_URL).render_as_string(hide_password=True),
+        "backend":   engine.dialect.name,
+        "pool":      pool,
+        "pragmas":   effective,
+    }
+
+
+def log_engine_profile() -> None:
+    """Log the effective engine profile; called once at application startup."""
+    profile = describe_engine()
+    logger.info(
+        "Database %s (%s, async %s) | pool %s | pragmas %s",
+        profile["url"], profile["backend"], profile["async_url"], profile["pool"],
+        profile["pragmas"] or "n/a",
+    )
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -24,3 +203,40 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------------------------------------------------------------------------
+# Async engine (FastAPI)
+# ---------------------------------------------------------------------------
+
+# Bound on first use so importing this module never requires the async driver
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide asyncio engine, creating it on first call."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **_engine_kwargs(ASYNC_DATABASE_URL, is_async=True)
+        )
+        if _async_engine.dialect.name == "sqlite":
+            event.listen(_async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close the asyncio engine's pooled connections (application shutdown)."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,326 @@
+"""
+ingest.py — Bulk Business-Data Ingestion for BGAI
+==================================================
+Streaming parsers for nightly-export style uploads and the batching loop
+behind ``POST /business-data/bulk``.
+
+Three body formats are accepted, selected by ``Content-Type``:
+
+* ``application/json``      — a JSON array of ``BusinessDataCreate`` objects
+* ``application/x-ndjson``  — one JSON object per line
+* ``text/csv``              — header row; ``data_type`` and ``description``
+  map to their columns, every other column becomes a key of ``data``
+
+The request body is consumed chunk by chunk, rows are validated against
+``schemas.BusinessDataCreate`` and handed to an insert callback in
+fixed-size batches, so memory stays bounded by the batch size rather than
+the upload size. A single record may not exceed ``MAX_RECORD_SIZE``
+characters; a body that cannot be parsed past some row (malformed or
+truncated JSON, an unterminated CSV quote, an over-long line) stops the
+upload with :class:`MalformedBody`.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import codecs
+import csv
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from . import schemas
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+# Longest single record (characters; bytes for NDJSON) a parser buffers
+MAX_RECORD_SIZE = int(os.getenv("BGAI_INGEST_MAX_RECORD_SIZE", str(1024 * 1024)))
+
+FORMATS = {
+    "application/json":     "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson":   "ndjson",
+    "application/jsonl":    "ndjson",
+    "text/csv":             "csv",
+}
+
+# Columns of a CSV upload that map onto BusinessDataCreate fields directly
+_CSV_RESERVED = ("data_type", "description")
+
+# (1-based row number, parsed object | raw JSON bytes | Exception)
+Row = Tuple[int, Any]
+
+
+class MalformedBody(ValueError):
+    """The upload cannot be parsed from 1-based *row* on; nothing after it is read."""
+
+    def __init__(self, row: int, message: str) -> None:
+        super().__init__(f"Row {row}: {message}")
+        self.row = row
+
+
+# ---------------------------------------------------------------------------
+# Format detection
+# ---------------------------------------------------------------------------
+
+def detect_format(content_type: str) -> str:
+    """Map a ``Content-Type`` header to ``"json"``, ``"ndjson"`` or ``"csv"``."""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type not in FORMATS:
+        raise ValueError(
+            f"Unsupported Content-Type {media_type or '(none)'!r}. "
+            f"Use one of: {', '.join(sorted(FORMATS))}."
+        )
+    return FORMATS[media_type]
+
+
+# ---------------------------------------------------------------------------
+# Streaming parsers
+# ---------------------------------------------------------------------------
+
+async def _iter_text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 without splitting multi-byte characters."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Row]:
+    """
+    Yield the elements of a top-level JSON array as they arrive. Elements
+    must be separated by exactly one comma, and only whitespace may follow
+    the closing ``]``.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, row = "", 0, 0
+    # What may come next: "[", then "value_or_end", then "comma_or_end" and
+    # "value" in turn until "]" leaves "end" (trailing whitespace only)
+    expect = "["
+    async for text in _iter_text(chunks):
+        buf = buf[pos:] + text
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+            if expect == "end":
+                raise MalformedBody(row + 1, "Unexpected data after the closing ']'.")
+            if expect == "[":
+                if char != "[":
+                    raise MalformedBody(row + 1, "Expected a JSON array of records.")
+                expect, pos = "value_or_end", pos + 1
+                continue
+            if char == "]" and expect != "value":
+                expect, pos = "end", pos + 1
+                continue
+            if expect == "comma_or_end":
+                if char != ",":
+                    raise MalformedBody(row + 1, "Expected ',' or ']' after a record.")
+                expect, pos = "value", pos + 1
+                continue
+            if char in ",]":
+                raise MalformedBody(row + 1, f"Expected a record, got '{char}'.")
+            try:
+                obj, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Either the element continues in the next chunk or it is
+                # malformed; only the size cap tells them apart before EOF
+                if len(buf) - pos > MAX_RECORD_SIZE:
+                    raise MalformedBody(
+                        row + 1, f"Malformed JSON or a record over {MAX_RECORD_SIZE} characters."
+                    )
+                break
+            row += 1
+            expect = "comma_or_end"
+            yield row, obj
+    if expect != "end":
+        raise MalformedBody(row + 1, "Malformed or truncated JSON array.")
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Row]:
+    """
+    Yield each non-blank line as raw ``bytes``; parsing is deferred to
+    ``model_validate_json`` so JSON decoding and validation happen in one pass.
+    """
+    pending, row = b"", 0
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                row += 1
+                yield row, line
+        if len(pending) > MAX_RECORD_SIZE:
+            raise MalformedBody(row + 1, f"Line longer than {MAX_RECORD_SIZE} bytes.")
+    if pending.strip():
+        yield row + 1, pending
+
+
+def _coerce(value: str) -> Any:
+    """Turn a CSV cell into an int or float when it looks numeric."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _csv_record(header: List[str], cells: List[str]) -> Dict[str, Any]:
+    """Map one CSV row onto the ``BusinessDataCreate`` shape."""
+    if len(cells) != len(header):
+        raise ValueError(f"Expected {len(header)} columns, got {len(cells)}.")
+    record: Dict[str, Any] = {"data": {}}
+    for name, cell in zip(header, cells):
+        if name in _CSV_RESERVED:
+            record[name] = cell
+        elif cell != "":
+            record["data"][name] = _coerce(cell)
+    return record
+
+
+async def iter_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[Row]:
+    """
+    Yield one record per CSV data row; quoted fields may span lines.
+
+    Complete lines go through a strict ``csv.reader``. The lines of a
+    record whose quoted field is still open when they run out are kept
+    (up to ``MAX_RECORD_SIZE``) and parsed again once more lines arrive.
+    Quoting errors and a quote still open at the end of the body raise
+    :class:`MalformedBody`.
+    """
+    header: List[str] = []
+    lines: List[str] = []      # complete lines not yet part of a yielded record
+    pending, row = "", 0
+
+    def _rows(final: bool):
+        nonlocal header, row
+        reader = csv.reader(lines, strict=True)
+        consumed = 0
+        try:
+            for cells in reader:
+                consumed = reader.line_num
+                if not cells:
+                    continue
+                if not header:
+                    header = [c.strip() for c in cells]
+                    continue
+                row += 1
+                try:
+                    yield row, _csv_record(header, cells)
+                except ValueError as exc:
+                    yield row, exc
+        except csv.Error as exc:
+            # Failing on the last line may just mean the record goes on
+            if final or reader.line_num < len(lines):
+                raise MalformedBody(row + 1, f"Malformed CSV: {exc}.")
+        del lines[:consumed]
+
+    async for text in _iter_text(chunks):
+        parts = (pending + text).split("\n")
+        pending = parts.pop()
+        lines.extend(part + "\n" for part in parts)
+        for item in _rows(final=False):
+            yield item
+        if sum(map(len, lines)) + len(pending) > MAX_RECORD_SIZE:
+            raise MalformedBody(
+                row + 1, f"Unterminated quoted field or a record over {MAX_RECORD_SIZE} characters."
+            )
+    if pending:
+        lines.append(pending)
+    for item in _rows(final=True):
+        yield item
+
+
+_PARSERS = {"json": iter_json_array, "ndjson": iter_ndjson, "csv": iter_csv}
+
+
+# ---------------------------------------------------------------------------
+# Batching loop
+# ---------------------------------------------------------------------------
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+async def ingest_business_data(
+    chunks: AsyncIterable[bytes],
+    fmt: str,
+    insert_batch: Callable[[List[schemas.BusinessDataCreate]], Awaitable[int]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Parse, validate and insert an uploaded body in batches of *batch_size*.
+
+    *insert_batch* receives each list of validated records and returns the
+    number of rows it inserted (one transaction per call). Invalid rows are
+    skipped and reported; at most ``MAX_REPORTED_ERRORS`` are listed.
+    :class:`MalformedBody` propagates with ``processed`` / ``inserted`` set:
+    the rows of the batches committed before it (the open batch is dropped).
+
+    Returns a dict matching ``schemas.BulkIngestResult``.
+    """
+    result: Dict[str, Any] = {
+        "format": fmt, "received": 0, "inserted": 0, "failed": 0,
+        "batches": [], "errors": [],
+    }
+    records: List[schemas.BusinessDataCreate] = []
+    batch_received = batch_failed = 0
+
+    async def _flush() -> None:
+        nonlocal records, batch_received, batch_failed
+        inserted = await insert_batch(records) if records else 0
+        result["batches"].append({
+            "batch":    len(result["batches"]) + 1,
+            "received": batch_received,
+            "inserted": inserted,
+            "failed":   batch_failed,
+        })
+        result["inserted"] += inserted
+        records, batch_received, batch_failed = [], 0, 0
+
+    def _reject(row_no: int, message: str) -> None:
+        nonlocal batch_failed
+        batch_failed += 1
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"row": row_no, "error": message})
+
+    try:
+        async for row_no, item in _PARSERS[fmt](chunks):
+            result["received"] += 1
+            batch_received += 1
+            if isinstance(item, Exception):
+                _reject(row_no, str(item))
+            else:
+                try:
+                    if isinstance(item, bytes):
+                        records.append(schemas.BusinessDataCreate.model_validate_json(item))
+                    else:
+                        records.append(schemas.BusinessDataCreate.model_validate(item))
+                except ValidationError as exc:
+                    _reject(row_no, _format_validation_error(exc))
+            if batch_received >= batch_size:
+                await _flush()
+    except MalformedBody as exc:
+        exc.processed = result["received"] - batch_received
+        exc.inserted = result["inserted"]
+        raise
+
+    if batch_received:
+        await _flush()
+    return result
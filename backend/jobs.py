@@ -0,0 +1,351 @@
+"""
+jobs.py — Background Prediction Jobs for BGAI
+==============================================
+Runs ``ml_engine.train_model`` for API-submitted predictions in a process
+pool so model fitting never occupies a request worker.
+
+``POST /predictions`` reserves a queue slot with :func:`reserve`, stores
+the Prediction as ``pending`` and calls :func:`submit`; when the fit finishes, a completion callback (on the
+pool's result thread) writes the result through ``crud.complete_prediction``,
+stores the fitted model in the registry and the result in the ML cache.
+Clients poll ``GET /predictions/{id}`` until the status leaves ``pending``.
+Jobs cancelled at shutdown are recorded as failed; rows whose job was lost
+outright (restart, killed worker) are failed by :func:`fail_stale`, which
+the API runs at startup and every ``BGAI_JOB_STALE_SWEEP_S`` seconds.
+
+Each API process (e.g. every ``uvicorn --workers`` worker) has its own
+pool and only knows its own jobs, so ownership is recorded on the rows:
+every sweep first bumps ``updated_at`` on the pending predictions this
+process holds, and only rows nobody has touched for
+``BGAI_JOB_STALE_AFTER_S`` are failed. A job queued in a live worker is
+never failed by another; a dead worker's rows go stale within that age.
+``POST /predictions/batch`` instead awaits :func:`run_batch`, which fits
+several model types in one job and hands the results back to the route;
+``GET /business-data/forecast`` likewise awaits :func:`run_series`.
+
+* ``BGAI_JOB_WORKERS``      — worker processes (default: half the CPUs, min 1);
+  each gets an equal share of the ``compute`` thread budget
+* ``BGAI_JOB_QUEUE_DEPTH``  — max queued + running jobs; beyond it
+  :func:`reserve` raises :class:`QueueFull` and the API answers 429
+* ``BGAI_JOB_STALE_AFTER_S`` — time without a heartbeat after which a
+  ``pending`` prediction counts as lost (default 3600)
+* ``BGAI_JOB_STALE_SWEEP_S`` — sweep (and heartbeat) interval (default 300,
+  at most half of ``BGAI_JOB_STALE_AFTER_S``)
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from . import compute, crud, database, ml_cache, ml_engine, model_registry
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+load_dotenv()
+
+logger = logging.getLogger("bgai.jobs")
+
+WORKERS = int(os.getenv("BGAI_JOB_WORKERS", 0)) or max(1, (os.cpu_count() or 2) // 2)
+QUEUE_DEPTH = int(os.getenv("BGAI_JOB_QUEUE_DEPTH", 32))
+STALE_AFTER_SECONDS = float(os.getenv("BGAI_JOB_STALE_AFTER_S", 3600))
+# The sweep is also the heartbeat: it must come well inside the stale age
+STALE_SWEEP_SECONDS = min(float(os.getenv("BGAI_JOB_STALE_SWEEP_S", 300)), STALE_AFTER_SECONDS / 2)
+
+CANCELLED_ERROR = (
+    "ML Engine Error: the job was cancelled before it finished (server shutdown); "
+    "submit the prediction again."
+)
+LOST_ERROR = (
+    "ML Engine Error: the job was lost (server restart or crashed worker); "
+    "submit the prediction again."
+)
+
+
+class QueueFull(RuntimeError):
+    """Raised by :func:`reserve` when ``QUEUE_DEPTH`` jobs are already in flight."""
+
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+_pending_ids: set = set()   # predictions whose job this process still owns
+_counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+_waits: "deque[float]" = deque(maxlen=1000)   # seconds queued before a worker started
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # One pool per API process: jobs (and _pending_ids) are not shared
+        # between uvicorn workers, hence the heartbeat in fail_stale.
+        # "spawn" keeps the parent's threads, sockets and DB connections out of workers
+        _executor = ProcessPoolExecutor(
+            max_workers=WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def _init_worker() -> None:
+    """Give each worker process its share of the CPU budget (and warm it up if enabled)."""
+    compute.budget.resize(max(1, compute.TOTAL_THREADS // WORKERS), compute.MAX_PER_FIT)
+    if ml_engine.WARM_UP:
+        ml_engine.warm_up()
+
+
+def _run(fn, submitted: float, *args):
+    """Worker-side wrapper: call *fn* and report how long the job sat in the queue."""
+    waited = time.time() - submitted
+    return fn(*args), waited
+
+
+def _record_wait(future: Future) -> Any:
+    """Unwrap a :func:`_run` result, recording its queue wait."""
+    result, waited = future.result()
+    with _lock:
+        _waits.append(max(0.0, waited))
+    return result
+
+
+def _finish(
+    prediction_id: int, cache_key: str, executor: ProcessPoolExecutor, future: Future
+) -> None:
+    """Completion callback: persist the result of one job."""
+    global _in_flight
+    bundle = None
+    try:
+        result, bundle = _record_wait(future)
+    except CancelledError:
+        result = {"error": CANCELLED_ERROR}
+    except BrokenProcessPool as exc:
+        result = {"error": f"ML Engine Error: worker process died ({exc})"}
+        _reset_executor(executor)
+    except Exception as exc:
+        result = {"error": f"ML Engine Error: {exc}"}
+
+    failed = "error" in result
+    try:
+        db = database.SessionLocal()
+        try:
+            record = crud.complete_prediction(db, prediction_id, result)
+        finally:
+            db.close()
+        if record is not None and bundle is not None:
+            model_registry.save(prediction_id, bundle)
+        ml_cache.store_key(cache_key, result)
+    except Exception:
+        logger.exception("Could not store the result of prediction %s", prediction_id)
+        failed = True
+    finally:
+        with _lock:
+            _in_flight -= 1
+            _pending_ids.discard(prediction_id)
+            _counters["failed" if failed else "completed"] += 1
+
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    """Drop the *broken* pool (if still current) so the next submission starts a fresh one."""
+    global _executor
+    with _lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def reserve() -> None:
+    """
+    Claim a queue slot for a job about to be submitted. Raises
+    :class:`QueueFull` when ``QUEUE_DEPTH`` jobs are already in flight.
+    """
+    global _in_flight
+    with _lock:
+        if _in_flight >= QUEUE_DEPTH:
+            _counters["rejected"] += 1
+            raise QueueFull(f"Prediction queue is full ({QUEUE_DEPTH} jobs in flight).")
+        _in_flight += 1
+
+
+def release() -> None:
+    """Return a slot from :func:`reserve` that will not be submitted."""
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def submit(
+    prediction_id: int,
+    model_type: str,
+    input_data: Dict[str, Any],
+    deadline_s: Optional[float] = None,
+    cache_key: Optional[str] = None,
+) -> None:
+    """
+    Queue a fit for the pending prediction *prediction_id* on a reserved
+    slot. *deadline_s* bounds the fit itself, not the time spent queued.
+    Pass the ``ml_cache.cache_key`` of the request if the caller already
+    computed it, to avoid hashing the payload again.
+    """
+    key = cache_key or ml_cache.cache_key(model_type, input_data)
+    with _lock:
+        _counters["submitted"] += 1
+        _pending_ids.add(prediction_id)
+        executor = _get_executor()
+    try:
+        try:
+            future = executor.submit(
+                _run, ml_engine.train_model, time.time(), model_type, input_data, deadline_s
+            )
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            with _lock:
+                executor = _get_executor()
+            future = executor.submit(
+                _run, ml_engine.train_model, time.time(), model_type, input_data, deadline_s
+            )
+    except Exception:
+        with _lock:
+            _pending_ids.discard(prediction_id)
+        release()
+        raise
+    future.add_done_callback(lambda f: _finish(prediction_id, key, executor, f))
+
+
+def run_batch(
+    model_types: List[str], input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Future:
+    """
+    Fit several model types together (``ml_engine.train_models``) on a
+    reserved slot. Unlike :func:`submit` nothing is persisted: the returned
+    future resolves to ``{model_type: (result, bundle)}`` for the caller.
+    """
+    return _call(ml_engine.train_models, model_types, input_data, None, deadline_s)
+
+
+def run_series(
+    frame: "pd.DataFrame",
+    model_type: str,
+    steps: int = ml_engine.DEFAULT_FORECAST_STEPS,
+    deadline_s: Optional[float] = None,
+) -> Future:
+    """
+    Forecast every ``(data_type, region)`` series of a BusinessData
+    *frame* (``ml_engine.forecast_series``) on a reserved slot; the future
+    resolves to the per-series results.
+    """
+    return _call(
+        ml_engine.forecast_series, frame, model_type, ("data_type", "region"),
+        "value", "order", steps, deadline_s,
+    )
+
+
+def _call(fn, *args) -> Future:
+    """Run ``fn(*args)`` in the pool on a reserved slot; the returned future carries its result."""
+    with _lock:
+        _counters["submitted"] += 1
+        executor = _get_executor()
+    try:
+        try:
+            future = executor.submit(_run, fn, time.time(), *args)
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            with _lock:
+                executor = _get_executor()
+            future = executor.submit(_run, fn, time.time(), *args)
+    except Exception:
+        release()
+        raise
+    outcome: Future = Future()
+    future.add_done_callback(lambda f: _batch_done(executor, f, outcome))
+    return outcome
+
+
+def _batch_done(executor: ProcessPoolExecutor, future: Future, outcome: Future) -> None:
+    global _in_flight
+    failed = True
+    try:
+        outcome.set_result(_record_wait(future))
+        failed = False
+    except BrokenProcessPool as exc:
+        _reset_executor(executor)
+        outcome.set_exception(exc)
+    except BaseException as exc:
+        outcome.set_exception(exc)
+    finally:
+        with _lock:
+            _in_flight -= 1
+            _counters["failed" if failed else "completed"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    """Queue occupancy, lifetime job counters and queue wait times for this API worker."""
+    with _lock:
+        waits = sorted(_waits)
+        return {
+            **_counters,
+            "in_flight":   _in_flight,
+            "queue_depth": QUEUE_DEPTH,
+            "workers":     WORKERS,
+            "mean_wait_s": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "p95_wait_s":  round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 4) if waits else 0.0,
+        }
+
+
+def warm_up() -> None:
+    """
+    Start every worker process now rather than on the first jobs, so their
+    start-up (and ``ml_engine.warm_up`` when ``BGAI_WARM_UP`` is set) runs
+    before traffic arrives. Returns without waiting for them.
+    """
+    with _lock:
+        executor = _get_executor()
+    for _ in range(WORKERS):
+        executor.submit(os.getpid)
+
+
+def fail_stale(max_age_s: Optional[float] = None) -> int:
+    """
+    Heartbeat the ``pending`` predictions this process holds, then fail
+    those no process has touched for *max_age_s* (default
+    ``STALE_AFTER_SECONDS``), so clients polling them get an answer.
+    Returns the rows failed.
+    """
+    max_age_s = STALE_AFTER_SECONDS if max_age_s is None else max_age_s
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_s)
+    with _lock:
+        owned = tuple(_pending_ids)
+    db = database.SessionLocal()
+    try:
+        crud.touch_pending_predictions(db, owned)
+        failed = crud.fail_stale_predictions(db, cutoff, LOST_ERROR, exclude=owned)
+    finally:
+        db.close()
+    if failed:
+        logger.warning("Marked %d stale pending prediction(s) as failed", failed)
+    return failed
+
+
+def shutdown() -> None:
+    """Stop the pool at application shutdown; queued jobs are cancelled."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
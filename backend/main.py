@@ -1,15 +1,58 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+
+from . import (
+    models, schemas, crud, async_crud, auth, database, ingest, migrations,
+    compute, jobs, ml_cache, ml_engine, model_registry,
+)
+
+# Create Database Tables and apply pending schema migrations
+migrations.init_db(database.engine)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
-from . import models, schemas, crud, auth, database, ml_engine
 
-# Create Database Tables
-models.Base.metadata.create_all(bind=database.engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Report the effective database profile (pool + SQLite pragmas) once per worker
+    database.log_engine_profile()
+    database.get_async_engine()
+    if ml_engine.WARM_UP:
+        # Opt-in: spawn the job workers and load the ML libraries before traffic
+        jobs.warm_up()
+        seconds = await run_in_threadpool(ml_engine.warm_up)
+        logging.getLogger("bgai.api").info("ML engine warmed up in %.2fs", seconds)
+    # Pending predictions whose job died with a previous process never finish
+    await run_in_threadpool(jobs.fail_stale)
+    sweeper = asyncio.create_task(_sweep_stale_jobs())
+    yield
+    sweeper.cancel()
+    jobs.shutdown()
+    await database.dispose_async_engine()
 
-app = FastAPI(title="BGAI Predictive Analytics API")
+
+async def _sweep_stale_jobs() -> None:
+    """Fail lost pending predictions every ``jobs.STALE_SWEEP_SECONDS``."""
+    while True:
+        await asyncio.sleep(jobs.STALE_SWEEP_SECONDS)
+        try:
+            await run_in_threadpool(jobs.fail_stale)
+        except Exception:
+            logging.getLogger("bgai.api").exception("Stale prediction sweep failed")
+
+
+app = FastAPI(title="BGAI Predictive Analytics API", lifespan=lifespan)
 
 # CORS Setup
 origins = [
@@ -25,13 +68,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Pagination defaults for list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Upper bound for GET /predictions/{id}/forecast?steps=
+MAX_FORECAST_STEPS = 365
+
+# Dependencies — routes use the async session; bulk ingestion keeps a sync
+# session whose CPU-bound executemany batches run in the thread pool
+get_db = database.get_db
+get_async_db = database.get_async_db
 
 @app.get("/")
 def read_root():
@@ -39,9 +86,12 @@ def read_root():
 
 # Auth Routes
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.password):
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    user = await async_crud.get_user_by_email(db, form_data.username)
+    # Password hashing is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(auth.verify_password, form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -51,69 +101,410 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer", "user_id": user.id, "name": user.name}
 
 @app.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    return await async_crud.create_user(db=db, user=user)
 
 # Business Data Routes
 @app.post("/business-data", response_model=schemas.BusinessData)
-def create_business_data_entry(
+async def create_business_data_entry(
     data: schemas.BusinessDataCreate,
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.create_business_data(db=db, data=data, user_id=current_user.id)
+    return await async_crud.create_business_data(db=db, data=data, user_id=current_user.id)
 
-@app.get("/business-data", response_model=List[schemas.BusinessData])
-def read_business_data(
+@app.post("/business-data/bulk", response_model=schemas.BulkIngestResult)
+async def bulk_create_business_data(
+    request: Request,
+    batch_size: int = Query(ingest.DEFAULT_BATCH_SIZE, ge=1, le=50000),
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    return crud.get_business_data(db=db, user_id=current_user.id)
+    """Stream a JSON array, NDJSON or CSV body into business_data in batches."""
+    try:
+        fmt = ingest.detect_format(request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc))
+
+    async def insert_batch(records):
+        return await run_in_threadpool(crud.bulk_create_business_data, db, records, current_user.id)
+
+    try:
+        return await ingest.ingest_business_data(request.stream(), fmt, insert_batch, batch_size)
+    except ingest.MalformedBody as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{exc} Nothing from row {exc.processed + 1} on was stored "
+                   f"({exc.inserted} rows before it were inserted).",
+        )
+
+def _parse_filter_value(raw: str):
+    """Interpret a query-string filter value as JSON when possible (``3`` → 3)."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+@app.get("/business-data", response_model=schemas.BusinessDataPage)
+async def read_business_data(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    data_key: Optional[str] = Query(None, description="Payload field to filter on, e.g. region"),
+    data_value: Optional[str] = Query(None, description="Required value of data_key"),
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    data_filters = {}
+    if data_key is not None:
+        if data_value is None:
+            raise HTTPException(status_code=400, detail="data_value is required with data_key")
+        data_filters[data_key] = _parse_filter_value(data_value)
+    try:
+        items, next_cursor = await async_crud.get_business_data_page(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor,
+            data_filters=data_filters,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/business-data/forecast", response_model=schemas.SeriesForecastResponse)
+async def forecast_business_data(
+    model_type: str = "Linear Regression",
+    steps: int = Query(ml_engine.DEFAULT_FORECAST_STEPS, ge=1, le=MAX_FORECAST_STEPS),
+    data_type: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    deadline_seconds: Optional[float] = Query(None, gt=0, le=3600),
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Forecast ``value`` for every ``(data_type, region)`` series of the
+    user's business data (optionally filtered), ordered by ``event_date``
+    and then ``timestamp``. Linear / Polynomial Regression fit all series
+    at once in the request; ensembles run as one job in the pool.
+    """
+    import pandas as pd
+
+    rows = await async_crud.get_business_data_rows(
+        db=db, user_id=current_user.id, data_type=data_type, region=region, start=start, end=end
+    )
+    frame = pd.DataFrame(
+        rows, columns=["id", "data_type", "timestamp", "region", "value", "event_date"]
+    )
+    frame["order"] = pd.to_datetime(frame["event_date"]).fillna(pd.to_datetime(frame["timestamp"]))
+    frame = frame.sort_values(["order", "id"], kind="mergesort")
+
+    if ml_engine.has_closed_form(model_type):
+        results = await run_in_threadpool(
+            ml_engine.forecast_series, frame, model_type, ("data_type", "region"), "value", "order", steps
+        )
+    else:
+        try:
+            jobs.reserve()
+        except jobs.QueueFull as exc:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc))
+        try:
+            results = await asyncio.wrap_future(jobs.run_series(frame, model_type, steps, deadline_seconds))
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=f"ML Engine Error: {exc}")
+    return {
+        "model_type": model_type,
+        "steps":      steps,
+        "series":     [{**r.pop("series"), **r} for r in results],
+    }
 
 # Prediction Routes
 @app.post("/predictions", response_model=schemas.Prediction)
-def create_prediction(
+async def create_prediction(
     prediction: schemas.PredictionCreate,
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # 1. Run ML Engine
-    result = ml_engine.train_and_predict(prediction.model_type, prediction.input_data)
-    
-    # 2. Save Prediction + Result
-    return crud.create_prediction(db=db, prediction=prediction, result=result, user_id=current_user.id)
-
-@app.get("/predictions", response_model=List[schemas.Prediction])
-def read_predictions(
+    """
+    Queue a prediction and return it with ``status="pending"``; poll
+    ``GET /predictions/{id}`` for the result. Results already in the ML
+    cache, and closed-form Linear / Polynomial fits, are stored and
+    returned as ``completed`` straight away.
+    """
+    # 1. Serve repeated runs from the result cache without queueing; hashing
+    #    the payload is O(size), so it runs off the event loop — once
+    def _lookup():
+        key = ml_cache.cache_key(prediction.model_type, prediction.input_data)
+        return key, ml_cache.result_cache.get(key)
+
+    key, cached = await run_in_threadpool(_lookup)
+    if cached is not None:
+        return await async_crud.create_prediction(
+            db=db, prediction=prediction, result=cached, user_id=current_user.id
+        )
+
+    # 2. Linear / Polynomial fits on clean data are cheap, but parsing the
+    #    records is O(rows) — fit in the thread pool rather than a job
+    fast = await run_in_threadpool(ml_engine.fit_closed_form, prediction.model_type, prediction.input_data)
+    if fast is not None:
+        result, bundle = fast
+        db_pred = await async_crud.create_prediction(
+            db=db, prediction=prediction, result=result, user_id=current_user.id
+        )
+
+        def _persist():
+            ml_cache.result_cache.put(key, result)
+            model_registry.save(db_pred.id, bundle)
+
+        await run_in_threadpool(_persist)
+        return db_pred
+
+    # 3. Otherwise store a pending row and hand the fit to the job pool
+    try:
+        jobs.reserve()
+    except jobs.QueueFull as exc:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc))
+    try:
+        db_pred = await async_crud.create_pending_prediction(
+            db=db, prediction=prediction, user_id=current_user.id
+        )
+    except Exception:
+        jobs.release()
+        raise
+    jobs.submit(
+        db_pred.id, prediction.model_type, prediction.input_data, prediction.deadline_seconds,
+        cache_key=key,
+    )
+    return db_pred
+
+@app.post("/predictions/batch", response_model=schemas.PredictionBatch)
+async def create_prediction_batch(
+    batch: schemas.PredictionBatchCreate,
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Fit several model types on the same data and return one completed (or
+    failed) prediction per model with a ranked comparison. Models missing
+    from the ML cache are fitted together in a single job that parses and
+    splits the data once.
+    """
+    model_types = list(dict.fromkeys(batch.model_types))
+    cached, missing = await run_in_threadpool(ml_cache.lookup_many, model_types, batch.input_data)
+
+    fitted = {}
+    if missing:
+        try:
+            jobs.reserve()
+        except jobs.QueueFull as exc:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(exc))
+        try:
+            fitted = await asyncio.wrap_future(
+                jobs.run_batch(missing, batch.input_data, batch.deadline_seconds)
+            )
+        except Exception as exc:
+            fitted = {mt: ({"error": f"ML Engine Error: {exc}"}, None) for mt in missing}
+
+    results = {mt: cached[mt] if mt in cached else fitted[mt][0] for mt in model_types}
+    predictions = []
+    for model_type, result in results.items():
+        predictions.append(await async_crud.create_prediction(
+            db=db,
+            prediction=schemas.PredictionCreate(
+                name=f"{batch.name or 'Batch'} — {model_type}",
+                model_type=model_type,
+                input_data=batch.input_data,
+            ),
+            result=result,
+            user_id=current_user.id,
+        ))
+
+    def _persist():
+        for pred in predictions:
+            if pred.model_type not in fitted:
+                continue
+            result, bundle = fitted[pred.model_type]
+            ml_cache.store(pred.model_type, batch.input_data, result)
+            if bundle is not None:
+                model_registry.save(pred.id, bundle)
+
+    await run_in_threadpool(_persist)
+    ranking = ml_engine.rank_results(results)
+    return {
+        "predictions": predictions,
+        "ranking":     ranking,
+        "best_model":  ranking[0]["model_type"] if ranking and ranking[0]["rank"] == 1 else None,
+    }
+
+@app.get("/predictions", response_model=schemas.PredictionPage)
+async def read_predictions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        items, next_cursor = await async_crud.get_predictions_page(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/predictions/summaries", response_model=schemas.PredictionSummaryPage)
+async def read_prediction_summaries(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_forecast: bool = False,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_predictions(db=db, user_id=current_user.id)
+    try:
+        items, next_cursor = await async_crud.get_prediction_summaries_page(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor,
+            include_forecast=include_forecast,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/predictions/{prediction_id}", response_model=schemas.Prediction)
+async def read_prediction(
+    prediction_id: int,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    prediction = await async_crud.get_prediction(db=db, pred_id=prediction_id, user_id=current_user.id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    return prediction
+
+@app.get("/predictions/{prediction_id}/forecast", response_model=schemas.ForecastResponse)
+async def read_prediction_forecast(
+    prediction_id: int,
+    steps: int = Query(ml_engine.DEFAULT_FORECAST_STEPS, ge=1, le=MAX_FORECAST_STEPS),
+    coverage: float = Query(ml_engine.DEFAULT_COVERAGE, gt=0, lt=1),
+    interval: str = Query("normal", pattern="^(normal|bootstrap)$"),
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Forecast *steps* points with the stored model; refits only if it was
+    evicted. ``interval=bootstrap`` gives per-step intervals from simulated
+    forecasts instead of one residual band (see ``ml_engine.forecast``).
+    """
+    prediction = await async_crud.get_prediction(db=db, pred_id=prediction_id, user_id=current_user.id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    if prediction.status != "completed":
+        raise HTTPException(status_code=409, detail="Prediction did not complete; no model to forecast with")
+
+    def _forecast():
+        bundle, refitted = model_registry.load_or_fit(
+            prediction.id, prediction.model_type, prediction.input_data
+        )
+        return (ml_engine.forecast(bundle, steps, coverage, interval) if bundle else None), refitted
+
+    forecast, refitted = await run_in_threadpool(_forecast)
+    if forecast is None:
+        raise HTTPException(status_code=422, detail="Model could not be refitted from the stored input data")
+    return {
+        "prediction_id":   prediction.id,
+        "model_type":      prediction.model_type,
+        "steps":           steps,
+        "coverage":        coverage,
+        "interval_method": interval,
+        "refitted":        refitted,
+        "forecast":        forecast,
+    }
+
+@app.post("/predictions/{prediction_id}/update", response_model=schemas.Prediction)
+async def update_prediction(
+    prediction_id: int,
+    update: schemas.PredictionUpdate,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Append new records to a completed prediction and update its model
+    incrementally (``ml_engine.update_model``) instead of refitting on the
+    whole history. The stored input data grows by the new records.
+    """
+    prediction = await async_crud.get_prediction(db=db, pred_id=prediction_id, user_id=current_user.id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    try:
+        return await run_in_threadpool(_apply_prediction_update, prediction.id, update.values)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+def _apply_prediction_update(prediction_id: int, values: list) -> models.Prediction:
+    """
+    Update the stored model and append *values* to the prediction as one
+    step: the row is re-read ``FOR UPDATE`` and written under the model's
+    registry lock, so concurrent updates can neither lose records nor let
+    ``input_data`` drift from the model's ``last_idx``. The records are
+    committed before the updated model replaces the stored one.
+    """
+    with model_registry.locked(prediction_id):
+        db = database.SessionLocal()
+        try:
+            record = db.get(models.Prediction, prediction_id, with_for_update=True)
+            if record is None:
+                raise HTTPException(status_code=404, detail="Prediction not found")
+            if record.status != "completed":
+                raise HTTPException(status_code=409, detail="Prediction did not complete; no model to update")
+            # The records are committed before the updated model is stored
+            committed = []
+            result, _ = model_registry.update(
+                record.id, record.model_type, record.input_data, record.output_data, values,
+                commit=lambda updated: committed.append(
+                    crud.append_prediction_values(db, record.id, values, updated)
+                ),
+            )
+            if result is None:
+                raise HTTPException(status_code=422, detail="Model could not be refitted from the stored input data")
+            return committed[0]
+        finally:
+            db.close()
+
+@app.get("/ml/jobs", response_model=schemas.JobStats)
+async def read_job_stats(current_user: schemas.User = Depends(auth.get_current_user)):
+    """Occupancy of this worker's prediction job queue."""
+    return jobs.stats()
+
+@app.get("/ml/compute", response_model=schemas.ComputeStats)
+async def read_compute_stats(current_user: schemas.User = Depends(auth.get_current_user)):
+    """Thread budget of fits run in this API worker (model refits)."""
+    return compute.stats()
+
+@app.get("/ml/cache", response_model=schemas.MLCacheStats)
+async def read_ml_cache_stats(current_user: schemas.User = Depends(auth.get_current_user)):
+    """Hit / miss counters of this worker's prediction result cache."""
+    return ml_cache.stats()
 
 # Feedback Routes
 @app.post("/feedback", response_model=schemas.Feedback)
-def create_user_feedback(
+async def create_user_feedback(
     feedback: schemas.FeedbackCreate,
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.create_feedback(db=db, feedback=feedback, user_id=current_user.id)
+    return await async_crud.create_feedback(db=db, feedback=feedback, user_id=current_user.id)
 
 # Integration Routes
 @app.get("/integrations", response_model=List[schemas.Integration])
-def read_integrations(
+async def read_integrations(
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_integrations(db=db, user_id=current_user.id)
+    return await async_crud.get_integrations(db=db, user_id=current_user.id)
 
 @app.post("/integrations", response_model=schemas.Integration)
-def add_integration(
+async def add_integration(
     integration: schemas.IntegrationCreate,
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.create_integration(db=db, integration=integration, user_id=current_user.id)
+    return await async_crud.create_integration(db=db, integration=integration, user_id=current_user.id)
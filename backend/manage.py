@@ -0,0 +1,58 @@
+"""
+manage.py — Maintenance Commands for BGAI
+=========================================
+Small command-line entry point for operational tasks that should not run
+inside a web request.
+
+Usage::
+
+    python -m backend.manage migrate                  # apply pending schema migrations
+    python -m backend.manage rebuild-stats            # every user
+    python -m backend.manage rebuild-stats --user-id 7
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from . import crud, database, migrations
+
+
+def _migrate(args: argparse.Namespace) -> int:
+    """Apply pending schema migrations (tables were created by ``init_db``)."""
+    print(f"Schema is at version {migrations.current_version(database.engine)}.")
+    return 0
+
+
+def _rebuild_stats(args: argparse.Namespace) -> int:
+    """Recompute the ``user_stats`` KPI table from the source tables."""
+    db = database.SessionLocal()
+    try:
+        count = crud.rebuild_user_stats(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt KPI stats for {count} user(s).")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.manage", description="BGAI maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_migrate = sub.add_parser("migrate", help="Create missing tables and apply schema migrations")
+    p_migrate.set_defaults(func=_migrate)
+
+    p_stats = sub.add_parser("rebuild-stats", help="Repair drift in the per-user KPI summary table")
+    p_stats.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    p_stats.set_defaults(func=_rebuild_stats)
+
+    args = parser.parse_args(argv)
+    migrations.init_db(database.engine)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+migrations.py — Versioned Schema Migrations for BGAI
+====================================================
+``Base.metadata.create_all`` only creates missing tables; it never alters
+existing ones. This module applies ordered, idempotent schema changes to
+databases created by earlier releases and records each applied version in
+a ``schema_migrations`` table so every step runs exactly once.
+
+Add a migration by appending ``(version, name, function)`` to
+``MIGRATIONS``; the function receives an open ``Connection`` inside the
+migration's transaction. A migration must describe the schema it creates
+itself (see ``IndexSpec``) rather than read it from ``models``: the models
+describe the latest schema, which later migrations may not have reached yet.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    JSON, Column, Date, DateTime, Float, Index, Integer, MetaData, String, Table, bindparam,
+    inspect, select,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+
+logger = logging.getLogger("bgai.migrations")
+
+_meta = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version",    Integer, primary_key=True),
+    Column("name",       String,  nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+# ---------------------------------------------------------------------------
+# Migration steps
+# ---------------------------------------------------------------------------
+
+class IndexSpec(NamedTuple):
+    """An index exactly as a migration created it (*dialect*: only on that backend)."""
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    options: Dict[str, Any] = {}
+    dialect: Optional[str] = None
+
+
+def _create_named_indexes(conn: Connection, *specs: IndexSpec) -> None:
+    """Create each index of *specs* that does not exist yet, on the live table's columns."""
+    tables: Dict[str, Table] = {}
+    for spec in specs:
+        if spec.dialect is not None and conn.dialect.name != spec.dialect:
+            continue
+        if spec.table not in tables:
+            tables[spec.table] = Table(spec.table, MetaData(), autoload_with=conn)
+        table = tables[spec.table]
+        Index(spec.name, *(table.c[col] for col in spec.columns), **spec.options).create(
+            conn, checkfirst=True
+        )
+
+
+def _add_missing_columns(conn: Connection, table: Table, *names: str) -> None:
+    """``ALTER TABLE … ADD COLUMN`` for each of *names* the live table lacks, typed as in *table*."""
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        col_type = column.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {name} {col_type}")
+
+
+_0001_INDEXES = (
+    IndexSpec("ix_business_data_user_created", "business_data", ("user_id", "created_at")),
+    IndexSpec("ix_business_data_user_type_created", "business_data", ("user_id", "data_type", "created_at")),
+    IndexSpec("ix_predictions_user_created", "predictions", ("user_id", "created_at")),
+    IndexSpec("ix_predictions_user_status_created", "predictions", ("user_id", "status", "created_at")),
+    IndexSpec("ix_integrations_user_created", "integrations", ("user_id", "created_at")),
+)
+
+_0002_INDEXES = (
+    IndexSpec("ix_business_data_data_gin", "business_data", ("data",),
+              {"postgresql_using": "gin"}, dialect="postgresql"),
+)
+
+_0003_INDEXES = (
+    IndexSpec("ix_business_data_user_region", "business_data", ("user_id", "region")),
+    IndexSpec("ix_business_data_user_event_date", "business_data", ("user_id", "event_date")),
+)
+
+# business_data as migration 3 reads and writes it (the columns it touches)
+_0003_BUSINESS_DATA = Table(
+    "business_data",
+    MetaData(),
+    Column("id",         Integer, primary_key=True),
+    Column("data",       JSON().with_variant(JSONB(), "postgresql")),
+    Column("region",     String),
+    Column("value",      Float),
+    Column("event_date", Date),
+)
+
+
+def _0003_hot_fields(data: Any) -> Dict[str, Any]:
+    """
+    The backfilled column values for one payload: migration 3's own copy
+    of ``crud.extract_hot_fields`` as it was when the migration shipped.
+    """
+    fields: Dict[str, Any] = {"region": None, "value": None, "event_date": None}
+    if not isinstance(data, dict):
+        return fields
+
+    region = data.get("region")
+    if region is not None and region != "":
+        fields["region"] = str(region)
+
+    value = data.get("value")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        fields["value"] = float(value)
+    elif isinstance(value, str):
+        try:
+            fields["value"] = float(value)
+        except ValueError:
+            pass
+
+    raw_date = data.get("date")
+    if isinstance(raw_date, str) and len(raw_date) >= 10:
+        try:
+            fields["event_date"] = date.fromisoformat(raw_date[:10])
+        except ValueError:
+            pass
+    return fields
+
+
+def _0001_composite_indexes(conn: Connection) -> None:
+    """(user_id, created_at)-style indexes for the per-user listing queries."""
+    _create_named_indexes(conn, *_0001_INDEXES)
+
+
+def _0002_json_payload_index(conn: Connection) -> None:
+    """GIN index on business_data.data; skipped on backends without JSONB."""
+    _create_named_indexes(conn, *_0002_INDEXES)
+
+
+def _0003_business_data_hot_columns(conn: Connection, batch_size: int = 2000) -> None:
+    """
+    Promote data.region / data.value / data.date into typed, indexed columns
+    and backfill them for existing rows in id-ordered batches.
+    """
+    table = _0003_BUSINESS_DATA
+    _add_missing_columns(conn, table, "region", "value", "event_date")
+    # Only now do the indexed columns exist
+    _create_named_indexes(conn, *_0003_INDEXES)
+
+    update = (
+        table.update()
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            region=bindparam("region"),
+            value=bindparam("value"),
+            event_date=bindparam("event_date"),
+        )
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.data)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            update,
+            [{"row_id": row_id, **_0003_hot_fields(data)} for row_id, data in rows],
+        )
+        last_id = rows[-1][0]
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "composite_indexes", _0001_composite_indexes),
+    (2, "json_payload_index", _0002_json_payload_index),
+    (3, "business_data_hot_columns", _0003_business_data_hot_columns),
+]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def current_version(engine: Engine) -> int:
+    """Return the highest applied migration version (0 for a new database)."""
+    _meta.create_all(bind=engine)
+    with engine.connect() as conn:
+        versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def upgrade(engine: Engine) -> int:
+    """
+    Apply all pending migrations in version order, each in its own
+    transaction. Returns the number of migrations applied.
+    """
+    _meta.create_all(bind=engine)
+    applied = 0
+    for version, name, step in MIGRATIONS:
+        with engine.begin() as conn:
+            already = conn.execute(
+                select(schema_migrations.c.version).where(schema_migrations.c.version == version)
+            ).first()
+            if already:
+                continue
+            logger.info("Applying schema migration %04d_%s", version, name)
+            step(conn)
+            conn.execute(
+                schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                )
+            )
+            applied += 1
+    return applied
+
+
+def init_db(engine: Engine) -> None:
+    """Create any missing tables, then bring the schema up to the latest version."""
+    models.Base.metadata.create_all(bind=engine)
+    upgrade(engine)
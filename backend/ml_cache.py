@@ -0,0 +1,309 @@
+"""
+ml_cache.py — Content-Addressed Result Cache for the BGAI ML Engine
+====================================================================
+``ml_engine.train_and_predict`` is deterministic for a given model type,
+dataset and engine version, so its results are cached under a SHA-256 of
+the canonical JSON of ``(ENGINE_VERSION, model_type, input_data)``.
+
+Two tiers:
+
+* **memory** — a per-process LRU of ``BGAI_ML_CACHE_SIZE`` entries (default 256)
+* **disk**   — optional, enabled by ``BGAI_ML_CACHE_DIR``; one JSON file per
+  result, least-recently-used files evicted once the directory exceeds
+  ``BGAI_ML_CACHE_DISK_MB`` (default 256)
+
+Failed runs (results carrying an ``"error"`` key) and runs degraded by
+their time budget (``"degraded"``) are never cached. Bump
+``ml_engine.ENGINE_VERSION`` whenever a change alters results so stale
+entries stop matching.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from . import ml_engine
+
+load_dotenv()
+
+logger = logging.getLogger("bgai.ml_cache")
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_MB = 256
+
+
+# ---------------------------------------------------------------------------
+# Cache key
+# ---------------------------------------------------------------------------
+
+def cache_key(model_type: str, input_data: Dict[str, Any], **options: Any) -> str:
+    """
+    Return the hex SHA-256 of the canonical JSON of the engine version,
+    *model_type*, *input_data* and any extra *options* that affect the result.
+    Key order and whitespace in *input_data* do not change the key.
+    """
+    payload = [ml_engine.ENGINE_VERSION, model_type, input_data, options]
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Two-tier cache
+# ---------------------------------------------------------------------------
+
+class ResultCache:
+    """
+    Thread-safe LRU of serialised results with an optional size-bounded
+    disk tier. Values are stored as JSON text, so every hit returns a fresh
+    copy the caller may mutate freely.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MEMORY_ENTRIES,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = DEFAULT_DISK_MB * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max(0, max_entries)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self._counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "stores": 0, "memory_evictions": 0, "disk_evictions": 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build a cache from the ``BGAI_ML_CACHE_*`` environment variables."""
+        return cls(
+            max_entries=int(os.getenv("BGAI_ML_CACHE_SIZE", DEFAULT_MEMORY_ENTRIES)),
+            disk_dir=os.getenv("BGAI_ML_CACHE_DIR", "").strip() or None,
+            disk_max_bytes=int(os.getenv("BGAI_ML_CACHE_DISK_MB", DEFAULT_DISK_MB)) * 1024 * 1024,
+        )
+
+    # ---- disk tier --------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_entries(self):
+        """Yield ``(path, size, mtime)`` for every cached file."""
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    st = entry.stat()
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                text = fh.read()
+            os.utime(path)   # mtime doubles as the LRU clock
+            return text
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, text: str) -> None:
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(tmp, path)   # atomic: readers never see a partial file
+        except OSError as exc:
+            logger.warning("Could not write ML cache entry %s: %s", path, exc)
+            return
+        self._disk_bytes += len(text.encode("utf-8")) - old_size
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete least-recently-used files until the tier is under 90 % of its budget."""
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_max_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self._counters["disk_evictions"] += 1
+        self._disk_bytes = total
+
+    # ---- public interface -------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for *key*, or None (counted as a miss)."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return json.loads(text)
+            if self.disk_dir:
+                text = self._disk_get(key)
+                if text is not None:
+                    self._counters["disk_hits"] += 1
+                    self._remember(key, text)
+                    return json.loads(text)
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store *result* under *key* in both tiers."""
+        text = json.dumps(result, separators=(",", ":"))
+        with self._lock:
+            self._counters["stores"] += 1
+            self._remember(key, text)
+            if self.disk_dir:
+                self._disk_put(key, text)
+
+    def _remember(self, key: str, text: str) -> None:
+        if not self.max_entries:
+            return
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir:
+                for path, _, _ in list(self._disk_entries()):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit / miss / eviction counters and current tier sizes."""
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits":           hits,
+                "hit_ratio":      round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_limit":   self.max_entries,
+                "disk_enabled":   bool(self.disk_dir),
+                "disk_bytes":     self._disk_bytes,
+                "disk_limit":     self.disk_max_bytes if self.disk_dir else 0,
+                "engine_version": ml_engine.ENGINE_VERSION,
+            }
+
+
+result_cache = ResultCache.from_env()
+
+
+# ---------------------------------------------------------------------------
+# Cached engine entry point
+# ---------------------------------------------------------------------------
+
+def _cacheable(result: Dict[str, Any]) -> bool:
+    return "error" not in result and not result.get("degraded")
+
+
+def train_and_predict(
+    model_type: str, input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Drop-in replacement for ``ml_engine.train_and_predict`` that serves
+    repeated ``(model_type, input_data)`` pairs from :data:`result_cache`.
+    """
+    result, _ = train_model(model_type, input_data, deadline_s)
+    return result
+
+
+def train_model(
+    model_type: str, input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Cached ``ml_engine.train_model``. On a cache hit nothing is fitted, so
+    the returned bundle is None; callers that need the model refit lazily.
+    """
+    key = cache_key(model_type, input_data)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached, None
+    result, bundle = ml_engine.train_model(model_type, input_data, deadline_s)
+    if _cacheable(result):
+        result_cache.put(key, result)
+    return result, bundle
+
+
+def lookup_many(
+    model_types: List[str], input_data: Dict[str, Any]
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Split a batch into ``({model_type: cached_result}, [model types to fit])``;
+    duplicates are dropped and request order is kept.
+    """
+    cached: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for model_type in dict.fromkeys(model_types):
+        result = result_cache.get(cache_key(model_type, input_data))
+        if result is None:
+            missing.append(model_type)
+        else:
+            cached[model_type] = result
+    return cached, missing
+
+
+def store(model_type: str, input_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """Cache a freshly computed *result*; failed and degraded runs are ignored."""
+    store_key(cache_key(model_type, input_data), result)
+
+
+def store_key(key: str, result: Dict[str, Any]) -> None:
+    """:func:`store` for a precomputed :func:`cache_key`."""
+    if _cacheable(result):
+        result_cache.put(key, result)
+
+
+def train_models(
+    model_types: List[str], input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Cached ``ml_engine.train_models``: only the model types missing from the
+    cache are fitted (together, sharing one split); hits carry a None bundle.
+    """
+    cached, missing = lookup_many(model_types, input_data)
+    fitted = ml_engine.train_models(missing, input_data, deadline_s=deadline_s) if missing else {}
+    for model_type, (result, _) in fitted.items():
+        store(model_type, input_data, result)
+    return {
+        mt: fitted[mt] if mt in fitted else (cached[mt], None)
+        for mt in dict.fromkeys(model_types)
+    }
+
+
+def stats() -> Dict[str, Any]:
+    """Counters of the process-wide result cache."""
+    return result_cache.stats()
@@ -3,21 +3,85 @@ ml_engine.py — BGAI Machine Learning Engine
 ============================================
 Handles training, evaluation, and forecasting for all supported model types.
 Implements proper train/test split, cross-validation, and real performance metrics.
+Linear and Polynomial Regression on clean numeric records are solved in
+closed form with NumPy (see :func:`fit_closed_form`); everything else goes
+through the sklearn pipelines.
+:func:`forecast_series` fits one model type to many series of a long-format
+table in a single call.
+A model type suffixed with lag options, e.g. ``"Random Forest (lags=14,
+season=12)"``, regresses each value on its own recent history instead of
+the row index and forecasts recursively (see :func:`lag_options`).
 
 Author: Ujjwal Tiwari
 Version: 3.0.0
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from statistics import NormalDist
+
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+from . import compute
+
+# pandas and sklearn take seconds to import, so they are imported where first
+# used; importing this module (and the API / pages that do) stays cheap.
+# Workers that will train can pay the cost up front with warm_up().
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+
+# Part of every ml_cache key — bump whenever a change alters engine output
+ENGINE_VERSION = "3.3.1"
+
+DEFAULT_FORECAST_STEPS = 5
+DEFAULT_COVERAGE = 0.95
+# Simulated forecasts per bootstrap interval (see forecast(interval="bootstrap"))
+BOOTSTRAP_SAMPLES = 2000
+
+# Smallest dataset on the closed-form path; below it the test split has fewer
+# than two rows and the sklearn path's degenerate-metric handling applies
+CLOSED_FORM_MIN_ROWS = 10
+
+# Size-adaptive configuration (see engine_config)
+LARGE_DATASET_ROWS = int(os.getenv("BGAI_LARGE_DATASET_ROWS", 10_000))
+FIT_TARGET_SECONDS = float(os.getenv("BGAI_FIT_TARGET_SECONDS", 10))
+CV_MAX_ROWS = 20_000
+CV_FOLDS = 5
+RF_MAX_SAMPLES = 20_000
+# Rough single-thread cost of one tree / boosting iteration per training row
+_TREE_ROW_SECONDS = 9e-7
+_TREE_PREDICT_ROW_SECONDS = 5e-8
+_HIST_ITER_ROW_SECONDS = 5e-8
+_THREADED_ESTIMATORS = ("RandomForestRegressor", "HistGradientBoostingRegressor")
+
+# Default time budget per train_model call (BGAI_TRAIN_DEADLINE_S=0 disables)
+DEADLINE_SECONDS = float(os.getenv("BGAI_TRAIN_DEADLINE_S", 60)) or None
+# Random Forest grows in chunks of this many trees so it can stop at the deadline
+RF_CHUNK_TREES = 25
 
-from sklearn.linear_model import LinearRegression, Ridge
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import PolynomialFeatures, StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+# Incremental updates (see update_model): recent points kept per ensemble
+# bundle, and boosting stages added per update
+INCREMENTAL_WINDOW = 2000
+GB_UPDATE_STAGES = 10
+
+# Lag-feature mode (see lag_options): defaults and the longest lag / window / season
+LAG_DEFAULTS = {"lags": 7, "window": 7, "season": 0}
+MAX_LAG = 366
+_LAG_SUFFIX = re.compile(r"\(\s*(lags\b[^)]*)\)\s*$")
+
+# Concurrent fits in train_models / train_and_predict_many
+BATCH_WORKERS = int(os.getenv("BGAI_BATCH_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+
+# Opt-in warm_up() of API and job worker processes at start
+WARM_UP = os.getenv("BGAI_WARM_UP", "").strip().lower() in ("1", "true", "yes", "on")
 
 
 # ---------------------------------------------------------------------------
@@ -39,8 +103,10 @@ def _prepare_dataframe(input_data: Dict[str, Any]) -> Tuple[pd.DataFrame, str]:
     df : pd.DataFrame
     target_col : str
     """
+    import pandas as pd
+
     if not input_data or "values" not in input_data:
-        raise ValueError("Invalid input format. Expected {'values': [...]}")
+        raise ValueError("Invalid input format. Expected {'values': [...]} or {'columns': {...}}")
 
     df = pd.DataFrame(input_data["values"])
     if df.empty:
@@ -56,6 +122,58 @@ def _prepare_dataframe(input_data: Dict[str, Any]) -> Tuple[pd.DataFrame, str]:
     return df, target_col
 
 
+def _parse_input(input_data: Dict[str, Any]) -> Tuple[str, np.ndarray]:
+    """
+    Return ``(target_column, y)`` for either payload shape: columnar
+    ``{"columns": {name: [...]}}`` (see :func:`_columnar_series`) or row
+    records ``{"values": [{...}, ...]}`` (see :func:`_prepare_dataframe`).
+    """
+    if isinstance(input_data, dict) and "columns" in input_data:
+        return _columnar_series(input_data["columns"])
+    df, target_col = _prepare_dataframe(input_data)
+    return target_col, df[target_col].to_numpy()
+
+
+def _columnar_series(columns: Dict[str, Any]) -> Tuple[str, np.ndarray]:
+    """
+    Pick the target of a columnar payload straight into a contiguous NumPy
+    array — no DataFrame and no per-row dicts. The target is the first
+    column pandas would infer as numeric, as in :func:`_prepare_dataframe`.
+    """
+    if not isinstance(columns, dict) or not all(isinstance(c, (list, tuple)) for c in columns.values()):
+        raise ValueError("Invalid input format. Expected {'columns': {name: [...], ...}}")
+    lengths = {len(col) for col in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same number of values.")
+    if not columns or lengths == {0}:
+        raise ValueError("Dataset is empty — please provide at least 3 records.")
+
+    for name, col in columns.items():
+        if name == "_idx":
+            continue
+        y = _numeric_column(col)
+        if y is not None:
+            return name, y
+    raise ValueError("No numeric target column found in the dataset.")
+
+
+def _numeric_column(col: List[Any]) -> Optional[np.ndarray]:
+    """*col* as an int / float array when pandas would give it a numeric dtype, else None."""
+    try:
+        arr = np.asarray(col)
+    except ValueError:   # ragged nested values
+        return None
+    if arr.ndim == 1 and arr.dtype.kind in "iuf":
+        return np.ascontiguousarray(arr)
+    if arr.dtype != object:
+        return None
+    # Numbers mixed with None: pandas makes a float column with NaN
+    kinds = set(map(type, col))
+    if kinds <= {int, float, type(None)} and kinds & {int, float}:
+        return np.array(col, dtype=float)
+    return None
+
+
 def _confidence_interval(predictions: np.ndarray, residuals: np.ndarray, z: float = 1.96) -> List[Dict]:
     """
     Return forecast steps with ±95 % confidence intervals based on residual std.
@@ -76,118 +194,1389 @@ def _confidence_interval(predictions: np.ndarray, residuals: np.ndarray, z: floa
 # Public API
 # ---------------------------------------------------------------------------
 
-def train_and_predict(model_type: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+def train_and_predict(
+    model_type: str, input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Train the selected model on the provided data and return a 5-step forecast
-    along with evaluation metrics.
+    along with evaluation metrics. See :func:`train_model` for the fitted model.
 
     Parameters
     ----------
     model_type : str
         One of ``"Linear Regression"``, ``"Polynomial Regression"``,
-        ``"Random Forest"``, ``"Gradient Boosting"``.
+        ``"Random Forest"``, ``"Gradient Boosting"``, optionally followed
+        by lag options, e.g. ``"Random Forest (lags=14, season=12)"``
+        (see :func:`lag_options`).
     input_data : dict
-        ``{"values": [{"x": 1, "y": 10}, ...]}``.
+        ``{"values": [{"x": 1, "y": 10}, ...]}`` or, cheaper for large
+        uploads, the columnar ``{"columns": {"x": [1, ...], "y": [10, ...]}}``.
+    deadline_s : float, optional
+        Time budget in seconds (default ``DEADLINE_SECONDS``). Past it the
+        ensemble fit is cut short, CV skipped, or Linear Regression fitted
+        instead; such results carry ``degraded=True`` and a
+        ``degraded_reason``.
 
     Returns
     -------
     dict
         Keys: ``model_type``, ``target_column``, ``metrics``, ``forecast``,
         ``confidence``, ``feature_importances`` (RF / GB only),
-        ``training_samples``, ``test_samples``.
+        ``training_samples``, ``test_samples``, ``engine_config``.
+    """
+    result, _ = train_model(model_type, input_data, deadline_s)
+    return result
+
+
+def train_model(
+    model_type: str, input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Like :func:`train_and_predict` but also return the fitted *bundle* —
+    everything :func:`forecast` needs to extend the forecast without
+    refitting. The bundle is None when training failed.
+    """
+    deadline = _Deadline(deadline_s)
+    try:
+        fast = fit_closed_form(model_type, input_data)
+        if fast is not None:
+            return fast
+        return _fit_and_evaluate(model_type, _split_dataset(input_data), deadline)
+    except Exception as exc:
+        return _error_result(exc), None
+
+
+def train_models(
+    model_types: List[str],
+    input_data: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+) -> Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
     """
+    Fit several model types on the same data. The dataset is parsed and
+    split once; the fits run concurrently on a pool of at most
+    *max_workers* threads (default ``BATCH_WORKERS``) under one shared
+    deadline (see :func:`train_and_predict`).
+
+    Returns ``{model_type: (result, bundle)}`` in request order (duplicates
+    dropped), with the same per-model shape as :func:`train_model`.
+    """
+    model_types = list(dict.fromkeys(model_types))
+    deadline = _Deadline(deadline_s)
+    fitted = {}
+    for mt in model_types:
+        fast = fit_closed_form(mt, input_data)
+        if fast is not None:
+            fitted[mt] = fast
+    remaining = [mt for mt in model_types if mt not in fitted]
+    if not remaining:
+        return fitted
+    try:
+        data = _split_dataset(input_data)
+    except Exception as exc:
+        return {mt: fitted.get(mt) or (_error_result(exc), None) for mt in model_types}
+
+    def _fit(model_type: str):
+        try:
+            return _fit_and_evaluate(model_type, data, deadline)
+        except Exception as exc:
+            return _error_result(exc), None
+
+    workers = max(1, min(len(remaining), max_workers or BATCH_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {mt: pool.submit(_fit, mt) for mt in remaining}
+        fitted.update((mt, future.result()) for mt, future in futures.items())
+    return {mt: fitted[mt] for mt in model_types}
+
+
+def rank_results(results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order per-model results best first: complete runs before ones degraded
+    by the time budget, then test R², cross-validated R² and RMSE. Failed
+    models follow with ``rank`` None and their error.
+    """
+    ok = {mt: r for mt, r in results.items() if "error" not in r}
+
+    def _key(item):
+        m = item[1]["metrics"]
+        cv = m.get("cv_r2_mean")
+        degraded = bool(item[1].get("degraded"))
+        return (degraded, -m["r2_score"], -(cv if cv is not None else m["r2_score"]), m["rmse"])
+
+    ranking = []
+    for rank, (mt, r) in enumerate(sorted(ok.items(), key=_key), start=1):
+        m = r["metrics"]
+        ranking.append({
+            "rank":       rank,
+            "model_type": mt,
+            "r2_score":   m["r2_score"],
+            "cv_r2_mean": m.get("cv_r2_mean"),
+            "rmse":       m["rmse"],
+            "mae":        m["mae"],
+            "confidence": r["confidence"],
+            "degraded":   bool(r.get("degraded")),
+        })
+    for mt, r in results.items():
+        if mt not in ok:
+            ranking.append({"rank": None, "model_type": mt, "error": r["error"]})
+    return ranking
+
+
+def train_and_predict_many(
+    model_types: List[str], input_data: Dict[str, Any], deadline_s: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Batch form of :func:`train_and_predict` (see :func:`train_models`).
+
+    Returns
+    -------
+    dict
+        ``results`` — ``{model_type: result}``; ``ranking`` — see
+        :func:`rank_results`; ``best_model`` — top-ranked type or None.
+    """
+    fitted = train_models(model_types, input_data, deadline_s=deadline_s)
+    results = {mt: result for mt, (result, _) in fitted.items()}
+    ranking = rank_results(results)
+    best = ranking[0]["model_type"] if ranking and ranking[0]["rank"] == 1 else None
+    return {"results": results, "ranking": ranking, "best_model": best}
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+
+def update_model(
+    bundle: Dict[str, Any], result: Dict[str, Any], values: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Absorb records appended after the data a *bundle* was fitted on,
+    without refitting on the full history. Returns the updated ``result``
+    (new forecast and an ``incremental`` summary) and updates *bundle* in
+    place; callers persist it.
+
+    * Linear / Polynomial (closed form) — the sufficient statistics absorb
+      the new points; identical to a refit that includes them.
+    * Random Forest — the oldest tenth of the trees is replaced by trees
+      grown on the last ``INCREMENTAL_WINDOW`` points.
+    * Gradient Boosting — ``GB_UPDATE_STAGES`` warm-started stages fitted on
+      that window; histogram boosting (which re-bins on every fit) and a
+      forest of stages past twice the configured size are refitted on it.
+      Each model of a fold ensemble is updated this way.
+    * Lag-feature models — as above, on lag features of the window; the
+      forecast errors are one step ahead.
+
+    The cost depends on ``len(values)`` and the window, not on the history.
+    Forecast errors of the pre-update model on the new points are reported
+    as ``forecast_mae`` / ``forecast_rmse``.
+    """
+    target = bundle["target_column"]
     try:
-        df, target_col = _prepare_dataframe(input_data)
+        y_new = np.array([row[target] for row in values], dtype=float)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Every new record needs a numeric '{target}' value.")
+    if not len(y_new):
+        raise ValueError("No new records to add.")
+    if not np.isfinite(y_new).all():
+        raise ValueError(f"'{target}' contains missing or non-finite values.")
 
-        X = df[["_idx"]].values
-        y = df[target_col].values
+    first = bundle["last_idx"] + 1
+    last = first + len(y_new) - 1
+    x_new = np.arange(first, last + 1, dtype=float)
+    pipeline = bundle["pipeline"]
+    lags = bundle.get("lags")
+    history = np.concatenate((bundle.get("window", np.empty(0)), y_new))
+    if lags:
+        X_new = _lag_features(history, lags, last - len(history) + 1)[-len(y_new):]
+        errors = y_new - pipeline.predict(X_new)
+    else:
+        errors = y_new - pipeline.predict(x_new.reshape(-1, 1))
 
-        # Require at least 4 rows for a meaningful split
-        if len(df) < 4:
-            X_train, X_test, y_train, y_test = X, X, y, y
+    window = history[-INCREMENTAL_WINDOW:]
+    stats = bundle.setdefault(
+        "incremental", {"updates": 0, "appended": 0, "abs_error": 0.0, "sq_error": 0.0}
+    )
+    if isinstance(pipeline, ClosedFormModel):
+        pipeline.partial_fit(x_new, y_new)
+        method = "sufficient_statistics"
+    else:
+        if lags:
+            x_window = _lag_features(window, lags, last - len(window) + 1)
+            y_window = window[_lag_span(lags):]
         else:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
+            x_window = np.arange(last - len(window) + 1, last + 1, dtype=float).reshape(-1, 1)
+            y_window = window
+        with compute.allocate(1):
+            method = _update_pipeline(
+                pipeline, x_window, y_window, result.get("engine_config", {}), stats["updates"]
             )
 
-        # ---- Model selection --------------------------------------------------
-        scaler = StandardScaler()
-        feature_importances: Dict[str, float] = {}
-
-        if "Polynomial" in model_type:
-            pipeline = Pipeline([
-                ("poly", PolynomialFeatures(degree=2, include_bias=False)),
-                ("scaler", scaler),
-                ("model", Ridge(alpha=1.0)),
-            ])
-        elif "Random Forest" in model_type:
-            pipeline = Pipeline([
-                ("scaler", scaler),
-                ("model", RandomForestRegressor(
-                    n_estimators=200, max_depth=6, random_state=42, n_jobs=-1
-                )),
-            ])
-        elif "Gradient Boosting" in model_type:
-            pipeline = Pipeline([
-                ("scaler", scaler),
-                ("model", GradientBoostingRegressor(
-                    n_estimators=150, learning_rate=0.1, max_depth=4, random_state=42
-                )),
-            ])
+    bundle["last_idx"] = last
+    bundle["window"] = window
+    stats["updates"] += 1
+    stats["appended"] += len(y_new)
+    stats["abs_error"] += float(np.abs(errors).sum())
+    stats["sq_error"] += float(errors @ errors)
+
+    updated = dict(result)
+    updated["training_samples"] = int(result.get("training_samples", 0)) + len(y_new)
+    updated["forecast"] = forecast(bundle, DEFAULT_FORECAST_STEPS)
+    updated["incremental"] = {
+        "updates":         stats["updates"],
+        "appended_points": stats["appended"],
+        "method":          method,
+        "forecast_mae":    round(stats["abs_error"] / stats["appended"], 4),
+        "forecast_rmse":   round(float(np.sqrt(stats["sq_error"] / stats["appended"])), 4),
+    }
+    return updated, bundle
+
+
+def _update_pipeline(
+    pipeline: Pipeline, x_window: np.ndarray, y_window: np.ndarray, config: Dict[str, Any],
+    n_updates: int, seed: int = 42,
+) -> str:
+    """
+    Partially refit an sklearn *pipeline* on the recent window; returns the
+    method used. New trees / stages are grown with ``seed + n_updates + 1``.
+    """
+    from sklearn.base import clone
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+    if isinstance(pipeline, FoldEnsemble):
+        # Like the original folds, each member leaves out its own slice of
+        # the window and grows its own seed, so the members stay diverse
+        folds = np.array_split(np.arange(len(y_window)), len(pipeline.members))
+        methods = []
+        for i, (member, held_out) in enumerate(zip(pipeline.members, folds)):
+            keep = np.ones(len(y_window), dtype=bool)
+            if len(y_window) - len(held_out) >= 2:
+                keep[held_out] = False
+            methods.append(_update_pipeline(
+                member, x_window[keep], y_window[keep], config, n_updates, seed=seed + 1000 * (i + 1),
+            ))
+        return methods[0]
+
+    model = pipeline.named_steps["model"]
+    if isinstance(model, (RandomForestRegressor, GradientBoostingRegressor)):
+        # Keep the fitted scaler: the existing trees split on its output
+        X_window = pipeline.named_steps["scaler"].transform(x_window)
+    if isinstance(model, RandomForestRegressor):
+        n_replace = max(1, len(model.estimators_) // 10)
+        fresh = clone(model).set_params(
+            n_estimators=n_replace, max_samples=None, warm_start=False, oob_score=False,
+            n_jobs=1, random_state=seed + n_updates + 1,
+        ).fit(X_window, y_window)
+        model.estimators_ = model.estimators_[n_replace:] + fresh.estimators_
+        return "tree_replacement"
+    if isinstance(model, GradientBoostingRegressor):
+        configured = config.get("params", {}).get("n_estimators", model.n_estimators)
+        if model.n_estimators_ + GB_UPDATE_STAGES <= 2 * configured:
+            model.set_params(
+                warm_start=True, n_estimators=model.n_estimators_ + GB_UPDATE_STAGES,
+                random_state=seed + n_updates + 1,
+            )
+            try:
+                model.fit(X_window, y_window)
+            finally:
+                model.set_params(warm_start=False)
+            return "warm_start"
+        model.set_params(n_estimators=configured)
+    pipeline.fit(x_window, y_window)
+    return "window_refit"
+
+
+# ---------------------------------------------------------------------------
+# Multi-series forecasting
+# ---------------------------------------------------------------------------
+
+def forecast_series(
+    frame: pd.DataFrame,
+    model_type: str = "Linear Regression",
+    series_cols: Sequence[str] = ("data_type", "region"),
+    value_col: str = "value",
+    order_col: Optional[str] = None,
+    steps: int = DEFAULT_FORECAST_STEPS,
+    deadline_s: Optional[float] = None,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fit *model_type* to every series of a long-format table in one call.
+
+    Each distinct combination of *series_cols* (missing keys become
+    ``"Unknown"``) is one series of *value_col*, ordered by *order_col*
+    (default: row order); rows without a finite value are dropped. Every
+    series is split, scored and forecast exactly as :func:`train_and_predict`
+    would do with its values, but Linear / Polynomial Regression are solved
+    for all series at once from per-series moments, and ensembles are fitted
+    concurrently on at most *max_workers* threads under one shared deadline.
+    Lag-feature model types (see :func:`lag_options`) are fitted per series
+    like the ensembles.
+
+    Returns
+    -------
+    list of dict
+        One entry per series, ordered by key: ``series`` (``{col: key}``),
+        ``points`` and either ``metrics``, ``confidence``, ``forecast``,
+        ``training_samples``, ``test_samples`` (plus ``degraded`` /
+        ``degraded_reason`` when the time budget cut a fit short) or
+        ``error`` for series shorter than ``CLOSED_FORM_MIN_ROWS``.
+    """
+    import pandas as pd
+
+    series_cols = list(series_cols)
+    if frame.empty:
+        return []
+    keys = frame[series_cols].astype(object).where(frame[series_cols].notna(), "Unknown").astype(str)
+    values = pd.to_numeric(frame[value_col], errors="coerce").to_numpy(dtype=float)
+    table = keys.assign(_value=values)
+    if order_col is not None:
+        table["_order"] = frame[order_col].to_numpy()
+    table = table[np.isfinite(values)]
+    table = table.sort_values(
+        series_cols + (["_order"] if order_col is not None else []), kind="mergesort"
+    )
+
+    codes, uniques = pd.MultiIndex.from_frame(table[series_cols]).factorize()
+    sizes = np.bincount(codes, minlength=len(uniques))
+    labels = [dict(zip(series_cols, key)) for key in uniques]
+    y = table["_value"].to_numpy(dtype=float)
+
+    usable = sizes >= CLOSED_FORM_MIN_ROWS
+    outputs: List[Dict[str, Any]] = [
+        {"series": label, "points": int(n)} for label, n in zip(labels, sizes)
+    ]
+    for i in np.flatnonzero(~usable):
+        outputs[i]["error"] = f"Series needs at least {CLOSED_FORM_MIN_ROWS} points."
+    if usable.any():
+        keep = usable[codes]
+        kept = np.flatnonzero(usable)
+        spec = _closed_form_spec(model_type)
+        if spec is not None:
+            fitted = _closed_form_many(spec, y[keep], sizes[kept], steps)
         else:
-            # Default: Linear Regression
-            pipeline = Pipeline([
-                ("scaler", scaler),
-                ("model", LinearRegression()),
-            ])
-
-        # ---- Training & Evaluation -------------------------------------------
-        pipeline.fit(X_train, y_train)
-        y_pred_test = pipeline.predict(X_test)
-        y_pred_train = pipeline.predict(X_train)
-        residuals = y_test - y_pred_test
-
-        r2  = r2_score(y_test, y_pred_test)
-        mae = mean_absolute_error(y_test, y_pred_test)
-        rmse = float(np.sqrt(mean_squared_error(y_test, y_pred_test)))
-
-        # Cross-validation on full dataset (5-fold) for ensemble models
-        cv_score = None
-        if ("Random Forest" in model_type or "Gradient Boosting" in model_type) and len(df) >= 5:
-            cv_scores = cross_val_score(pipeline, X, y, cv=min(5, len(df)), scoring="r2")
-            cv_score = round(float(cv_scores.mean()), 4)
+            starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            fitted = _ensembles_many(
+                model_type, value_col, [y[s:s + n] for s, n in zip(starts[kept], sizes[kept])],
+                steps, deadline_s, max_workers,
+            )
+        for i, result in zip(kept, fitted):
+            outputs[i].update(result)
+    return outputs
 
-        # Feature importances (tree models)
-        inner = pipeline.named_steps.get("model")
-        if hasattr(inner, "feature_importances_"):
-            feature_importances = {"_idx": round(float(inner.feature_importances_[0]), 4)}
-
-        # ---- Forecast --------------------------------------------------------
-        last_idx = int(df["_idx"].max())
-        future_X = np.array([[last_idx + i] for i in range(1, 6)])
-        future_preds = pipeline.predict(future_X)
-        forecast = _confidence_interval(future_preds, residuals)
-
-        # Simple confidence proxy (capped between 0.5 and 0.99)
-        confidence = min(0.99, max(0.5, round(float(r2) if r2 > 0 else 0.5, 4)))
-
-        return {
-            "model_type": model_type,
-            "target_column": target_col,
-            "training_samples": int(len(X_train)),
-            "test_samples": int(len(X_test)),
+
+def has_closed_form(model_type: str) -> bool:
+    """True for the model types solved in closed form (Linear / Polynomial Regression)."""
+    return _closed_form_spec(model_type) is not None
+
+
+def _closed_form_many(
+    spec: Tuple[int, float], y: np.ndarray, sizes: np.ndarray, steps: int
+) -> List[Dict[str, Any]]:
+    """
+    :func:`fit_closed_form` for many series laid end to end in *y* (one
+    block of *sizes[i]* values each): the moments of every series are
+    accumulated with ``np.bincount`` and the small normal-equation systems
+    solved as one batch.
+    """
+    degree, alpha = spec
+    d = degree
+    S = len(sizes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    codes = np.repeat(np.arange(S), sizes)
+    x = (np.arange(len(y)) - starts[codes]).astype(float)
+
+    # The same test rows train_test_split picks for a series of that length
+    test = np.zeros(len(y), dtype=bool)
+    for n in np.unique(sizes):
+        _, test_idx = _split_indices(int(n))
+        test[(starts[sizes == n][:, None] + test_idx).ravel()] = True
+
+    # ---- Fit: per-series means and centred co-moments of [x, …, x**d, y] ----
+    A = np.column_stack((np.power.outer(x, np.arange(1, d + 1, dtype=float)), y))
+    tr_codes, A_tr = codes[~test], A[~test]
+    n_train = np.bincount(tr_codes, minlength=S).astype(float)
+    means = np.column_stack(
+        [np.bincount(tr_codes, A_tr[:, j], minlength=S) for j in range(d + 1)]
+    ) / n_train[:, None]
+    A_tr = A_tr - means[tr_codes]
+    C = np.empty((S, d + 1, d + 1))
+    for i in range(d + 1):
+        for j in range(i, d + 1):
+            C[:, i, j] = C[:, j, i] = np.bincount(tr_codes, A_tr[:, i] * A_tr[:, j], minlength=S)
+
+    # Solve as ClosedFormModel._solve does, for every series at once
+    scale = np.sqrt(C[:, np.arange(d), np.arange(d)] / n_train[:, None])
+    scale[scale == 0.0] = 1.0
+    gram = C[:, :d, :d] / (scale[:, :, None] * scale[:, None, :])
+    gram[:, np.arange(d), np.arange(d)] += alpha
+    rhs = (C[:, :d, d] / scale)[..., None]
+    try:
+        coef = np.linalg.solve(gram, rhs)[..., 0]
+    except np.linalg.LinAlgError:
+        coef = (np.linalg.pinv(gram) @ rhs)[..., 0]
+    mean_x, intercept = means[:, :d], means[:, d]
+
+    def _predict(xs: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        feats = (np.power.outer(xs, np.arange(1, d + 1, dtype=float)) - mean_x[rows]) / scale[rows]
+        return intercept[rows] + np.einsum("ij,ij->i", feats, coef[rows])
+
+    # ---- Evaluation on each series' test rows ----------------------------
+    te_codes, y_te = codes[test], y[test]
+    residuals = y_te - _predict(x[test], te_codes)
+    n_test = np.bincount(te_codes, minlength=S).astype(float)
+    ss_res = np.bincount(te_codes, residuals ** 2, minlength=S)
+    y_mean = np.bincount(te_codes, y_te, minlength=S) / n_test
+    ss_tot = np.bincount(te_codes, (y_te - y_mean[te_codes]) ** 2, minlength=S)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot == 0.0, (ss_res == 0.0).astype(float), 1.0 - ss_res / ss_tot)
+    mae = np.bincount(te_codes, np.abs(residuals), minlength=S) / n_test
+    rmse = np.sqrt(ss_res / n_test)
+    # Test rows are grouped by series, so this splits the residuals per series
+    per_series = np.split(residuals, np.cumsum(n_test.astype(int))[:-1])
+
+    # ---- Forecast: the next *steps* positions of every series ------------
+    future = (sizes[:, None] + np.arange(steps)).astype(float)
+    rows = np.repeat(np.arange(S), steps)
+    predictions = _predict(future.ravel(), rows).reshape(S, steps)
+
+    results = []
+    for s in range(S):
+        results.append({
+            "training_samples": int(n_train[s]),
+            "test_samples":     int(n_test[s]),
             "metrics": {
-                "r2_score": round(float(r2), 4),
-                "mae": round(float(mae), 4),
-                "rmse": round(float(rmse), 4),
-                "cv_r2_mean": cv_score,
+                "r2_score":   round(float(r2[s]), 4),
+                "mae":        round(float(mae[s]), 4),
+                "rmse":       round(float(rmse[s]), 4),
+                "cv_r2_mean": None,
             },
-            "forecast": forecast,
-            "confidence": confidence,
-            "feature_importances": feature_importances,
+            "confidence": _confidence(r2[s]),
+            "forecast":   _confidence_interval(predictions[s], per_series[s]),
+        })
+    return results
+
+
+def _ensembles_many(
+    model_type: str,
+    target_col: str,
+    series: List[np.ndarray],
+    steps: int,
+    deadline_s: Optional[float],
+    max_workers: Optional[int],
+) -> List[Dict[str, Any]]:
+    """Fit an ensemble per series concurrently (see :func:`train_models`)."""
+    deadline = _Deadline(deadline_s)
+
+    def _fit(y: np.ndarray) -> Dict[str, Any]:
+        try:
+            result, bundle = _fit_and_evaluate(model_type, _series_dataset(target_col, y), deadline)
+        except Exception as exc:
+            return _error_result(exc)
+        keep = {k: result[k] for k in ("training_samples", "test_samples", "metrics", "confidence")}
+        keep["forecast"] = result["forecast"] if steps == DEFAULT_FORECAST_STEPS else forecast(bundle, steps)
+        for extra in ("degraded", "degraded_reason"):
+            if extra in result:
+                keep[extra] = result[extra]
+        return keep
+
+    workers = max(1, min(len(series), max_workers or BATCH_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_fit, series))
+
+
+# ---------------------------------------------------------------------------
+# Lag-feature (autoregressive) mode
+# ---------------------------------------------------------------------------
+
+def lag_options(model_type: str) -> Optional[Dict[str, int]]:
+    """
+    Parse the lag options of *model_type*, or return None for plain model
+    types. ``"<model> (lags)"`` takes ``LAG_DEFAULTS``; any of them can be
+    set, e.g. ``"Gradient Boosting (lags=14, window=7, season=12)"``:
+
+    * ``lags``   — the previous *n* values, ``lag_1`` … ``lag_n``
+    * ``window`` — mean of the previous *n* values (0: none)
+    * ``season`` — period *n*: the value one season back and the sine /
+      cosine of the position in the season (0: none)
+
+    Raises ValueError for unknown options or values out of range.
+    """
+    match = _LAG_SUFFIX.search(model_type)
+    if match is None:
+        return None
+    options = dict(LAG_DEFAULTS)
+    for item in filter(None, (part.strip() for part in match.group(1).split(","))):
+        key, sep, value = (part.strip() for part in item.partition("="))
+        if key not in options:
+            raise ValueError(f"Unknown lag option '{key}'; expected lags, window or season.")
+        if sep:
+            try:
+                options[key] = int(value)
+            except ValueError:
+                raise ValueError(f"Lag option '{key}' must be an integer.")
+    if not 1 <= options["lags"] <= MAX_LAG:
+        raise ValueError(f"lags must be between 1 and {MAX_LAG}.")
+    for key in ("window", "season"):
+        if options[key] and not 2 <= options[key] <= MAX_LAG:
+            raise ValueError(f"{key} must be 0 or between 2 and {MAX_LAG}.")
+    return options
+
+
+def _lag_span(options: Dict[str, int]) -> int:
+    """Past values needed to build one feature row."""
+    return max(options["lags"], options["window"], options["season"])
+
+
+def _lag_feature_names(options: Dict[str, int]) -> List[str]:
+    names = [f"lag_{k}" for k in range(1, options["lags"] + 1)]
+    if options["window"]:
+        names.append(f"rolling_mean_{options['window']}")
+    if options["season"]:
+        names += [f"season_lag_{options['season']}", "season_sin", "season_cos"]
+    return names
+
+
+def _lag_matrix(windows: np.ndarray, options: Dict[str, int], positions: np.ndarray) -> np.ndarray:
+    """
+    Feature rows from *windows* — ``(n, _lag_span)`` blocks of consecutive
+    values, oldest first — for the values at *positions* right after each
+    block. Lags and the seasonal lag are read from views of the windows;
+    the result is the only array allocated.
+    """
+    span = windows.shape[1]
+    out = np.empty((len(windows), len(_lag_feature_names(options))))
+    n_lags = options["lags"]
+    out[:, :n_lags] = windows[:, ::-1][:, :n_lags]   # lag_1 is the latest value
+    col = n_lags
+    if options["window"]:
+        out[:, col] = windows[:, span - options["window"]:].mean(axis=1)
+        col += 1
+    if options["season"]:
+        season = options["season"]
+        phase = (2 * np.pi / season) * (positions % season)
+        out[:, col] = windows[:, span - season]
+        out[:, col + 1] = np.sin(phase)
+        out[:, col + 2] = np.cos(phase)
+    return out
+
+
+def _lag_features(series: np.ndarray, options: Dict[str, int], start: int = 0) -> np.ndarray:
+    """
+    Design matrix predicting ``series[_lag_span:]`` from the values before
+    each; *start* is the position of ``series[0]``. The windows are a
+    strided view of *series* (``sliding_window_view``), so no lagged copies
+    of the series are made.
+    """
+    span = _lag_span(options)
+    windows = sliding_window_view(series[:-1], span)
+    return _lag_matrix(windows, options, start + span + np.arange(len(windows)))
+
+
+def _lag_dataset(data: Dict[str, Any], options: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Turn a :func:`_split_dataset` split into lag features of its series.
+    The split is chronological: the last 20 % of the rows are the test set,
+    scored one step ahead.
+    """
+    y = np.asarray(data["y"], dtype=float)
+    span = _lag_span(options)
+    if len(y) < span + 4:
+        raise ValueError(f"Lag features need at least {span + 4} points; got {len(y)}.")
+    X = _lag_features(y, options)
+    target = y[span:]
+    cut = len(target) - int(np.ceil(0.2 * len(target)))
+    return {
+        "target_col":    data["target_col"],
+        "n_rows":        len(target),
+        "last_idx":      len(y) - 1,
+        "X": X, "y": target,
+        "X_train": X[:cut], "X_test": X[cut:],
+        "y_train": target[:cut], "y_test": target[cut:],
+        "history":       y,
+        "lags":          options,
+        "feature_names": _lag_feature_names(options),
+    }
+
+
+def _recursive_paths(
+    pipeline, history: np.ndarray, options: Dict[str, int], first: int, steps: int,
+    noise: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Forecast *steps* values after *history* (whose next position is
+    *first*), feeding each prediction back as the latest lag. With *noise*
+    (``(n_paths, steps)``) every path gets its own noise added per step;
+    all paths are predicted together, one ``predict`` call per step.
+    Returns ``(n_paths, steps)``.
+    """
+    span = _lag_span(options)
+    n_paths = 1 if noise is None else len(noise)
+    values = np.empty((n_paths, span + steps))
+    values[:, :span] = history[-span:]
+    for step in range(steps):
+        X = _lag_matrix(values[:, step:step + span], options, np.full(n_paths, first + step))
+        values[:, span + step] = pipeline.predict(X)
+        if noise is not None:
+            values[:, span + step] += noise[:, step]
+    return values[:, span:]
+
+
+# ---------------------------------------------------------------------------
+# Size-adaptive configuration
+# ---------------------------------------------------------------------------
+
+def engine_config(model_type: str, n_rows: int) -> Dict[str, Any]:
+    """
+    Choose the estimator and hyperparameters for *model_type* on *n_rows*
+    rows. Up to ``LARGE_DATASET_ROWS`` the fixed standard settings apply;
+    above it Gradient Boosting switches to ``HistGradientBoostingRegressor``,
+    Random Forest bootstraps at most ``RF_MAX_SAMPLES`` rows per tree, tree
+    counts shrink to fit ``FIT_TARGET_SECONDS`` (single thread) and CV runs
+    on ``CV_MAX_ROWS`` sampled rows.
+
+    Ensembles are validated without refitting where possible
+    (``cv_method``): Random Forest reports its out-of-bag R² (``"oob"``);
+    Gradient Boosting fits one model per CV fold of the training split and
+    serves their average (``"folds"``, see :class:`FoldEnsemble`); only
+    histogram boosting cross-validates a row sample with extra fits
+    (``"sampled"``).
+
+    Returns
+    -------
+    dict
+        ``profile`` (``standard`` / ``large``), ``estimator``, ``params``,
+        ``cv_method`` and ``cv_rows`` (rows validated, None when skipped).
+        Reported in each result as ``engine_config``.
+    """
+    large = n_rows > LARGE_DATASET_ROWS
+    profile = "large" if large else "standard"
+
+    if "Polynomial" in model_type:
+        return {"profile": profile, "estimator": "Ridge",
+                "params": {"degree": 2, "alpha": 1.0}, "cv_method": None, "cv_rows": None}
+    if "Random Forest" not in model_type and "Gradient Boosting" not in model_type:
+        return {"profile": profile, "estimator": "LinearRegression", "params": {},
+                "cv_method": None, "cv_rows": None}
+
+    validate = n_rows >= 5
+    n_train = n_rows - int(np.ceil(0.2 * n_rows)) if n_rows >= 4 else n_rows
+
+    if "Random Forest" in model_type:
+        params: Dict[str, Any] = {"n_estimators": 200, "max_depth": 6, "oob_score": validate}
+        if large:
+            # Growing a tree on its bootstrap sample, then scoring it out-of-bag
+            per_tree = (_TREE_ROW_SECONDS * min(n_train, RF_MAX_SAMPLES)
+                        + _TREE_PREDICT_ROW_SECONDS * n_train)
+            params["n_estimators"] = int(np.clip(FIT_TARGET_SECONDS / per_tree, 25, 200))
+            if n_train > RF_MAX_SAMPLES:
+                params["max_samples"] = RF_MAX_SAMPLES
+        return {"profile": profile, "estimator": "RandomForestRegressor", "params": params,
+                "cv_method": "oob" if validate else None, "cv_rows": n_train if validate else None}
+
+    if not large:
+        return {"profile": profile, "estimator": "GradientBoostingRegressor",
+                "params": {"n_estimators": 150, "learning_rate": 0.1, "max_depth": 4},
+                "cv_method": "folds" if validate else None, "cv_rows": n_train if validate else None}
+    cv_rows = min(n_rows, CV_MAX_ROWS)
+    # Rows each refit sees: the final fit plus CV_FOLDS folds of 4/5 of cv_rows
+    per_iter = _HIST_ITER_ROW_SECONDS * (n_train + CV_FOLDS * 0.8 * cv_rows)
+    return {"profile": profile, "estimator": "HistGradientBoostingRegressor",
+            "params": {
+                "max_iter": int(np.clip(FIT_TARGET_SECONDS / per_iter, 30, 150)),
+                "learning_rate": 0.1, "max_depth": 4, "early_stopping": False,
+            },
+            "cv_method": "sampled", "cv_rows": cv_rows}
+
+
+def cv_score_label(cv_method: Optional[str]) -> str:
+    """Display name of ``cv_r2_mean`` for a result validated by *cv_method* (see :func:`engine_config`)."""
+    return {
+        "oob":     "Out-of-Bag R²",
+        "folds":   f"{CV_FOLDS}-Fold Ensemble Cross-Validation R² Mean",
+        "sampled": f"{CV_FOLDS}-Fold Cross-Validation R² Mean (row sample)",
+    }.get(cv_method, "Cross-Validation R² Mean")
+
+
+# ---------------------------------------------------------------------------
+# Training internals
+# ---------------------------------------------------------------------------
+
+def _error_result(exc: Exception) -> Dict[str, Any]:
+    if isinstance(exc, ValueError):
+        return {"error": str(exc)}
+    return {"error": f"ML Engine Error: {str(exc)}"}
+
+
+def _split_dataset(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse *input_data* and make the train/test split shared by every model."""
+    from sklearn.model_selection import train_test_split
+
+    target_col, y = _parse_input(input_data)
+    X = np.arange(len(y)).reshape(-1, 1)
+
+    # Require at least 4 rows for a meaningful split
+    if len(y) < 4:
+        X_train, X_test, y_train, y_test = X, X, y, y
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+    return {
+        "target_col": target_col,
+        "n_rows":     len(y),
+        "last_idx":   len(y) - 1,
+        "X": X, "y": y,
+        "X_train": X_train, "X_test": X_test,
+        "y_train": y_train, "y_test": y_test,
+    }
+
+
+def _series_dataset(target_col: str, y: np.ndarray) -> Dict[str, Any]:
+    """:func:`_split_dataset` for a single clean series of at least 4 values."""
+    X = np.arange(len(y)).reshape(-1, 1)
+    train, test = _split_indices(len(y))
+    return {
+        "target_col": target_col,
+        "n_rows":     len(y),
+        "last_idx":   len(y) - 1,
+        "X": X, "y": y,
+        "X_train": X[train], "X_test": X[test],
+        "y_train": y[train], "y_test": y[test],
+    }
+
+
+def _build_pipeline(config: Dict[str, Any], n_jobs: int = 1) -> Pipeline:
+    """Return the unfitted pipeline for an :func:`engine_config` (*n_jobs* threads for Random Forest)."""
+    from sklearn.ensemble import (
+        GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor,
+    )
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+    scaler = StandardScaler()
+    estimator, params = config["estimator"], config["params"]
+
+    if estimator == "Ridge":
+        return Pipeline([
+            ("poly", PolynomialFeatures(degree=params["degree"], include_bias=False)),
+            ("scaler", scaler),
+            ("model", Ridge(alpha=params["alpha"])),
+        ])
+    if estimator == "RandomForestRegressor":
+        model = RandomForestRegressor(**params, random_state=42, n_jobs=n_jobs)
+    elif estimator == "GradientBoostingRegressor":
+        model = GradientBoostingRegressor(**params, random_state=42)
+    elif estimator == "HistGradientBoostingRegressor":
+        model = HistGradientBoostingRegressor(**params, random_state=42)
+    else:
+        # Default: Linear Regression
+        model = LinearRegression()
+    return Pipeline([
+        ("scaler", scaler),
+        ("model", model),
+    ])
+
+
+class _Deadline:
+    """
+    Absolute end of a time budget in seconds (None: default
+    ``DEADLINE_SECONDS``; 0: unlimited), read off *clock*.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        seconds = seconds if seconds is not None else DEADLINE_SECONDS
+        self.clock = clock
+        self.end = clock() + seconds if seconds else None
+
+    def remaining(self) -> float:
+        return float("inf") if self.end is None else self.end - self.clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def _min_fit_seconds(config: Dict[str, Any], n_train: int, n_threads: int) -> float:
+    """Estimated time for the smallest useful ensemble (one chunk / ten stages)."""
+    estimator, params = config["estimator"], config["params"]
+    if estimator == "RandomForestRegressor":
+        rows = min(n_train, params.get("max_samples", n_train))
+        return _TREE_ROW_SECONDS * rows * min(RF_CHUNK_TREES, params["n_estimators"]) / n_threads
+    if estimator == "GradientBoostingRegressor":
+        if config.get("cv_method") == "folds":
+            # CV_FOLDS fits on 4/5 of the rows, as many at once as there are threads
+            return _TREE_ROW_SECONDS * n_train * 10 * 0.8 * CV_FOLDS / min(CV_FOLDS, n_threads)
+        return _TREE_ROW_SECONDS * n_train * 10
+    if estimator == "HistGradientBoostingRegressor":
+        return _HIST_ITER_ROW_SECONDS * n_train * 10 / n_threads
+    return 0.0
+
+
+def _fit_ensemble(pipeline: Pipeline, config: Dict[str, Any], X, y, deadline: _Deadline) -> Optional[str]:
+    """
+    Fit *pipeline*, cutting a Random Forest (between chunks of
+    ``RF_CHUNK_TREES`` trees) or Gradient Boosting (between stages) short
+    at *deadline*. Returns why the ensemble is smaller than configured, or
+    None. Without a deadline the fit is a single ``pipeline.fit``.
+    """
+    model = pipeline.named_steps["model"]
+    estimator = config["estimator"]
+    if deadline.end is None or estimator not in ("RandomForestRegressor", "GradientBoostingRegressor"):
+        pipeline.fit(X, y)
+        return None
+
+    if estimator == "GradientBoostingRegressor":
+        pipeline.fit(X, y, model__monitor=lambda i, est, env: deadline.expired())
+        if model.n_estimators_ < model.n_estimators:
+            return f"Gradient Boosting stopped after {model.n_estimators_} of {model.n_estimators} stages"
+        return None
+
+    # warm_start grows the same trees a single fit would, chunk by chunk; the
+    # out-of-bag score is only computed once the forest is complete
+    total = model.n_estimators
+    oob = model.oob_score
+    n_trees = 0
+    model.set_params(warm_start=True)
+    try:
+        while n_trees < total:
+            n_trees = min(total, n_trees + RF_CHUNK_TREES)
+            model.set_params(n_estimators=n_trees, oob_score=oob and n_trees == total)
+            pipeline.fit(X, y)
+            if n_trees < total and deadline.expired():
+                return f"Random Forest stopped after {n_trees} of {total} trees"
+    finally:
+        model.set_params(warm_start=False)
+    return None
+
+
+class FoldEnsemble:
+    """
+    The pipelines fitted on the cross-validation folds of a training split,
+    served together: predictions are their mean. Built by :func:`_fit_folds`
+    so the CV fits are the model rather than extra work next to it.
+    """
+
+    def __init__(self, members: List[Pipeline]) -> None:
+        self.members = members
+
+    def member_predictions(self, X) -> np.ndarray:
+        """``(n_members, n_rows)`` predictions of every fold model."""
+        return np.stack([member.predict(X) for member in self.members])
+
+    def predict(self, X) -> np.ndarray:
+        return self.member_predictions(X).mean(axis=0)
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return np.mean([m.named_steps["model"].feature_importances_ for m in self.members], axis=0)
+
+
+def _fit_folds(
+    config: Dict[str, Any], X, y, deadline: _Deadline, n_threads: int
+) -> Tuple[FoldEnsemble, Optional[float], Optional[str]]:
+    """
+    Fit one pipeline per contiguous CV fold of ``(X, y)`` (the splits of an
+    unshuffled ``KFold``), up to *n_threads* folds at a time. Returns
+    ``(ensemble, cv_score, stopped)``: the out-of-fold R² and why a fit
+    was cut short by *deadline*, if one was.
+    """
+    from sklearn.metrics import r2_score
+
+    n = len(X)
+    folds = np.array_split(np.arange(n), min(CV_FOLDS, n))
+
+    def _fit(held_out: np.ndarray) -> Tuple[Pipeline, Optional[str]]:
+        keep = np.ones(n, dtype=bool)
+        keep[held_out] = False
+        pipeline = _build_pipeline(config)
+        return pipeline, _fit_ensemble(pipeline, config, X[keep], y[keep], deadline)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(folds), n_threads))) as pool:
+        fitted = list(pool.map(_fit, folds))
+
+    members = [pipeline for pipeline, _ in fitted]
+    stopped = next((reason for _, reason in fitted if reason), None)
+    out_of_fold = np.empty(n)
+    for pipeline, held_out in zip(members, folds):
+        out_of_fold[held_out] = pipeline.predict(X[held_out])
+    cv_score = round(float(r2_score(y, out_of_fold)), 4) if n >= 2 else None
+    return FoldEnsemble(members), cv_score, stopped
+
+
+def _fit_with_budget(
+    config: Dict[str, Any], data: Dict[str, Any], deadline: _Deadline, n_threads: int
+) -> Optional[Tuple[Pipeline, np.ndarray, Optional[float], List[str]]]:
+    """
+    Fit, predict the test split and validate within *deadline* (see
+    ``cv_method`` in :func:`engine_config`). Returns
+    ``(pipeline, y_pred_test, cv_score, degraded_reasons)``, or None when
+    not even a minimal ensemble fits in the remaining time.
+    """
+    from sklearn.model_selection import cross_val_score
+
+    X_train, y_train = data["X_train"], data["y_train"]
+    n_train, n_rows = len(X_train), data["n_rows"]
+    reasons: List[str] = []
+
+    if deadline.remaining() < _min_fit_seconds(config, n_train, n_threads):
+        return None
+    params = config["params"]
+    if config["estimator"] == "HistGradientBoostingRegressor" and deadline.end is not None:
+        affordable = int(deadline.remaining() * n_threads / (_HIST_ITER_ROW_SECONDS * n_train))
+        if affordable < params["max_iter"]:
+            reasons.append(f"boosting iterations capped at {affordable} of {params['max_iter']}")
+            params["max_iter"] = affordable
+
+    cv_method = config["cv_method"]
+    if cv_method == "folds":
+        # The fold models are the model: no separate final fit
+        pipeline, cv_score, stopped = _fit_folds(config, X_train, y_train, deadline, n_threads)
+        if stopped:
+            reasons.append(stopped)
+        return pipeline, pipeline.predict(data["X_test"]), cv_score, reasons
+
+    pipeline = _build_pipeline(config, n_jobs=n_threads)
+    started = time.monotonic()
+    stopped = _fit_ensemble(pipeline, config, X_train, y_train, deadline)
+    fit_seconds = time.monotonic() - started
+    if stopped:
+        reasons.append(stopped)
+    y_pred_test = pipeline.predict(data["X_test"])
+
+    cv_score = None
+    if cv_method == "oob":
+        # Every tree scores the rows left out of its bootstrap sample
+        oob_score = getattr(pipeline.named_steps["model"], "oob_score_", None)
+        if oob_score is None:
+            reasons.append("cross-validation skipped")
+        else:
+            cv_score = round(float(oob_score), 4)
+    elif cv_method == "sampled":
+        # 5-fold CV on a row sample (histogram boosting on large data)
+        cv_rows = config["cv_rows"]
+        cv_estimate = fit_seconds * CV_FOLDS * (0.8 * cv_rows / n_train)
+        if reasons or deadline.remaining() < cv_estimate:
+            reasons.append("cross-validation skipped")
+        else:
+            X_cv, y_cv = data["X"], data["y"]
+            if cv_rows < n_rows:
+                rows = np.sort(np.random.RandomState(42).choice(n_rows, cv_rows, replace=False))
+                X_cv, y_cv = X_cv[rows], y_cv[rows]
+            cv_scores = cross_val_score(pipeline, X_cv, y_cv, cv=min(CV_FOLDS, cv_rows), scoring="r2")
+            cv_score = round(float(cv_scores.mean()), 4)
+    return pipeline, y_pred_test, cv_score, reasons
+
+
+def _fit_and_evaluate(
+    model_type: str, data: Dict[str, Any], deadline: Optional[_Deadline] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Fit *model_type* on a :func:`_split_dataset` split; return ``(result, bundle)``."""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    lags = lag_options(model_type)
+    if lags is not None and "lags" not in data:
+        data = _lag_dataset(data, lags)
+    X_train, X_test = data["X_train"], data["X_test"]
+    y_test = data["y_test"]
+    target_col = data["target_col"]
+    config = engine_config(model_type, data["n_rows"])
+    if "lags" in data:
+        config["lag_features"] = data["lags"]
+    deadline = deadline or _Deadline()
+
+    # The forest, histogram boosting and fold ensembles use several threads
+    threaded = config["estimator"] in _THREADED_ESTIMATORS or config["cv_method"] == "folds"
+    want = None if threaded else 1
+    # n_jobs carries the grant to the forest; OpenMP (histogram boosting)
+    # reads it from this thread's OpenMP setting
+    with compute.allocate(want) as n_threads, compute.openmp_threads(n_threads):
+        fitted = _fit_with_budget(config, data, deadline, n_threads)
+    if fitted is None:
+        # Threads are released first: the fallback draws from the same budget
+        return _fallback(model_type, data, f"time budget too short for {config['estimator']}")
+    pipeline, y_pred_test, cv_score, reasons = fitted
+
+    # ---- Evaluation ------------------------------------------------------
+    residuals = y_test - y_pred_test
+    r2  = r2_score(y_test, y_pred_test)
+    mae = mean_absolute_error(y_test, y_pred_test)
+    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred_test)))
+
+    # Feature importances (tree models)
+    feature_importances: Dict[str, float] = {}
+    inner = pipeline if isinstance(pipeline, FoldEnsemble) else pipeline.named_steps.get("model")
+    if hasattr(inner, "feature_importances_"):
+        names = data.get("feature_names", ["_idx"])
+        feature_importances = {
+            name: round(float(value), 4) for name, value in zip(names, inner.feature_importances_)
         }
 
-    except ValueError as ve:
-        return {"error": str(ve)}
-    except Exception as exc:
-        return {"error": f"ML Engine Error: {str(exc)}"}
+    # ---- Forecast --------------------------------------------------------
+    bundle = {
+        "engine_version": ENGINE_VERSION,
+        "model_type":     model_type,
+        "target_column":  target_col,
+        "pipeline":       pipeline,
+        "last_idx":       data["last_idx"],
+        "residuals":      residuals,
+        # Recent history for incremental partial refits (and lag forecasts)
+        "window":         np.asarray(data.get("history", data["y"])[-INCREMENTAL_WINDOW:], dtype=float),
+    }
+    if "lags" in data:
+        bundle["lags"] = data["lags"]
+    result, bundle = _package_result(
+        model_type, target_col, len(X_train), len(X_test),
+        r2, mae, rmse, cv_score, feature_importances, bundle, config,
+    )
+    if reasons:
+        result["degraded"] = True
+        result["degraded_reason"] = "; ".join(reasons) + " (time budget)"
+    return result, bundle
+
+
+def _fallback(model_type: str, data: Dict[str, Any], reason: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Fit Linear Regression in place of *model_type* and mark the result degraded."""
+    result, bundle = _fit_and_evaluate("Linear Regression", data, _Deadline(0))
+    result["requested_model_type"] = model_type
+    result["degraded"] = True
+    result["degraded_reason"] = f"{reason}; fell back to Linear Regression"
+    return result, bundle
+
+
+def _confidence(r2: float) -> float:
+    """Simple confidence proxy (capped between 0.5 and 0.99)."""
+    return min(0.99, max(0.5, round(float(r2) if r2 > 0 else 0.5, 4)))
+
+
+def _package_result(
+    model_type: str,
+    target_col: str,
+    n_train: int,
+    n_test: int,
+    r2: float,
+    mae: float,
+    rmse: float,
+    cv_score: Optional[float],
+    feature_importances: Dict[str, float],
+    bundle: Dict[str, Any],
+    config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Assemble the result dict shared by the sklearn and closed-form paths."""
+    forecast_steps = forecast(bundle, DEFAULT_FORECAST_STEPS)
+
+    return {
+        "model_type": model_type,
+        "target_column": target_col,
+        "training_samples": int(n_train),
+        "test_samples": int(n_test),
+        "metrics": {
+            "r2_score": round(float(r2), 4),
+            "mae": round(float(mae), 4),
+            "rmse": round(float(rmse), 4),
+            "cv_r2_mean": cv_score,
+        },
+        "forecast": forecast_steps,
+        "confidence": _confidence(r2),
+        "feature_importances": feature_importances,
+        "engine_config": config,
+    }, bundle
+
+
+# ---------------------------------------------------------------------------
+# Closed-form fast path (Linear / Polynomial Regression)
+# ---------------------------------------------------------------------------
+
+class ClosedFormModel:
+    """
+    Least squares of y on the standardized powers ``x, x², …, x**degree`` with
+    an L2 penalty *alpha* — the model of the sklearn Linear (degree 1,
+    alpha 0) and Polynomial (degree 2, Ridge alpha 1) pipelines, solved from
+    the normal equations. Exposes the same ``predict`` as a Pipeline.
+
+    The fit keeps only sufficient statistics (row count, means and centred
+    co-moments of ``[x, …, x**degree, y]``), so :meth:`partial_fit` absorbs
+    new rows in time independent of how many were seen before and yields
+    exactly the model a full refit on all rows would.
+    """
+
+    def __init__(self, degree: int, alpha: float) -> None:
+        self.degree = degree
+        self.alpha = alpha
+        self.n_ = 0
+
+    def _features(self, x: np.ndarray) -> np.ndarray:
+        return np.power.outer(x, np.arange(1, self.degree + 1, dtype=float))
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> "ClosedFormModel":
+        self.n_ = 0
+        return self.partial_fit(x, y)
+
+    def partial_fit(self, x: np.ndarray, y: np.ndarray) -> "ClosedFormModel":
+        """Merge the moments of the rows ``(x, y)`` into the fit and re-solve."""
+        A = np.column_stack((self._features(np.asarray(x, dtype=float)), y))
+        n_new = len(A)
+        means = A.sum(axis=0) / n_new
+        A -= means
+        comoments = A.T @ A
+        if self.n_:
+            # Pairwise merge of means / co-moments (Chan, Golub & LeVeque)
+            n = self.n_ + n_new
+            delta = means - self.means_
+            self.comoments_ = self.comoments_ + comoments + np.outer(delta, delta) * (self.n_ * n_new / n)
+            self.means_ = self.means_ + delta * (n_new / n)
+            self.n_ = n
+        else:
+            self.n_, self.means_, self.comoments_ = n_new, means, comoments
+        self._solve()
+        return self
+
+    def _solve(self) -> None:
+        d = self.degree
+        C = self.comoments_
+        scale = np.sqrt(np.diag(C)[:d] / self.n_)
+        scale[scale == 0.0] = 1.0
+        gram = C[:d, :d] / np.outer(scale, scale)
+        gram.flat[:: d + 1] += self.alpha
+        rhs = C[:d, d] / scale
+        try:
+            self.coef_ = np.linalg.solve(gram, rhs)
+        except np.linalg.LinAlgError:
+            self.coef_ = np.linalg.lstsq(gram, rhs, rcond=None)[0]
+        self.mean_ = self.means_[:d]
+        self.scale_ = scale
+        self.intercept_ = float(self.means_[d])
+
+    def predict(self, X) -> np.ndarray:
+        x = np.asarray(X, dtype=float).reshape(-1)
+        return self.intercept_ + ((self._features(x) - self.mean_) / self.scale_) @ self.coef_
+
+
+def _closed_form_spec(model_type: str) -> Optional[Tuple[int, float]]:
+    """``(degree, alpha)`` for model types with a closed-form fit, mirroring :func:`_build_pipeline`."""
+    if _LAG_SUFFIX.search(model_type):
+        return None
+    if "Polynomial" in model_type:
+        return 2, 1.0
+    if "Random Forest" in model_type or "Gradient Boosting" in model_type:
+        return None
+    return 1, 0.0
+
+
+def _numeric_series(input_data: Dict[str, Any]) -> Optional[Tuple[str, np.ndarray]]:
+    """
+    Read ``(target_column, y)`` straight from plain-Python records when
+    :func:`_prepare_dataframe` would pick the same column with no missing or
+    non-finite values; None whenever the DataFrame path must decide.
+    Columnar payloads are read with :func:`_columnar_series`.
+    """
+    if isinstance(input_data, dict) and "columns" in input_data:
+        try:
+            target_col, y = _columnar_series(input_data["columns"])
+        except ValueError:
+            return None
+        if len(y) < CLOSED_FORM_MIN_ROWS or not np.isfinite(y).all():
+            return None
+        return target_col, y.astype(float)
+    values = input_data.get("values") if isinstance(input_data, dict) else None
+    if not isinstance(values, list) or len(values) < CLOSED_FORM_MIN_ROWS:
+        return None
+    if not isinstance(values[0], dict):
+        return None
+    for key, first in values[0].items():
+        if key == "_idx":
+            return None
+        if type(first) in (int, float):   # type() rather than isinstance: bool is not numeric
+            try:
+                column = [row[key] for row in values]
+            except (KeyError, TypeError):
+                return None
+            if not set(map(type, column)) <= {int, float}:
+                return None
+            y = np.array(column, dtype=float)
+            return (key, y) if np.isfinite(y).all() else None
+        if not isinstance(first, (str, bool)):
+            return None   # None / nested values may still make a numeric column
+    return None
+
+
+@lru_cache(maxsize=128)
+def _split_indices(n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Train / test rows chosen by ``train_test_split(test_size=0.2, random_state=42)``."""
+    n_test = int(np.ceil(0.2 * n_rows))
+    perm = np.random.RandomState(42).permutation(n_rows)
+    train, test = perm[n_test:], perm[:n_test]
+    train.flags.writeable = False
+    test.flags.writeable = False
+    return train, test
+
+
+def fit_closed_form(
+    model_type: str, input_data: Dict[str, Any]
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Fit Linear / Polynomial Regression without pandas or sklearn; returns
+    None when the input needs the general path (:func:`_fit_and_evaluate`).
+    Split, metrics and forecast match the sklearn pipelines to float precision.
+    """
+    spec = _closed_form_spec(model_type)
+    if spec is None:
+        return None
+    series = _numeric_series(input_data)
+    if series is None:
+        return None
+    target_col, y = series
+    n_rows = len(y)
+    x = np.arange(n_rows, dtype=float)
+    train, test = _split_indices(n_rows)
+
+    model = ClosedFormModel(*spec).fit(x[train], y[train])
+    y_test = y[test]
+    residuals = y_test - model.predict(x[test])
+
+    ss_res = float(residuals @ residuals)
+    centered = y_test - y_test.mean()
+    ss_tot = float(centered @ centered)
+    if ss_tot == 0.0:
+        r2 = 1.0 if ss_res == 0.0 else 0.0
+    else:
+        r2 = 1.0 - ss_res / ss_tot
+    mae = float(np.abs(residuals).mean())
+    rmse = float(np.sqrt(ss_res / len(residuals)))
+
+    bundle = {
+        "engine_version": ENGINE_VERSION,
+        "model_type":     model_type,
+        "target_column":  target_col,
+        "pipeline":       model,
+        "last_idx":       n_rows - 1,
+        "residuals":      residuals,
+    }
+    return _package_result(
+        model_type, target_col, len(train), len(test),
+        r2, mae, rmse, None, {}, bundle,
+        {**engine_config(model_type, n_rows), "profile": "closed_form"},
+    )
+
+
+def forecast(
+    bundle: Dict[str, Any],
+    steps: int = DEFAULT_FORECAST_STEPS,
+    coverage: float = DEFAULT_COVERAGE,
+    interval: str = "normal",
+) -> List[Dict]:
+    """
+    Predict *steps* points past the end of the training data with a fitted
+    *bundle* from :func:`train_model`, with intervals of the given *coverage*.
+
+    ``interval="normal"`` (default) puts the same ±z·σ of the test residuals
+    around every step. ``"bootstrap"`` takes per-step quantiles of
+    ``BOOTSTRAP_SAMPLES`` simulated forecasts (see :func:`_bootstrap_paths`),
+    so intervals widen with the horizon where the model is uncertain. It
+    falls back to ``"normal"`` with fewer than two test residuals.
+
+    Lag-feature bundles forecast recursively from their stored history;
+    their bootstrap paths feed resampled residuals back through the lags.
+    """
+    if interval not in ("normal", "bootstrap"):
+        raise ValueError("interval must be 'normal' or 'bootstrap'.")
+    last_idx = bundle["last_idx"]
+    lags = bundle.get("lags")
+    future_x = np.arange(last_idx + 1, last_idx + steps + 1)
+    if lags:
+        predictions = _recursive_paths(bundle["pipeline"], bundle["window"], lags, last_idx + 1, steps)[0]
+    else:
+        predictions = bundle["pipeline"].predict(future_x.reshape(-1, 1))
+    residuals = np.asarray(bundle["residuals"], dtype=float)
+    if interval == "normal" or len(residuals) < 2:
+        return _confidence_interval(predictions, residuals, _z_score(coverage))
+
+    if lags:
+        # Centred as in _bootstrap_paths; a bias would compound through the lags
+        noise = np.random.default_rng(42).choice(
+            residuals - residuals.mean(), size=(BOOTSTRAP_SAMPLES, steps), replace=True
+        )
+        paths = _recursive_paths(bundle["pipeline"], bundle["window"], lags, last_idx + 1, steps, noise)
+    else:
+        paths = _bootstrap_paths(bundle["pipeline"], future_x.astype(float), residuals)
+    tail = (1.0 - coverage) / 2
+    lower, upper = np.quantile(paths, [tail, 1.0 - tail], axis=0)
+    return [
+        {"step": i, "value": round(float(val), 2), "lower": round(float(lo), 2), "upper": round(float(hi), 2)}
+        for i, (val, lo, hi) in enumerate(zip(predictions, lower, upper), start=1)
+    ]
+
+
+def _z_score(coverage: float) -> float:
+    """Two-sided normal quantile for *coverage* (the historical 1.96 at 95 %)."""
+    if not 0.0 < coverage < 1.0:
+        raise ValueError("coverage must be between 0 and 1.")
+    if coverage == DEFAULT_COVERAGE:
+        return 1.96
+    return NormalDist().inv_cdf(0.5 + coverage / 2)
+
+
+def _bootstrap_paths(pipeline, future_x: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+    """
+    ``(BOOTSTRAP_SAMPLES, steps)`` simulated forecasts, all drawn at once:
+    the model part of each path varies as refits on resampled data would,
+    and a test residual resampled per step is added as noise.
+
+    * closed form — the coefficients of a refit on ``ŷ + e*`` differ by
+      ``G⁻¹Fᵀe*``; ``Fᵀe*`` is drawn from its normal limit
+      ``N(0, σ²FᵀF)`` using the stored moments, so all refits are a single
+      matrix product and no training rows are kept
+    * Random Forest — each path uses one of the fitted trees (the trees
+      are already bootstrap refits)
+    * fold ensemble — each path uses one of the fold models
+    * other models — residual noise around the point forecast only
+
+    The residuals are centred first: a bias in the test errors would
+    otherwise shift every path and could leave the point forecast outside
+    its own interval.
+    """
+    rng = np.random.default_rng(42)
+    n_boot, steps = BOOTSTRAP_SAMPLES, len(future_x)
+    noise = rng.choice(residuals - residuals.mean(), size=(n_boot, steps), replace=True)
+    sigma = float(residuals.std())
+
+    if isinstance(pipeline, ClosedFormModel):
+        d, C, n = pipeline.degree, pipeline.comoments_, pipeline.n_
+        gram = C[:d, :d] / np.outer(pipeline.scale_, pipeline.scale_)
+        penalized = gram + pipeline.alpha * np.eye(d)
+        w, V = np.linalg.eigh(gram)
+        root = V * np.sqrt(np.clip(w, 0.0, None))
+        coef_shift = np.linalg.lstsq(penalized, root @ rng.standard_normal((d, n_boot)), rcond=None)[0]
+        coef = pipeline.coef_[:, None] + sigma * coef_shift
+        intercept = pipeline.intercept_ + sigma / np.sqrt(n) * rng.standard_normal(n_boot)
+        feats = (pipeline._features(future_x) - pipeline.mean_) / pipeline.scale_
+        return intercept[:, None] + (feats @ coef).T + noise
+
+    if isinstance(pipeline, FoldEnsemble):
+        per_fold = pipeline.member_predictions(future_x.reshape(-1, 1))
+        return per_fold[rng.integers(len(per_fold), size=n_boot)] + noise
+
+    model = getattr(pipeline, "named_steps", {}).get("model")
+    if model is not None and type(model).__name__ == "RandomForestRegressor":
+        X_future = pipeline[:-1].transform(future_x.reshape(-1, 1))
+        per_tree = np.stack([tree.predict(X_future) for tree in model.estimators_])
+        return per_tree[rng.integers(len(per_tree), size=n_boot)] + noise
+
+    return pipeline.predict(future_x.reshape(-1, 1))[None, :] + noise
+
+
+# ---------------------------------------------------------------------------
+# Warm-up
+# ---------------------------------------------------------------------------
+
+def warm_up() -> float:
+    """
+    Import pandas and sklearn and run one tiny fit per model type, so the
+    first real prediction of a process that will train does not pay for
+    the imports (and sklearn's lazily loaded submodules). Returns the
+    seconds spent. Called at start-up when ``BGAI_WARM_UP`` is set.
+    """
+    started = time.perf_counter()
+    # Three rows: one quick fit each, without a test split or cross-validation
+    data = _split_dataset({"values": [{"value": float(v)} for v in (1, 3, 2)]})
+    for model_type in ("Linear Regression", "Polynomial Regression", "Random Forest", "Gradient Boosting"):
+        _fit_and_evaluate(model_type, data, _Deadline(0))
+    return time.perf_counter() - started
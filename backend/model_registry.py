@@ -0,0 +1,201 @@
+"""
+model_registry.py — Persisted Model Store for BGAI
+===================================================
+Keeps the fitted model bundle of each Prediction (see
+``ml_engine.train_model``) so longer or repeated forecasts are served by
+``ml_engine.forecast`` without refitting.
+
+Bundles are written with ``joblib`` (zlib-compressed) to
+``BGAI_MODEL_DIR/<prediction_id>.joblib`` (default ``.cache/models`` in the
+project root). The store holds at most ``BGAI_MODEL_REGISTRY_SIZE`` files
+(default 500), evicting the least recently used; recently loaded bundles
+are also kept in a small in-process LRU (``BGAI_MODEL_MEMORY_SIZE``).
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import copy
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from . import ml_engine
+
+load_dotenv()
+
+logger = logging.getLogger("bgai.model_registry")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.getenv("BGAI_MODEL_DIR", "").strip() or os.path.join(ROOT_DIR, ".cache", "models")
+MAX_MODELS = int(os.getenv("BGAI_MODEL_REGISTRY_SIZE", 500))
+MAX_LOADED = int(os.getenv("BGAI_MODEL_MEMORY_SIZE", 16))
+COMPRESS = ("zlib", 3)
+
+# Guards _loaded only; file I/O runs outside it (writes are tmp + os.replace)
+_lock = threading.Lock()
+_loaded: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+# Striped per-prediction locks serialising read-modify-write updates
+# (re-entrant: callers may hold one around update() — see locked())
+_update_locks = [threading.RLock() for _ in range(64)]
+
+
+def _path(prediction_id: int) -> str:
+    return os.path.join(MODEL_DIR, f"{int(prediction_id)}.joblib")
+
+
+def _remember(prediction_id: int, bundle: Dict[str, Any]) -> None:
+    """Put *bundle* at the front of the in-memory LRU. Caller holds ``_lock``."""
+    _loaded[prediction_id] = bundle
+    _loaded.move_to_end(prediction_id)
+    while len(_loaded) > MAX_LOADED:
+        _loaded.popitem(last=False)
+
+
+def _evict() -> None:
+    """Delete the least-recently-used files beyond ``MAX_MODELS``."""
+    try:
+        entries = [e for e in os.scandir(MODEL_DIR) if e.is_file() and e.name.endswith(".joblib")]
+    except OSError:
+        return
+    if len(entries) <= MAX_MODELS:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    evicted = []
+    for entry in entries[: len(entries) - MAX_MODELS]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            continue
+        evicted.append(int(entry.name.split(".", 1)[0]))
+    with _lock:
+        for prediction_id in evicted:
+            _loaded.pop(prediction_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def save(prediction_id: int, bundle: Dict[str, Any]) -> bool:
+    """
+    Persist the fitted *bundle* for *prediction_id*, evicting old models if
+    needed. Returns False (and logs) when the file could not be written.
+    """
+    path = _path(prediction_id)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    import joblib
+
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        joblib.dump(bundle, tmp, compress=COMPRESS)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("Could not store model for prediction %s: %s", prediction_id, exc)
+        return False
+    with _lock:
+        _remember(prediction_id, bundle)
+    _evict()
+    return True
+
+
+def load(prediction_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored bundle for *prediction_id*, or None when it was never
+    stored, has been evicted, or was fitted by a different engine version.
+    """
+    import joblib
+
+    with _lock:
+        bundle = _loaded.get(prediction_id)
+        if bundle is not None:
+            _loaded.move_to_end(prediction_id)
+            return bundle
+    path = _path(prediction_id)
+    try:
+        bundle = joblib.load(path)
+        os.utime(path)   # mtime doubles as the LRU clock
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Ignoring unreadable model %s: %s", path, exc)
+        return None
+    if not isinstance(bundle, dict) or bundle.get("engine_version") != ml_engine.ENGINE_VERSION:
+        return None
+    with _lock:
+        # A save() that finished while the file was read wins
+        bundle = _loaded.setdefault(prediction_id, bundle)
+        _remember(prediction_id, bundle)
+    return bundle
+
+
+def delete(prediction_id: int) -> None:
+    """Remove the stored model of a deleted prediction, if any."""
+    with _lock:
+        _loaded.pop(prediction_id, None)
+    try:
+        os.remove(_path(prediction_id))
+    except OSError:
+        pass
+
+
+def load_or_fit(
+    prediction_id: int, model_type: str, input_data: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Return ``(bundle, refitted)`` for a prediction. A missing or stale model
+    is refitted from *input_data* and stored; bundle is None if that fails.
+    """
+    bundle = load(prediction_id)
+    if bundle is not None:
+        return bundle, False
+    result, bundle = ml_engine.train_model(model_type, input_data)
+    if bundle is not None:
+        save(prediction_id, bundle)
+    return bundle, True
+
+
+def locked(prediction_id: int) -> "threading.RLock":
+    """
+    The lock :func:`update` holds for *prediction_id*. Hold it around the
+    update and the write of its result so concurrent updates of one
+    prediction in this process apply one after the other.
+    """
+    return _update_locks[int(prediction_id) % len(_update_locks)]
+
+
+def update(
+    prediction_id: int,
+    model_type: str,
+    input_data: Dict[str, Any],
+    result: Dict[str, Any],
+    values: List[Dict[str, Any]],
+    commit: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Apply ``ml_engine.update_model`` with the appended *values* to the
+    stored model (refitted from *input_data* first if it is missing) and
+    persist it. Returns ``(updated_result, refitted)``; the result is None
+    if no model could be fitted. Concurrent updates of one prediction are
+    serialised.
+
+    The update runs on a copy of the stored bundle. *commit*, if given, is
+    called with the updated result before the copy replaces it — the write
+    of the appended records — so when it raises the stored model is left
+    as it was. If the model cannot be written after a successful commit it
+    is dropped, and the next use refits it from the committed input data.
+    """
+    with locked(prediction_id):
+        bundle, refitted = load_or_fit(prediction_id, model_type, input_data)
+        if bundle is None:
+            return None, refitted
+        updated, bundle = ml_engine.update_model(copy.deepcopy(bundle), result, values)
+        if commit is not None:
+            commit(updated)
+        if not save(prediction_id, bundle):
+            delete(prediction_id)
+        return updated, refitted
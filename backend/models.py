@@ -9,13 +9,18 @@ Version: 3.0.0
 """
 
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime,
-    ForeignKey, Float, JSON, Text
+    Column, Integer, String, Boolean, Date, DateTime,
+    ForeignKey, Float, JSON, Text, Index
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
 
+# Generic JSON everywhere; binary JSONB on PostgreSQL so payload fields can
+# be indexed and filtered server-side.
+JSONPayload = JSON().with_variant(JSONB(), "postgresql")
+
 
 class User(Base):
     """Represents an authenticated platform user."""
@@ -37,6 +42,8 @@ class User(Base):
     predictions   = relationship("Prediction",   back_populates="user", cascade="all, delete-orphan")
     feedback      = relationship("Feedback",     back_populates="user", cascade="all, delete-orphan")
     integrations  = relationship("Integration",  back_populates="user", cascade="all, delete-orphan")
+    stats         = relationship("UserStats",    back_populates="user", cascade="all, delete-orphan",
+                                 uselist=False)
 
     def __repr__(self) -> str:
         return f"<User id={self.id} email={self.email!r} role={self.role!r}>"
@@ -45,12 +52,26 @@ class User(Base):
 class BusinessData(Base):
     """Stores user-submitted business records (sales, marketing, etc.)."""
     __tablename__ = "business_data"
+    __table_args__ = (
+        # Hot paths filter by owner and list newest-first (optionally by type)
+        Index("ix_business_data_user_created", "user_id", "created_at"),
+        Index("ix_business_data_user_type_created", "user_id", "data_type", "created_at"),
+        Index("ix_business_data_user_region", "user_id", "region"),
+        Index("ix_business_data_user_event_date", "user_id", "event_date"),
+        # Containment / key lookups on the payload (PostgreSQL only)
+        Index("ix_business_data_data_gin", "data", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id          = Column(Integer, primary_key=True, index=True)
     user_id     = Column(Integer, ForeignKey("users.id"), nullable=False)
     data_type   = Column(String, nullable=False)   # Sales | Marketing | …
     description = Column(Text,   default="")        # NEW v3.0 — optional notes label
-    data        = Column(JSON,   nullable=False)
+    data        = Column(JSONPayload, nullable=False)
+    # Typed copies of the hot payload fields (data.region / data.value / data.date),
+    # populated on write so filters and sums run in SQL
+    region      = Column(String, nullable=True)
+    value       = Column(Float,  nullable=True)
+    event_date  = Column(Date,   nullable=True)
     timestamp   = Column(DateTime, default=datetime.utcnow)
     created_at  = Column(DateTime, default=datetime.utcnow)
 
@@ -63,13 +84,17 @@ class BusinessData(Base):
 class Prediction(Base):
     """Stores a single ML prediction run and its outputs."""
     __tablename__ = "predictions"
+    __table_args__ = (
+        Index("ix_predictions_user_created", "user_id", "created_at"),
+        Index("ix_predictions_user_status_created", "user_id", "status", "created_at"),
+    )
 
     id             = Column(Integer, primary_key=True, index=True)
     user_id        = Column(Integer, ForeignKey("users.id"), nullable=False)
     name           = Column(String, default="Unnamed Prediction")
     model_type     = Column(String, nullable=False)
-    input_data     = Column(JSON,   nullable=False)
-    output_data    = Column(JSON,   nullable=True)
+    input_data     = Column(JSONPayload, nullable=False)
+    output_data    = Column(JSONPayload, nullable=True)
     confidence     = Column(Float,  nullable=True)
     accuracy_score = Column(Float,  nullable=True)  # NEW v3.0 — R² stored separately
     status         = Column(String, default="pending")   # pending | completed | failed
@@ -103,6 +128,9 @@ class Feedback(Base):
 class Integration(Base):
     """Represents a third-party service integration connected to a user account."""
     __tablename__ = "integrations"
+    __table_args__ = (
+        Index("ix_integrations_user_created", "user_id", "created_at"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     user_id    = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -116,3 +144,32 @@ class Integration(Base):
 
     def __repr__(self) -> str:
         return f"<Integration id={self.id} service={self.service!r} active={self.is_active}>"
+
+
+class UserStats(Base):
+    """
+    Incrementally maintained KPI counters — one row per user.
+
+    Kept in step with ``business_data``, ``predictions`` and ``integrations``
+    by the CRUD layer inside the same transaction as each write, so the
+    dashboard summary is a primary-key lookup instead of a table scan.
+    """
+    __tablename__ = "user_stats"
+
+    user_id               = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_predictions     = Column(Integer, default=0, nullable=False)
+    completed_predictions = Column(Integer, default=0, nullable=False)
+    failed_predictions    = Column(Integer, default=0, nullable=False)
+    confidence_sum        = Column(Float,   default=0.0, nullable=False)
+    confidence_count      = Column(Integer, default=0, nullable=False)
+    total_data_records    = Column(Integer, default=0, nullable=False)
+    active_integrations   = Column(Integer, default=0, nullable=False)
+    updated_at            = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="stats")
+
+    def __repr__(self) -> str:
+        return (
+            f"<UserStats user={self.user_id} predictions={self.total_predictions} "
+            f"records={self.total_data_records}>"
+        )
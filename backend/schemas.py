@@ -10,7 +10,7 @@ Version: 3.0.0
 
 from pydantic import BaseModel, EmailStr, field_validator, ConfigDict
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 
 # ---------------------------------------------------------------------------
@@ -83,10 +83,41 @@ class BusinessData(BusinessDataBase):
 
     id:         int
     user_id:    int
+    region:     Optional[str] = None
+    value:      Optional[float] = None
+    event_date: Optional[date] = None
     timestamp:  datetime
     created_at: datetime
 
 
+class BulkRowError(BaseModel):
+    row:   int   # 1-based data row in the upload (CSV header excluded)
+    error: str
+
+
+class BulkBatchResult(BaseModel):
+    batch:    int
+    received: int
+    inserted: int
+    failed:   int
+
+
+class BulkIngestResult(BaseModel):
+    """Outcome of ``POST /business-data/bulk`` — one entry per committed batch."""
+    format:   str
+    received: int
+    inserted: int
+    failed:   int
+    batches:  List[BulkBatchResult]
+    errors:   List[BulkRowError]
+
+
+class BusinessDataPage(BaseModel):
+    """One keyset-paginated page; pass ``next_cursor`` back to fetch the next."""
+    items:       List[BusinessData]
+    next_cursor: Optional[str] = None
+
+
 # ---------------------------------------------------------------------------
 # Predictions
 # ---------------------------------------------------------------------------
@@ -100,12 +131,23 @@ class MetricsSchema(BaseModel):
 
 class PredictionBase(BaseModel):
     name:       Optional[str] = "Unnamed Prediction"
+    # e.g. "Random Forest", or with lag options "Random Forest (lags=14, season=12)"
     model_type: str
+    # {"values": [{...}, ...]} records or columnar {"columns": {name: [...]}}
     input_data: Dict[str, Any]
 
 
+def _check_deadline(v):
+    if v is not None and not (0 < v <= 3600):
+        raise ValueError("deadline_seconds must be between 0 and 3600")
+    return v
+
+
 class PredictionCreate(PredictionBase):
-    pass
+    # Training time budget; unset uses the server default (BGAI_TRAIN_DEADLINE_S)
+    deadline_seconds: Optional[float] = None
+
+    _deadline_range = field_validator("deadline_seconds")(_check_deadline)
 
 
 class Prediction(PredictionBase):
@@ -120,6 +162,162 @@ class Prediction(PredictionBase):
     created_at:     datetime
 
 
+class PredictionUpdate(BaseModel):
+    """Records appended to a completed prediction's series, oldest first."""
+    values: List[Dict[str, Any]]
+
+    @field_validator("values")
+    @classmethod
+    def values_range(cls, v):
+        if not 1 <= len(v) <= 10_000:
+            raise ValueError("Provide between 1 and 10000 new records")
+        return v
+
+
+class PredictionBatchCreate(BaseModel):
+    """Several model types fitted on the same *input_data* in one request."""
+    name:             Optional[str] = "Unnamed Prediction"
+    model_types:      List[str]
+    input_data:       Dict[str, Any]
+    deadline_seconds: Optional[float] = None
+
+    _deadline_range = field_validator("deadline_seconds")(_check_deadline)
+
+    @field_validator("model_types")
+    @classmethod
+    def model_types_range(cls, v):
+        if not 1 <= len(v) <= 8:
+            raise ValueError("Provide between 1 and 8 model types")
+        return v
+
+
+class ModelRanking(BaseModel):
+    """One row of a batch comparison, best model first (``rank`` None if it failed)."""
+    rank:       Optional[int] = None
+    model_type: str
+    r2_score:   Optional[float] = None
+    cv_r2_mean: Optional[float] = None
+    rmse:       Optional[float] = None
+    mae:        Optional[float] = None
+    confidence: Optional[float] = None
+    degraded:   bool = False
+    error:      Optional[str] = None
+
+
+class PredictionBatch(BaseModel):
+    predictions: List[Prediction]
+    ranking:     List[ModelRanking]
+    best_model:  Optional[str] = None
+
+
+class PredictionPage(BaseModel):
+    """One keyset-paginated page; pass ``next_cursor`` back to fetch the next."""
+    items:       List[Prediction]
+    next_cursor: Optional[str] = None
+
+
+class PredictionSummary(BaseModel):
+    """List-view projection of a Prediction — no input/output payloads."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id:             int
+    name:           Optional[str] = None
+    model_type:     str
+    status:         str
+    confidence:     Optional[float] = None
+    accuracy_score: Optional[float] = None
+    created_at:     datetime
+    forecast:       Optional[List[Dict[str, Any]]] = None
+
+
+class PredictionSummaryPage(BaseModel):
+    items:       List[PredictionSummary]
+    next_cursor: Optional[str] = None
+
+
+class ForecastPoint(BaseModel):
+    step:  int
+    value: float
+    lower: float
+    upper: float
+
+
+class ForecastResponse(BaseModel):
+    """Forecast served from a stored model (``refitted`` if it had to be rebuilt)."""
+    prediction_id:   int
+    model_type:      str
+    steps:           int
+    coverage:        float
+    interval_method: str
+    refitted:        bool
+    forecast:        List[ForecastPoint]
+
+
+class SeriesForecast(BaseModel):
+    """Forecast of one ``(data_type, region)`` series; ``error`` if it could not be fitted."""
+    data_type:       str
+    region:          str
+    points:          int
+    metrics:         Optional[MetricsSchema] = None
+    confidence:      Optional[float] = None
+    forecast:        List[ForecastPoint] = []
+    degraded:        bool = False
+    degraded_reason: Optional[str] = None
+    error:           Optional[str] = None
+
+
+class SeriesForecastResponse(BaseModel):
+    model_type: str
+    steps:      int
+    series:     List[SeriesForecast]
+
+
+class JobStats(BaseModel):
+    """Prediction job queue counters (per API worker process)."""
+    submitted:   int
+    completed:   int
+    failed:      int
+    rejected:    int
+    in_flight:   int
+    queue_depth: int
+    workers:     int
+    mean_wait_s: float
+    p95_wait_s:  float
+
+
+class ComputeStats(BaseModel):
+    """CPU thread budget shared by model fits (per process, see ``compute``)."""
+    total_threads:  int
+    max_per_fit:    int
+    threads_in_use: int
+    running_fits:   int
+    waiting_fits:   int
+    grants:         int
+    waited:         int
+    mean_wait_s:    float
+    p50_wait_s:     float
+    p95_wait_s:     float
+    max_wait_s:     float
+
+
+class MLCacheStats(BaseModel):
+    """Counters of the ml_cache result cache (per API worker process)."""
+    memory_hits:      int
+    disk_hits:        int
+    hits:             int
+    misses:           int
+    hit_ratio:        float
+    stores:           int
+    memory_evictions: int
+    disk_evictions:   int
+    memory_entries:   int
+    memory_limit:     int
+    disk_enabled:     bool
+    disk_bytes:       int
+    disk_limit:       int
+    engine_version:   str
+
+
 # ---------------------------------------------------------------------------
 # Feedback
 # ---------------------------------------------------------------------------
@@ -0,0 +1,134 @@
+"""
+bench_cv_reuse.py — Ensemble Validation Cost Benchmark for BGAI
+================================================================
+Counts the ensemble fits behind one Random Forest / Gradient Boosting
+prediction and times them, comparing the engine's current validation
+(out-of-bag score for the forest, reused CV fold models for boosting; see
+``ml_engine.engine_config``) with the previous scheme of one fit on the
+training split plus a 5-fold ``cross_val_score`` on all rows.
+
+Usage (from the project root)::
+
+    python benchmarks/bench_cv_reuse.py
+    python benchmarks/bench_cv_reuse.py --rows 500 5000 --repeat 3 --json
+
+Fits are counted by wrapping ``RandomForestRegressor.fit`` and
+``GradientBoostingRegressor.fit``; the time budget is disabled so every
+ensemble is fitted in full.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.model_selection import cross_val_score
+
+from backend import ml_engine
+
+MODEL_TYPES = ("Random Forest", "Gradient Boosting")
+
+
+@contextmanager
+def count_fits():
+    """Count ``fit`` calls of both ensemble classes (clones and threads included)."""
+    calls: List[int] = []
+    originals = {cls: cls.fit for cls in (RandomForestRegressor, GradientBoostingRegressor)}
+
+    def _wrap(original):
+        def fit(self, *args, **kwargs):
+            calls.append(1)
+            return original(self, *args, **kwargs)
+        return fit
+
+    for cls, original in originals.items():
+        cls.fit = _wrap(original)
+    try:
+        yield calls
+    finally:
+        for cls, original in originals.items():
+            cls.fit = original
+
+
+def make_input(n_rows: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(42)
+    trend = np.linspace(100, 400, n_rows) + 20 * np.sin(np.arange(n_rows) / 7)
+    return {"values": [{"value": float(v)} for v in trend + rng.normal(0, 10, n_rows)]}
+
+
+def previous_scheme(model_type: str, input_data: Dict[str, Any]) -> float:
+    """Fit on the training split, then cross-validate on every row (pre-3.3 engine)."""
+    data = ml_engine._split_dataset(input_data)
+    config = ml_engine.engine_config(model_type, data["n_rows"])
+    config["params"] = {k: v for k, v in config["params"].items() if k != "oob_score"}
+    pipeline = ml_engine._build_pipeline(config)
+    pipeline.fit(data["X_train"], data["y_train"])
+    pipeline.predict(data["X_test"])
+    scores = cross_val_score(pipeline, data["X"], data["y"], cv=min(5, data["n_rows"]), scoring="r2")
+    return float(scores.mean())
+
+
+def current_scheme(model_type: str, input_data: Dict[str, Any]) -> float:
+    result, _ = ml_engine.train_model(model_type, input_data, deadline_s=0)
+    return result["metrics"]["cv_r2_mean"]
+
+
+def measure(fn, model_type: str, input_data: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        with count_fits() as calls:
+            started = time.perf_counter()
+            cv_score = fn(model_type, input_data)
+            timings.append(time.perf_counter() - started)
+    return {"fits": len(calls), "seconds": round(statistics.median(timings), 3),
+            "cv_r2": round(cv_score, 4)}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ensemble fits and time per prediction, before and after CV reuse.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 2000, 8000])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median time)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    ml_engine.warm_up()
+    results = []
+    for n_rows in args.rows:
+        input_data = make_input(n_rows)
+        for model_type in MODEL_TYPES:
+            before = measure(previous_scheme, model_type, input_data, max(1, args.repeat))
+            after = measure(current_scheme, model_type, input_data, max(1, args.repeat))
+            results.append({
+                "rows":       n_rows,
+                "model_type": model_type,
+                "cv_method":  ml_engine.engine_config(model_type, n_rows)["cv_method"],
+                "before":     before,
+                "after":      after,
+                "speedup":    round(before["seconds"] / after["seconds"], 2),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'rows':>6} {'model':<18} {'method':<7} {'fits':>9} {'seconds':>15} {'speedup':>8} {'cv r2':>17}")
+    for r in results:
+        b, a = r["before"], r["after"]
+        print(f"{r['rows']:>6} {r['model_type']:<18} {r['cv_method']:<7} "
+              f"{b['fits']:>4} → {a['fits']:<2} {b['seconds']:>6.3f} → {a['seconds']:<6.3f} "
+              f"{r['speedup']:>7.2f}x {b['cv_r2']:>7.4f} → {a['cv_r2']:<7.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
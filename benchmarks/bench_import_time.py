@@ -0,0 +1,105 @@
+"""
+bench_import_time.py — Cold Import Benchmark for BGAI
+======================================================
+Times ``import <module>`` for the backend modules in fresh interpreters
+(median of several runs) and lists which heavy libraries each import
+pulled in. pandas, sklearn, scipy, joblib and plotly are meant to load on
+first use only, so any of them showing up here is an import-time
+regression.
+
+Usage (from the project root)::
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 7 backend.main
+    python benchmarks/bench_import_time.py --strict --max-ms 1500
+
+``--strict`` exits with status 1 when a heavy library is imported eagerly;
+``--max-ms`` does the same when a median exceeds the given milliseconds.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "backend.main",
+    "backend.jobs",
+    "backend.ml_engine",
+    "backend.ml_cache",
+    "backend.model_registry",
+    "backend.crud",
+]
+HEAVY_LIBRARIES = ("pandas", "sklearn", "scipy", "joblib", "plotly")
+
+# Runs in the child interpreter: import the module, report time and heavy libs
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": elapsed * 1000, "heavy": heavy}}))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    """Import *module* in *repeat* fresh interpreters; return median / min ms and heavy libs."""
+    code = _PROBE.format(module=module, heavy=HEAVY_LIBRARIES)
+    timings: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        )
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(sample["ms"])
+        heavy = sample["heavy"]
+    return {
+        "module":    module,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms":    round(min(timings), 1),
+        "heavy":     heavy,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold import time of the BGAI backend modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a median exceeds this")
+    parser.add_argument("--strict", action="store_true", help="fail if a heavy library loads eagerly")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, max(1, args.repeat)) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'module':<26} {'median ms':>10} {'min ms':>8}  heavy libraries")
+        for r in results:
+            print(f"{r['module']:<26} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f}  {', '.join(r['heavy']) or '—'}")
+
+    failed = False
+    for r in results:
+        if args.max_ms is not None and r["median_ms"] > args.max_ms:
+            print(f"FAIL {r['module']}: {r['median_ms']} ms > {args.max_ms} ms", file=sys.stderr)
+            failed = True
+        if args.strict and r["heavy"]:
+            print(f"FAIL {r['module']}: imports {', '.join(r['heavy'])} eagerly", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+bench_ingest.py — Bulk Ingestion Throughput Benchmark for BGAI
+===============================================================
+Streams synthetic uploads through ``ingest.ingest_business_data`` into a
+throw-away SQLite database and reports rows per second for each body
+format, split into parse + validation alone, the insert alone
+(``crud.bulk_create_business_data``) and the two end to end.
+
+Usage (from the project root)::
+
+    python benchmarks/bench_ingest.py
+    python benchmarks/bench_ingest.py --rows 200000 --formats ndjson csv --json
+
+The upload is fed in 64 KiB chunks, as a request body would arrive. The
+target is 50k rows/s end to end.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TMP_DIR = tempfile.mkdtemp(prefix="bgai-bench-")
+os.environ["BGAI_DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'bench.db')}"
+os.environ.pop("BGAI_ASYNC_DATABASE_URL", None)
+sys.path.insert(0, ROOT_DIR)
+
+from backend import crud, database, ingest, migrations, models
+
+FORMATS = ("json", "ndjson", "csv")
+CHUNK_SIZE = 64 * 1024
+TARGET_ROWS_PER_S = 50_000
+REGIONS = ("North", "South", "East", "West")
+
+
+def make_body(fmt: str, n_rows: int) -> bytes:
+    rows = [
+        {"data_type": "Sales", "description": "",
+         "data": {"region": REGIONS[i % 4], "value": round(100 + i * 0.5, 2),
+                  "date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}}
+        for i in range(n_rows)
+    ]
+    if fmt == "json":
+        return json.dumps(rows).encode()
+    if fmt == "ndjson":
+        return "\n".join(json.dumps(r) for r in rows).encode()
+    lines = ["data_type,description,region,value,date"]
+    lines += [f"Sales,,{r['data']['region']},{r['data']['value']},{r['data']['date']}" for r in rows]
+    return "\n".join(lines).encode()
+
+
+async def _chunks(body: bytes):
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE]
+
+
+def _ingest(body: bytes, fmt: str, insert_batch, batch_size: int) -> float:
+    started = time.perf_counter()
+    result = asyncio.run(ingest.ingest_business_data(_chunks(body), fmt, insert_batch, batch_size))
+    elapsed = time.perf_counter() - started
+    assert result["failed"] == 0, result["errors"][:3]
+    return elapsed
+
+
+def measure(fmt: str, n_rows: int, batch_size: int, repeat: int, user_id: int) -> Dict[str, Any]:
+    body = make_body(fmt, n_rows)
+    batches: List[list] = []
+
+    async def collect(records):
+        batches.append(records)
+        return len(records)
+
+    parse, insert, total = [], [], []
+    for _ in range(repeat):
+        batches.clear()
+        parse.append(_ingest(body, fmt, collect, batch_size))
+
+        db = database.SessionLocal()
+        try:
+            started = time.perf_counter()
+            for records in batches:
+                crud.bulk_create_business_data(db, records, user_id)
+            insert.append(time.perf_counter() - started)
+
+            async def insert_batch(records):
+                return crud.bulk_create_business_data(db, records, user_id)
+
+            total.append(_ingest(body, fmt, insert_batch, batch_size))
+        finally:
+            db.close()
+
+    rate = lambda timings: round(n_rows / statistics.median(timings))
+    return {"format": fmt, "rows": n_rows, "parse_validate": rate(parse),
+            "insert": rate(insert), "end_to_end": rate(total)}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rows/s of POST /business-data/bulk, per body format.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=ingest.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median time)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    migrations.init_db(database.engine)
+    db = database.SessionLocal()
+    user = models.User(email="bench@example.com", name="Bench", password="x", company="")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    results = [measure(fmt, args.rows, args.batch_size, max(1, args.repeat), user_id) for fmt in args.formats]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'format':<7} {'rows':>8} {'parse+validate':>15} {'insert':>9} {'end to end':>11}  (rows/s)")
+    for r in results:
+        flag = "" if r["end_to_end"] >= TARGET_ROWS_PER_S else f"  < {TARGET_ROWS_PER_S:,} target"
+        print(f"{r['format']:<7} {r['rows']:>8,} {r['parse_validate']:>15,} {r['insert']:>9,} "
+              f"{r['end_to_end']:>11,}{flag}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
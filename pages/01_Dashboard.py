@@ -1,8 +1,5 @@
 """01_Dashboard.py — BGAI KPI Dashboard"""
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from backend import database, crud
 
@@ -11,6 +8,10 @@ if not st.session_state.get("authentication_status"):
     st.warning("🔒 Please login from the main page.")
     st.stop()
 
+# pandas / plotly load on first use, after the guard, to keep cold starts short
+import pandas as pd
+import plotly.express as px
+
 st.title("📊 Dashboard")
 st.caption("Real-time overview of your analytics activity and system health.")
 
@@ -18,8 +19,8 @@ user_id = st.session_state["user"]["id"]
 db = database.SessionLocal()
 try:
     stats        = crud.get_user_stats(db, user_id)
-    predictions  = crud.get_predictions(db, user_id)
-    business_data = crud.get_business_data(db, user_id)
+    predictions  = crud.get_prediction_summaries(db, user_id, limit=5)
+    business_data = crud.get_business_data_rows(db, user_id)
 finally:
     db.close()
 
@@ -55,7 +56,7 @@ if business_data:
             "data_type": r.data_type,
             "timestamp": r.timestamp,
             "id": r.id,
-            "value": r.data.get("value", 0) if isinstance(r.data, dict) else 0,
+            "value": r.value or 0,
         }
         for r in business_data
     ])
@@ -109,7 +110,7 @@ with col_p:
     st.markdown("#### 🤖 Recent Predictions")
     if predictions:
         pred_rows = []
-        for p in predictions[:5]:
+        for p in predictions:
             badge_color = "#34d399" if p.status == "completed" else "#f87171"
             pred_rows.append({
                 "Name":       p.name or "—",
@@ -132,8 +133,8 @@ with col_d:
         data_rows = [
             {
                 "Type":      r.data_type,
-                "Value ($)": r.data.get("value", "—") if isinstance(r.data, dict) else "—",
-                "Region":    r.data.get("region", "—") if isinstance(r.data, dict) else "—",
+                "Value ($)": r.value if r.value is not None else "—",
+                "Region":    r.region or "—",
                 "Date":      r.timestamp.strftime("%b %d, %Y"),
             }
             for r in business_data[:5]
@@ -1,10 +1,6 @@
 """02_Analytics.py — BGAI Advanced Analytics"""
 import io
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.figure_factory as ff
-import numpy as np
 from backend import database, crud
 
 # ── Auth Guard ──────────────────────────────────────────────────────────────
@@ -18,36 +14,26 @@ st.caption("Multi-dimensional visualization of your business data.")
 user_id = st.session_state["user"]["id"]
 db = database.SessionLocal()
 try:
-    raw_data = crud.get_business_data(db, user_id)
+    facets = crud.get_business_data_facets(db, user_id)
 finally:
     db.close()
 
-if not raw_data:
+if not facets["data_types"]:
     st.info("💡 No data yet. Go to **Integrations → Generate Demo Data** to populate the system.")
     st.stop()
 
-# ── Build DataFrame ──────────────────────────────────────────────────────────
-rows = []
-for item in raw_data:
-    d = item.data if isinstance(item.data, dict) else {}
-    rows.append({
-        "id":        item.id,
-        "data_type": item.data_type,
-        "timestamp": pd.to_datetime(item.timestamp),
-        "region":    d.get("region", "Unknown"),
-        "value":     float(d.get("value", 0)),
-        "date":      d.get("date", ""),
-    })
-df = pd.DataFrame(rows)
+# pandas / plotly load on first use, once there is data to chart
+import pandas as pd
+import plotly.express as px
 
 # ── Sidebar Filters ──────────────────────────────────────────────────────────
 with st.sidebar:
     st.markdown("### 🔍 Filters")
-    types_avail = ["All"] + sorted(df["data_type"].unique().tolist())
+    types_avail = ["All"] + facets["data_types"]
     sel_type    = st.selectbox("Data Type", types_avail)
 
-    min_date = df["timestamp"].min().date()
-    max_date = df["timestamp"].max().date()
+    min_date = facets["first_timestamp"].date()
+    max_date = facets["last_timestamp"].date()
     date_range = st.date_input(
         "Date Range",
         value=(min_date, max_date),
@@ -55,15 +41,34 @@ with st.sidebar:
         max_value=max_date,
     )
 
-# Apply filters
-df_f = df.copy()
-if sel_type != "All":
-    df_f = df_f[df_f["data_type"] == sel_type]
+# Filters are applied in SQL against the typed columns
+filters = {"data_type": None if sel_type == "All" else sel_type}
 if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
-    df_f = df_f[
-        (df_f["timestamp"].dt.date >= date_range[0]) &
-        (df_f["timestamp"].dt.date <= date_range[1])
-    ]
+    filters["start"], filters["end"] = date_range
+
+db = database.SessionLocal()
+try:
+    filtered_rows  = crud.get_business_data_rows(db, user_id, **filters)
+    region_summary = crud.get_business_data_summary(db, user_id, group_by="region", **filters)
+    type_summary   = crud.get_business_data_summary(db, user_id, group_by="data_type", **filters)
+finally:
+    db.close()
+
+# ── Build DataFrame ──────────────────────────────────────────────────────────
+df_f = pd.DataFrame(
+    [
+        {
+            "id":        r.id,
+            "data_type": r.data_type,
+            "timestamp": pd.to_datetime(r.timestamp),
+            "region":    r.region or "Unknown",
+            "value":     r.value or 0.0,
+            "date":      r.event_date.isoformat() if r.event_date else "",
+        }
+        for r in filtered_rows
+    ],
+    columns=["id", "data_type", "timestamp", "region", "value", "date"],
+)
 
 st.markdown(f"**{len(df_f)} records** matching current filters.")
 
@@ -108,8 +113,10 @@ col3, col4 = st.columns(2)
 
 with col3:
     st.markdown("#### 🌍 Revenue by Region")
-    if "region" in df_f.columns and df_f["value"].sum() > 0:
-        reg_df = df_f.groupby("region")["value"].sum().reset_index()
+    if sum(r["total"] for r in region_summary) > 0:
+        reg_df = pd.DataFrame(
+            [{"region": r["key"], "value": r["total"]} for r in region_summary]
+        )
         fig3 = px.bar(
             reg_df, x="region", y="value", color="region",
             color_discrete_sequence=COLORS,
@@ -137,10 +144,10 @@ st.divider()
 
 # ── Summary Statistics ────────────────────────────────────────────────────────
 st.markdown("#### 📋 Summary Statistics")
-stats_df = df_f.groupby("data_type")["value"].agg(
-    Count="count", Total="sum", Mean="mean", Max="max", Min="min"
-).round(2).reset_index()
-stats_df.columns = ["Type", "Count", "Total ($)", "Mean ($)", "Max ($)", "Min ($)"]
+stats_df = pd.DataFrame(
+    [[s["key"], s["count"], s["total"], s["mean"], s["max"], s["min"]] for s in type_summary],
+    columns=["Type", "Count", "Total ($)", "Mean ($)", "Max ($)", "Min ($)"],
+).round(2)
 st.dataframe(stats_df, use_container_width=True, hide_index=True)
 
 st.divider()
@@ -149,14 +156,18 @@ st.divider()
 with st.expander("🔬 Record Deep Dive"):
     selected_id = st.selectbox("Select Record ID", df_f["id"].tolist())
     if selected_id:
-        rec_raw = next((r for r in raw_data if r.id == selected_id), None)
+        db = database.SessionLocal()
+        try:
+            rec_raw = crud.get_business_data_record(db, int(selected_id), user_id)
+        finally:
+            db.close()
         if rec_raw:
             col_l, col_r = st.columns(2)
             with col_l:
                 st.write(f"**Type:** {rec_raw.data_type}")
                 st.write(f"**Timestamp:** {rec_raw.timestamp.strftime('%Y-%m-%d %H:%M')}")
             with col_r:
-                st.write(f"**Region:** {rec_raw.data.get('region','—') if isinstance(rec_raw.data, dict) else '—'}")
-                st.write(f"**Value:** ${rec_raw.data.get('value',0):,.2f}" if isinstance(rec_raw.data, dict) else "**Value:** —")
+                st.write(f"**Region:** {rec_raw.region or '—'}")
+                st.write(f"**Value:** ${rec_raw.value:,.2f}" if rec_raw.value is not None else "**Value:** —")
             st.markdown("**Raw JSON:**")
             st.json(rec_raw.data)
@@ -2,16 +2,16 @@
 import io
 import json
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from backend import database, crud, ml_engine, schemas
+from backend import database, crud, ml_cache, ml_engine, model_registry, schemas
 
 # ── Auth Guard ──────────────────────────────────────────────────────────────
 if not st.session_state.get("authentication_status"):
     st.warning("🔒 Please login from the main page.")
     st.stop()
 
+# pandas loads after the guard; plotly only where a chart is drawn
+import pandas as pd
+
 st.title("🤖 Predictions")
 st.caption("Train ML models on your business data and generate future forecasts.")
 
@@ -75,6 +75,21 @@ with tab1:
         label_visibility="collapsed",
     )
 
+    with st.expander("🔁 Autoregressive lag features"):
+        use_lags = st.checkbox(
+            "Forecast from recent values instead of the row index",
+            help="Each value is predicted from the previous values, their rolling mean and an "
+                 "optional seasonal period; the forecast is built step by step.",
+        )
+        lag_cols = st.columns(3)
+        n_lags = lag_cols[0].number_input("Lags", 1, ml_engine.MAX_LAG, ml_engine.LAG_DEFAULTS["lags"])
+        window = lag_cols[1].number_input("Rolling mean window (0 = off)", 0, ml_engine.MAX_LAG,
+                                          ml_engine.LAG_DEFAULTS["window"])
+        season = lag_cols[2].number_input("Season length (0 = off)", 0, ml_engine.MAX_LAG,
+                                          ml_engine.LAG_DEFAULTS["season"])
+    if use_lags:
+        model_type = f"{model_type} (lags={n_lags}, window={window}, season={season})"
+
     st.divider()
     st.markdown("#### 2. Name & Input Data")
 
@@ -91,7 +106,8 @@ with tab1:
         if file:
             csv_df = pd.read_csv(file)
             st.write("Preview:", csv_df.head(5))
-            input_data = {"values": csv_df.to_dict(orient="records")}
+            # Columnar payload: one list per column, no per-row dicts
+            input_data = {"columns": csv_df.to_dict(orient="list")}
 
     elif input_method == "Manual JSON":
         json_str = st.text_area(
@@ -120,6 +136,11 @@ with tab1:
         st.info("Using 8-month demo sales dataset.")
 
     st.divider()
+    deadline_s = st.number_input(
+        "⏱️ Time budget (seconds)", min_value=1, max_value=3600,
+        value=int(ml_engine.DEADLINE_SECONDS or 60),
+        help="Past this the engine trims the ensemble, skips cross-validation or falls back to Linear Regression.",
+    )
     run_btn = st.button("▶ Run Prediction Engine", use_container_width=True)
 
     if run_btn:
@@ -127,12 +148,14 @@ with tab1:
             st.warning("Please provide input data first.")
         else:
             with st.spinner("Training model and generating forecast…"):
-                result = ml_engine.train_and_predict(model_type, input_data)
+                result, bundle = ml_cache.train_model(model_type, input_data, deadline_s)
 
             if "error" in result:
                 st.error(f"ML Error: {result['error']}")
             else:
                 st.success("✅ Prediction complete!")
+                if result.get("degraded"):
+                    st.warning(f"⚠️ Degraded result: {result['degraded_reason']}")
 
                 # ── Metric Badges ──────────────────────────────────────────
                 st.markdown("#### 📊 Model Performance")
@@ -143,13 +166,26 @@ with tab1:
                 m3.metric("RMSE",       f"{metrics.get('rmse', 0):.2f}")
                 m4.metric("Confidence", f"{result.get('confidence', 0)*100:.1f}%")
 
+                config = result.get("engine_config")
                 if metrics.get("cv_r2_mean") is not None:
-                    st.info(f"5-Fold Cross-Validation R² Mean: **{metrics['cv_r2_mean']:.4f}**")
+                    # The score's origin depends on the engine's validation scheme
+                    cv_title = ml_engine.cv_score_label((config or {}).get("cv_method"))
+                    st.info(f"{cv_title}: **{metrics['cv_r2_mean']:.4f}**")
+
+                if config:
+                    params = ", ".join(f"{k}={v}" for k, v in config["params"].items())
+                    cv_labels = {"oob": "out-of-bag", "folds": "fold ensemble", "sampled": "CV"}
+                    cv_note = (
+                        f" · {cv_labels.get(config.get('cv_method'), 'CV')} on {config['cv_rows']:,} rows"
+                        if config.get("cv_rows") else ""
+                    )
+                    st.caption(f"⚙️ {config['estimator']}({params}) · {config['profile']} profile{cv_note}")
 
                 # ── Forecast Chart with Confidence Interval ─────────────────
                 st.markdown("#### 🔮 5-Step Forecast with Confidence Intervals")
                 forecast = result.get("forecast", [])
                 if forecast:
+                    import plotly.graph_objects as go
                     df_fc = pd.DataFrame(forecast)
 
                     fig = go.Figure()
@@ -191,6 +227,8 @@ with tab1:
                     st.session_state["user"]["id"],
                 )
                 db.close()
+                if bundle is not None:
+                    model_registry.save(db_pred.id, bundle)
                 st.toast(f"💾 Saved as '{pred_name}'")
 
 
@@ -198,23 +236,28 @@ with tab1:
 with tab2:
     st.markdown("#### Prediction History")
 
-    db = database.SessionLocal()
     user_id = st.session_state["user"]["id"]
-    history = crud.get_predictions(db, user_id)
+    status_filter = st.selectbox(
+        "Filter by status", ["all", "completed", "failed", "pending"]
+    )
+
+    # Summary rows only — the stored input/output payloads are never loaded
+    db = database.SessionLocal()
+    history = crud.get_prediction_summaries(
+        db, user_id,
+        status=None if status_filter == "all" else status_filter,
+        include_forecast=True,
+    )
     db.close()
 
-    if not history:
+    if not history and status_filter != "all":
+        st.info(f"No {status_filter} predictions. Pick another status filter to see the rest.")
+    elif not history:
         st.info("No predictions yet. Run one from the New Prediction tab.")
     else:
-        # Filter bar
-        status_filter = st.selectbox(
-            "Filter by status", ["all", "completed", "failed", "pending"]
-        )
-        if status_filter != "all":
-            history = [p for p in history if p.status == status_filter]
 
         for item in history:
-            badge     = "🟢" if item.status == "completed" else "🔴"
+            badge     = {"completed": "🟢", "pending": "🟡"}.get(item.status, "🔴")
             conf_str  = f"{item.confidence*100:.1f}%" if item.confidence else "—"
             r2_str    = f"{item.accuracy_score:.4f}" if item.accuracy_score else "—"
             with st.expander(f"{badge} {item.name or 'Unnamed'} — {item.model_type} — {item.created_at.strftime('%b %d, %Y')}"):
@@ -223,8 +266,9 @@ with tab2:
                 c2.metric("Confidence", conf_str)
                 c3.metric("R²",         r2_str)
 
-                if item.output_data and "forecast" in item.output_data:
-                    df_h = pd.DataFrame(item.output_data["forecast"])
+                if item.forecast:
+                    import plotly.express as px
+                    df_h = pd.DataFrame(item.forecast)
                     fig_h = px.line(
                         df_h, x="step", y="value",
                         color_discrete_sequence=["#818cf8"],
@@ -235,7 +279,8 @@ with tab2:
                 del_btn = st.button(f"🗑 Delete", key=f"del_{item.id}")
                 if del_btn:
                     db = database.SessionLocal()
-                    crud.delete_prediction(db, item.id, user_id)
+                    if crud.delete_prediction(db, item.id, user_id):
+                        model_registry.delete(item.id)
                     db.close()
                     st.success("Deleted.")
                     st.rerun()
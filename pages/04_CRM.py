@@ -2,7 +2,6 @@
 import io
 import json
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 from backend import database, crud, schemas
 
@@ -11,13 +10,17 @@ if not st.session_state.get("authentication_status"):
     st.warning("🔒 Please login from the main page.")
     st.stop()
 
+# pandas loads on first use, after the guard, to keep cold starts short
+import pandas as pd
+
 st.title("📂 CRM — Business Data Manager")
 st.caption("Add, view, filter, edit and export your structured business records.")
 
 user_id = st.session_state["user"]["id"]
 db = database.SessionLocal()
 try:
-    all_data = crud.get_business_data(db, user_id)
+    type_summary = crud.get_business_data_summary(db, user_id, group_by="data_type")
+    facets       = crud.get_business_data_facets(db, user_id)
 finally:
     db.close()
 
@@ -25,38 +28,37 @@ tab1, tab2 = st.tabs(["📋  View & Manage", "➕  Add Record"])
 
 # ───────────────────────────────────────── TAB 1
 with tab1:
-    if not all_data:
+    if not type_summary:
         st.info("💡 No records yet. Switch to 'Add Record' or use Integrations → Generate Demo Data.")
     else:
         # Summary cards
-        total_value = sum(
-            float(r.data.get("value", 0)) for r in all_data if isinstance(r.data, dict)
-        )
+        total_value = sum(s["total"] for s in type_summary)
         k1, k2, k3 = st.columns(3)
-        k1.metric("Total Records", len(all_data))
+        k1.metric("Total Records", sum(s["count"] for s in type_summary))
         k2.metric("Total Value ($)", f"${total_value:,.0f}")
-        k3.metric("Types", len(set(r.data_type for r in all_data)))
+        k3.metric("Types", len(type_summary))
 
         st.divider()
 
         # Filter bar
         col_f1, col_f2, col_f3 = st.columns([2, 2, 1])
         with col_f1:
-            type_opts = ["All"] + sorted(set(r.data_type for r in all_data))
+            type_opts = ["All"] + facets["data_types"]
             sel_type  = st.selectbox("Filter Type", type_opts, key="crm_type_filter")
         with col_f2:
-            region_opts = ["All"] + sorted(set(
-                r.data.get("region", "Unknown")
-                for r in all_data if isinstance(r.data, dict)
-            ))
+            region_opts = ["All"] + facets["regions"]
             sel_region = st.selectbox("Filter Region", region_opts, key="crm_region_filter")
 
-        # Apply filter
-        filtered = all_data
-        if sel_type != "All":
-            filtered = [r for r in filtered if r.data_type == sel_type]
-        if sel_region != "All":
-            filtered = [r for r in filtered if isinstance(r.data, dict) and r.data.get("region") == sel_region]
+        # Apply filter (in SQL, on the indexed columns)
+        db = database.SessionLocal()
+        try:
+            filtered = crud.get_business_data_filtered(
+                db, user_id,
+                data_type=None if sel_type == "All" else sel_type,
+                region=None if sel_region == "All" else sel_region,
+            )
+        finally:
+            db.close()
 
         # Build display DataFrame
         rows = []
@@ -65,8 +67,8 @@ with tab1:
             rows.append({
                 "ID":        item.id,
                 "Type":      item.data_type,
-                "Region":    d.get("region", "—"),
-                "Value ($)": float(d.get("value", 0)),
+                "Region":    item.region or "—",
+                "Value ($)": item.value or 0.0,
                 "Date":      d.get("date", "—"),
                 "Notes":     d.get("notes", "—"),
                 "Added":     item.timestamp.strftime("%b %d, %Y"),
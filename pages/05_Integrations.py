@@ -131,19 +131,23 @@ with col_q1:
 
 with col_q2:
     if st.button("🚀 Generate 5 Demo Predictions", use_container_width=True):
-        from backend import ml_engine
+        from backend import ml_cache, model_registry
         try:
             db5 = database.SessionLocal()
             models_list = ["Linear Regression", "Polynomial Regression", "Random Forest", "Gradient Boosting", "Linear Regression"]
             demo_data   = {"values": [{"month": i, "sales": 1000 + i * 150 + random.randint(-100, 100)} for i in range(1, 9)]}
+            # One shared split; the distinct model types are fitted together
+            trained = ml_cache.train_models(models_list, demo_data)
             count = 0
             for model in models_list:
-                result = ml_engine.train_and_predict(model, demo_data)
-                crud.create_prediction(
+                result, bundle = trained[model]
+                db_pred = crud.create_prediction(
                     db5,
                     schemas.PredictionCreate(name=f"Demo — {model}", model_type=model, input_data=demo_data),
                     result, user_id,
                 )
+                if bundle is not None:
+                    model_registry.save(db_pred.id, bundle)
                 count += 1
             db5.close()
             st.success(f"✅ Generated {count} demo predictions! Check Predictions → History.")
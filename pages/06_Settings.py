@@ -104,7 +104,7 @@ with tab3:
     st.markdown("#### Export My Data")
     db = database.SessionLocal()
     all_data    = crud.get_business_data(db, user_id)
-    all_preds   = crud.get_predictions(db, user_id)
+    all_preds   = crud.get_prediction_summaries(db, user_id)
     db.close()
 
     export_obj = {
@@ -0,0 +1,125 @@
+"""
+conftest.py — Shared pytest fixtures for the BGAI backend
+=========================================================
+Points the backend at a throw-away SQLite database and model directory
+before anything from ``backend`` is imported, and provides fresh
+per-test databases with the full schema applied.
+
+Set ``BGAI_TEST_POSTGRES_URL`` (``postgresql+psycopg://…``, an empty
+scratch database) to also run the PostgreSQL-specific tests.
+
+Author: Ujjwal Tiwari
+Version: 3.0.0
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TMP_DIR = tempfile.mkdtemp(prefix="bgai-tests-")
+
+# Must be set before backend.database builds its engine
+os.environ["BGAI_DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'site.db')}"
+os.environ.pop("BGAI_ASYNC_DATABASE_URL", None)
+os.environ["BGAI_MODEL_DIR"] = os.path.join(_TMP_DIR, "models")
+os.environ.pop("BGAI_ML_CACHE_DIR", None)
+os.environ.setdefault("BGAI_SECRET_KEY", "bgai-test-secret-key-not-for-production")
+
+sys.path.insert(0, ROOT_DIR)
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend import database, migrations, models
+
+POSTGRES_URL = os.getenv("BGAI_TEST_POSTGRES_URL", "").strip() or None
+
+
+def make_engine(url: str):
+    """An engine configured like ``database.engine`` for *url*."""
+    engine = create_engine(url, **database._engine_kwargs(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", database._apply_sqlite_pragmas)
+    return engine
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'bgai.db'}"
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def engine(request, sqlite_url):
+    """A migrated, empty database on each backend (PostgreSQL only when configured)."""
+    if request.param == "postgresql":
+        if POSTGRES_URL is None:
+            pytest.skip("BGAI_TEST_POSTGRES_URL is not set")
+        engine = make_engine(POSTGRES_URL)
+        models.Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            migrations.schema_migrations.drop(conn, checkfirst=True)
+    else:
+        engine = make_engine(sqlite_url)
+    migrations.init_db(engine)
+    yield engine
+    if request.param == "postgresql":
+        models.Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    row = models.User(email="owner@example.com", name="Owner", password="x", company="")
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+@pytest.fixture(scope="session")
+def app_engine():
+    """The process-wide ``database.engine`` (the throw-away SQLite file), migrated."""
+    migrations.init_db(database.engine)
+    return database.engine
+
+
+@pytest.fixture
+def app_db(app_engine):
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def app_user(app_db, request):
+    """A fresh user in the process-wide database, unique per test."""
+    row = models.User(email=f"{request.node.name}@example.com", name="Owner", password="x", company="")
+    app_db.add(row)
+    app_db.commit()
+    app_db.refresh(row)
+    return row
+
+
+@pytest.fixture
+def client(app_user):
+    """A ``TestClient`` for the API, authenticated as *app_user*."""
+    from fastapi.testclient import TestClient
+
+    from backend import auth, main
+
+    token = auth.create_access_token({"sub": app_user.email})
+    with TestClient(main.app, headers={"Authorization": f"Bearer {token}"}) as test_client:
+        yield test_client
@@ -0,0 +1,14 @@
+"""Registration and login through the async routes."""
+
+import uuid
+
+
+def test_registered_user_can_log_in(client):
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/register", json={"email": email, "name": "New", "password": "s3cret"})
+
+    assert response.status_code == 200
+    assert client.post("/register", json={"email": email, "name": "New", "password": "x"}).status_code == 400
+    login = client.post("/token", data={"username": email, "password": "s3cret"})
+    assert login.status_code == 200 and login.json()["user_id"] == response.json()["id"]
+    assert client.post("/token", data={"username": email, "password": "wrong"}).status_code == 401
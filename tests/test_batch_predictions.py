@@ -0,0 +1,88 @@
+"""Batch predictions: ranking, the model-count bound and the shared split."""
+
+import pytest
+
+from backend import ml_cache, ml_engine, model_registry, schemas
+
+SALES = [10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35, 36, 40, 41, 45]
+INPUT = {"values": [{"sales": float(v)} for v in SALES]}
+
+
+def _result(r2, rmse=1.0, cv=None, degraded=False):
+    result = {"metrics": {"r2_score": r2, "cv_r2_mean": cv, "rmse": rmse, "mae": rmse}, "confidence": 0.9}
+    if degraded:
+        result.update(degraded=True, degraded_reason="time budget")
+    return result
+
+
+def test_ranking_orders_complete_then_degraded_then_failed():
+    ranking = ml_engine.rank_results({
+        "Failed":    {"error": "Need at least 4 rows"},
+        "Degraded":  _result(0.99, degraded=True),
+        "Weak":      _result(0.50),
+        "Strong":    _result(0.90, rmse=2.0),
+        "Tied":      _result(0.90, rmse=2.0, cv=0.95),
+        "Tied, low": _result(0.90, rmse=1.0, cv=0.10),
+    })
+
+    assert [r["model_type"] for r in ranking] == ["Tied", "Strong", "Tied, low", "Weak", "Degraded", "Failed"]
+    assert [r["rank"] for r in ranking] == [1, 2, 3, 4, 5, None]
+    assert ranking[4]["degraded"] is True
+    assert ranking[5] == {"rank": None, "model_type": "Failed", "error": "Need at least 4 rows"}
+
+
+def test_ranking_of_only_failures_has_no_winner():
+    ranking = ml_engine.rank_results({"A": {"error": "x"}, "B": {"error": "y"}})
+    assert [r["rank"] for r in ranking] == [None, None]
+
+
+def test_train_models_splits_the_data_once(monkeypatch):
+    calls = []
+    split = ml_engine._split_dataset
+    monkeypatch.setattr(ml_engine, "_split_dataset", lambda data: calls.append(1) or split(data))
+
+    fitted = ml_engine.train_models(
+        ["Random Forest", "Linear Regression", "Gradient Boosting", "Random Forest"], INPUT, deadline_s=0,
+    )
+
+    assert list(fitted) == ["Random Forest", "Linear Regression", "Gradient Boosting"]
+    assert len(calls) == 1
+    rf, gb = fitted["Random Forest"][0], fitted["Gradient Boosting"][0]
+    assert rf["training_samples"] == gb["training_samples"] and rf["test_samples"] == gb["test_samples"]
+
+
+def test_train_models_reports_an_unusable_dataset_per_model():
+    fitted = ml_engine.train_models(["Random Forest", "Gradient Boosting"], {"values": []})
+    assert all("error" in result and bundle is None for result, bundle in fitted.values())
+
+
+@pytest.mark.parametrize("model_types", [[], ["Linear Regression"] * 9])
+def test_batch_endpoint_rejects_fewer_than_one_or_more_than_eight_models(client, model_types):
+    response = client.post("/predictions/batch", json={"model_types": model_types, "input_data": INPUT})
+    assert response.status_code == 422
+    assert "between 1 and 8" in response.text
+
+
+@pytest.mark.parametrize("n", [1, 8])
+def test_batch_schema_accepts_the_bounds(n):
+    assert len(schemas.PredictionBatchCreate(model_types=["Linear Regression"] * n, input_data=INPUT).model_types) == n
+
+
+def test_batch_endpoint_ranks_and_caches_each_model(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(ml_cache, "result_cache", ml_cache.ResultCache())
+    monkeypatch.setattr(model_registry, "MODEL_DIR", str(tmp_path))
+    request = {
+        "name": "Compare", "input_data": INPUT, "deadline_seconds": 60,
+        "model_types": ["Random Forest", "Linear Regression", "Random Forest"],
+    }
+
+    body = client.post("/predictions/batch", json=request).json()
+
+    assert [p["model_type"] for p in body["predictions"]] == ["Random Forest", "Linear Regression"]
+    assert all(p["status"] == "completed" for p in body["predictions"])
+    assert sorted(r["rank"] for r in body["ranking"]) == [1, 2]
+    assert body["best_model"] == body["ranking"][0]["model_type"]
+
+    again = client.post("/predictions/batch", json=request).json()
+    assert ml_cache.stats()["hits"] == 2
+    assert again["ranking"] == body["ranking"]
@@ -0,0 +1,63 @@
+"""Business data reads: JSON payload filters."""
+
+import pytest
+
+from backend import crud, schemas
+
+PAYLOADS = [
+    {"region": "North", "units": 3},
+    {"region": "South", "units": "3"},
+    {"region": None, "units": 1},
+    {"units": True},
+    {"region": "North", "tags": ["a"]},
+]
+
+
+@pytest.fixture
+def rows(db, user):
+    records = [schemas.BusinessDataCreate(data_type="Sales", data=data) for data in PAYLOADS]
+    crud.bulk_create_business_data(db, records, user.id)
+    return records
+
+
+def _matches(db, user, key, value):
+    items, _ = crud.get_business_data_page(db, user.id, data_filters={key: value})
+    return sorted(PAYLOADS.index(item.data) for item in items)
+
+
+@pytest.mark.parametrize("key, value, expected", [
+    ("region", "North", [0, 4]),
+    ("units", 3, [0]),
+    ("units", "3", [1]),
+    ("units", 1, [2]),
+    ("units", True, [3]),
+    ("region", None, [2]),
+    ("region", "West", []),
+])
+def test_payload_filter_matches_on_json_type(db, user, rows, key, value, expected):
+    assert _matches(db, user, key, value) == expected
+
+
+@pytest.mark.parametrize("value", [{"a": 1}, ["a"]])
+def test_payload_filter_rejects_non_scalar_values(db, user, rows, value):
+    with pytest.raises(ValueError, match="must be a string, number, boolean or null"):
+        crud.get_business_data_page(db, user.id, data_filters={"tags": value})
+
+
+def test_payload_filter_rejects_unsafe_keys(db, user, rows):
+    with pytest.raises(ValueError, match="letters, digits and underscores"):
+        crud.get_business_data_page(db, user.id, data_filters={'region"': "North"})
+
+
+def test_api_rejects_non_scalar_filter_value(client):
+    response = client.get("/business-data", params={"data_key": "region", "data_value": '{"a":1}'})
+    assert response.status_code == 400
+    assert "string, number, boolean or null" in response.json()["detail"]
+
+
+def test_api_filters_on_null(client, app_db, app_user):
+    records = [schemas.BusinessDataCreate(data_type="Sales", data=data) for data in PAYLOADS]
+    crud.bulk_create_business_data(app_db, records, app_user.id)
+    response = client.get("/business-data", params={"data_key": "region", "data_value": "null"})
+    assert response.status_code == 200
+    assert [item["data"] for item in response.json()["items"]] == [PAYLOADS[2]]
@@ -0,0 +1,93 @@
+"""CPU budget: grants, FIFO hand-out, wait statistics and OpenMP limits."""
+
+import threading
+import time
+
+import pytest
+
+from backend import compute
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_grant_is_capped_per_fit_and_by_fair_share():
+    budget = compute.ComputeBudget(total=8, max_per_fit=3)
+    with budget.allocate(8) as first:
+        assert first == 3
+        with budget.allocate() as second:
+            # 5 threads free, but two fits running: fair share is 8 // 2 = 4
+            assert second == 3
+            assert budget.stats()["threads_in_use"] == 6
+    assert budget.stats()["threads_in_use"] == 0
+
+
+def test_fair_share_shrinks_with_running_fits():
+    budget = compute.ComputeBudget(total=6, max_per_fit=6)
+    with budget.allocate(1), budget.allocate(1):
+        with budget.allocate(6) as third:
+            assert third == 2   # 6 // 3
+
+
+def test_waiting_fits_are_served_in_arrival_order():
+    budget = compute.ComputeBudget(total=1)
+    order = []
+
+    def fit(name):
+        with budget.allocate(1):
+            order.append(name)
+
+    with budget.allocate(1):
+        threads = []
+        for i, name in enumerate(["b", "c", "d"]):
+            threads.append(threading.Thread(target=fit, args=(name,)))
+            threads[-1].start()
+            _wait_until(lambda: budget.stats()["waiting_fits"] == i + 1)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["b", "c", "d"]
+    stats = budget.stats()
+    assert stats["grants"] == 4 and stats["waited"] == 3
+    assert stats["max_wait_s"] >= 0.02 and stats["p95_wait_s"] >= stats["p50_wait_s"] > 0
+    assert stats["running_fits"] == stats["waiting_fits"] == 0
+
+
+def test_resize_keeps_running_grants():
+    budget = compute.ComputeBudget(total=4, max_per_fit=4)
+    with budget.allocate() as granted:
+        budget.resize(2, 1)
+        assert granted == 4
+        assert budget.stats()["total_threads"] == 2 and budget.stats()["max_per_fit"] == 1
+    with budget.allocate(4) as granted:
+        assert granted == 1
+
+
+def test_openmp_threads_are_set_per_thread():
+    import sklearn.ensemble  # noqa: F401  (loads the OpenMP runtime)
+
+    libs = compute._openmp_controllers()
+    if not libs:
+        pytest.skip("no OpenMP runtime loaded")
+    outside = libs[0].get_num_threads()
+    seen, barrier = {}, threading.Barrier(3)
+
+    def fit(n):
+        with compute.openmp_threads(n):
+            barrier.wait()   # all three limits are set at the same time
+            seen[n] = libs[0].get_num_threads()
+            barrier.wait()
+
+    threads = [threading.Thread(target=fit, args=(n,)) for n in (2, 3, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {n: seen[n] for n in (2, 3, 5)} == {2: 2, 3: 3, 5: 5}
+    assert libs[0].get_num_threads() == outside
@@ -0,0 +1,90 @@
+"""Training time budget: the deadline clock, cut-short ensembles and the fallback."""
+
+import itertools
+
+import pytest
+
+from backend import ml_engine
+
+SALES = [10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35, 36, 40, 41, 45, 44, 48, 50, 53]
+
+
+class Clock:
+    """A monotonic clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _data():
+    return ml_engine._split_dataset({"values": [{"sales": float(v)} for v in SALES]})
+
+
+def test_deadline_counts_down_on_its_clock():
+    clock = Clock()
+    deadline = ml_engine._Deadline(5, clock=clock)
+
+    assert deadline.remaining() == 5 and not deadline.expired()
+    clock.now += 5
+    assert deadline.remaining() == 0 and deadline.expired()
+
+
+@pytest.mark.parametrize("seconds, default", [(0, 60.0), (None, None)])
+def test_zero_or_unset_without_a_default_is_unlimited(monkeypatch, seconds, default):
+    monkeypatch.setattr(ml_engine, "DEADLINE_SECONDS", default)
+    clock = Clock()
+    deadline = ml_engine._Deadline(seconds, clock=clock)
+    clock.now += 1e9
+
+    assert deadline.end is None
+    assert deadline.remaining() == float("inf") and not deadline.expired()
+
+
+def test_unset_uses_the_server_default(monkeypatch):
+    monkeypatch.setattr(ml_engine, "DEADLINE_SECONDS", 30.0)
+    assert ml_engine._Deadline(clock=Clock()).remaining() == 30.0
+
+
+def test_expired_deadline_skips_the_fit():
+    clock = Clock()
+    deadline = ml_engine._Deadline(1, clock=clock)
+    clock.now += 2
+    config = ml_engine.engine_config("Random Forest", len(SALES))
+
+    assert ml_engine._fit_with_budget(config, _data(), deadline, n_threads=1) is None
+
+
+@pytest.mark.parametrize("model_type", ["Random Forest", "Gradient Boosting"])
+def test_expired_deadline_falls_back_to_linear_regression(model_type):
+    clock = Clock()
+    deadline = ml_engine._Deadline(1, clock=clock)
+    clock.now += 2
+
+    result, bundle = ml_engine._fit_and_evaluate(model_type, _data(), deadline)
+
+    assert result["degraded"] is True
+    assert result["requested_model_type"] == model_type
+    assert result["degraded_reason"].endswith("fell back to Linear Regression")
+    assert bundle["model_type"] == "Linear Regression"
+
+
+def test_deadline_passing_mid_fit_keeps_the_partial_ensemble():
+    ticks = itertools.count()   # one second per clock read
+    deadline = ml_engine._Deadline(6, clock=lambda: float(next(ticks)))
+
+    result, _ = ml_engine._fit_and_evaluate("Random Forest", _data(), deadline)
+
+    assert result["degraded"] is True
+    assert "requested_model_type" not in result
+    assert result["degraded_reason"].startswith("Random Forest stopped after")
+
+
+@pytest.mark.parametrize("model_type", ["Random Forest", "Gradient Boosting"])
+def test_unlimited_deadline_fits_the_full_model(model_type):
+    result, bundle = ml_engine._fit_and_evaluate(model_type, _data(), ml_engine._Deadline(0, clock=Clock()))
+
+    assert "degraded" not in result
+    assert bundle["model_type"] == model_type
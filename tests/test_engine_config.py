@@ -0,0 +1,100 @@
+"""Engine configuration: resolved settings per profile and how the CV score is labelled."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backend import ml_engine
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("model_type, estimator, params, cv_method", [
+    ("Linear Regression", "LinearRegression", {}, None),
+    ("Polynomial Regression", "Ridge", {"degree": 2, "alpha": 1.0}, None),
+    ("Random Forest", "RandomForestRegressor", {"n_estimators": 200, "max_depth": 6, "oob_score": True}, "oob"),
+    ("Gradient Boosting", "GradientBoostingRegressor",
+     {"n_estimators": 150, "learning_rate": 0.1, "max_depth": 4}, "folds"),
+])
+def test_standard_profile(model_type, estimator, params, cv_method):
+    config = ml_engine.engine_config(model_type, 1000)
+
+    assert config == {
+        "profile": "standard", "estimator": estimator, "params": params,
+        "cv_method": cv_method, "cv_rows": 800 if cv_method else None,
+    }
+
+
+def test_tiny_datasets_skip_validation():
+    config = ml_engine.engine_config("Random Forest", 4)
+    assert config["params"]["oob_score"] is False
+    assert (config["cv_method"], config["cv_rows"]) == (None, None)
+    assert ml_engine.engine_config("Gradient Boosting", 4)["cv_method"] is None
+
+
+def test_profile_switches_above_large_dataset_rows(monkeypatch):
+    monkeypatch.setattr(ml_engine, "LARGE_DATASET_ROWS", 500)
+    assert ml_engine.engine_config("Gradient Boosting", 500)["profile"] == "standard"
+    assert ml_engine.engine_config("Gradient Boosting", 501)["profile"] == "large"
+    assert ml_engine.engine_config("Linear Regression", 501)["profile"] == "large"
+
+
+@pytest.mark.parametrize("fit_target, rf_trees, hgb_iters", [(10.0, 200, 150), (0.33, 25, 55)])
+def test_large_profile_scales_to_the_fit_target(monkeypatch, fit_target, rf_trees, hgb_iters):
+    monkeypatch.setattr(ml_engine, "LARGE_DATASET_ROWS", 10_000)
+    monkeypatch.setattr(ml_engine, "FIT_TARGET_SECONDS", fit_target)
+
+    rf = ml_engine.engine_config("Random Forest", 50_000)
+    hgb = ml_engine.engine_config("Gradient Boosting", 50_000)
+
+    assert rf == {
+        "profile": "large", "estimator": "RandomForestRegressor",
+        "params": {"n_estimators": rf_trees, "max_depth": 6, "oob_score": True,
+                   "max_samples": ml_engine.RF_MAX_SAMPLES},
+        "cv_method": "oob", "cv_rows": 40_000,
+    }
+    assert hgb == {
+        "profile": "large", "estimator": "HistGradientBoostingRegressor",
+        "params": {"max_iter": hgb_iters, "learning_rate": 0.1, "max_depth": 4, "early_stopping": False},
+        "cv_method": "sampled", "cv_rows": ml_engine.CV_MAX_ROWS,
+    }
+
+
+def test_profile_thresholds_are_read_from_the_environment():
+    script = (
+        "import json; from backend import ml_engine as m; "
+        "print(json.dumps([m.engine_config('Gradient Boosting', n) for n in (100, 50_000)]))"
+    )
+    env = dict(os.environ, BGAI_LARGE_DATASET_ROWS="100", BGAI_FIT_TARGET_SECONDS="0.001")
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    standard, large = json.loads(out.splitlines()[-1])
+
+    assert standard["estimator"] == "GradientBoostingRegressor"
+    assert large["estimator"] == "HistGradientBoostingRegressor"
+    assert large["params"]["max_iter"] == 30   # the floor: 0.001 s buys under one iteration
+
+
+@pytest.mark.parametrize("model_type, large_rows, cv_method, label", [
+    ("Random Forest", 10_000, "oob", "Out-of-Bag R²"),
+    ("Gradient Boosting", 10_000, "folds", "5-Fold Ensemble Cross-Validation R² Mean"),
+    ("Gradient Boosting", 10, "sampled", "5-Fold Cross-Validation R² Mean (row sample)"),
+])
+def test_reported_cv_score_is_labelled_by_its_method(monkeypatch, model_type, large_rows, cv_method, label):
+    monkeypatch.setattr(ml_engine, "LARGE_DATASET_ROWS", large_rows)
+    input_data = {"values": [{"sales": float(10 + 2 * i + i % 3)} for i in range(40)]}
+
+    result, _ = ml_engine.train_model(model_type, input_data, deadline_s=0)
+
+    assert result["engine_config"]["cv_method"] == cv_method
+    assert result["metrics"]["cv_r2_mean"] is not None
+    assert ml_engine.cv_score_label(result["engine_config"]["cv_method"]) == label
+
+
+def test_unvalidated_or_older_results_get_the_generic_label():
+    assert ml_engine.cv_score_label(None) == "Cross-Validation R² Mean"
+    assert ml_engine.cv_score_label("kfold") == "Cross-Validation R² Mean"
@@ -0,0 +1,167 @@
+"""Forecast intervals (normal and bootstrap) and lag-feature forecasting."""
+
+import numpy as np
+import pytest
+
+from backend import ml_engine
+
+
+def _records(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    y = 100 + 0.04 * t ** 2.2 + rng.normal(0, 2, n)
+    return {"values": [{"sales": float(v)} for v in y]}
+
+
+def _contains_point(steps):
+    return all(step["lower"] <= step["value"] <= step["upper"] for step in steps)
+
+
+@pytest.fixture(scope="module")
+def bundles():
+    """One fitted bundle per plain model type (fold ensemble and forest included)."""
+    return {
+        model_type: ml_engine.train_model(model_type, _records(), deadline_s=0)[1]
+        for model_type in ("Linear Regression", "Polynomial Regression", "Random Forest", "Gradient Boosting")
+    }
+
+
+@pytest.mark.parametrize("model_type", ["Linear Regression", "Polynomial Regression", "Random Forest", "Gradient Boosting"])
+@pytest.mark.parametrize("bias", [0.0, 40.0, -40.0])
+def test_bootstrap_interval_contains_the_point_forecast(bundles, model_type, bias):
+    # A biased set of test residuals must widen the interval, not shift it
+    bundle = dict(bundles[model_type])
+    bundle["residuals"] = np.asarray(bundle["residuals"], dtype=float) + bias
+
+    steps = ml_engine.forecast(bundle, steps=10, coverage=0.9, interval="bootstrap")
+
+    assert [step["step"] for step in steps] == list(range(1, 11))
+    assert _contains_point(steps)
+
+
+def test_bootstrap_matches_normal_point_forecast(bundles):
+    bundle = bundles["Polynomial Regression"]
+    normal = ml_engine.forecast(bundle, steps=5, interval="normal")
+    bootstrap = ml_engine.forecast(bundle, steps=5, interval="bootstrap")
+
+    assert [s["value"] for s in normal] == [s["value"] for s in bootstrap]
+    assert _contains_point(normal)
+
+
+def test_wider_coverage_gives_wider_intervals(bundles):
+    bundle = bundles["Random Forest"]
+    narrow = ml_engine.forecast(bundle, steps=5, coverage=0.5, interval="bootstrap")
+    wide = ml_engine.forecast(bundle, steps=5, coverage=0.99, interval="bootstrap")
+
+    assert all(w["upper"] - w["lower"] >= n["upper"] - n["lower"] for n, w in zip(narrow, wide))
+
+
+def test_bootstrap_falls_back_to_normal_without_residuals(bundles):
+    bundle = dict(bundles["Linear Regression"], residuals=[1.0])
+    assert ml_engine.forecast(bundle, interval="bootstrap") == ml_engine.forecast(bundle, interval="normal")
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"interval": "quantile"}, "interval must be"),
+    ({"coverage": 1.0}, "coverage must be between"),
+])
+def test_forecast_rejects_bad_arguments(bundles, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        ml_engine.forecast(bundles["Linear Regression"], **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Lag features
+# ---------------------------------------------------------------------------
+
+LAG_MODELS = ["Polynomial Regression (lags=5, season=0)", "Gradient Boosting (lags=3)", "Random Forest (lags)"]
+
+
+@pytest.mark.parametrize("model_type", LAG_MODELS)
+@pytest.mark.parametrize("bias", [0.0, 40.0])
+def test_lag_bootstrap_interval_contains_the_point_forecast(model_type, bias):
+    _, bundle = ml_engine.train_model(model_type, _records(), deadline_s=0)
+    bundle["residuals"] = np.asarray(bundle["residuals"], dtype=float) + bias
+
+    steps = ml_engine.forecast(bundle, steps=10, coverage=0.9, interval="bootstrap")
+
+    assert _contains_point(steps)
+
+
+@pytest.mark.parametrize("model_type, expected", [
+    ("Random Forest", None),
+    ("Random Forest (lags)", ml_engine.LAG_DEFAULTS),
+    ("Gradient Boosting (lags=14, window=0, season=12)", {"lags": 14, "window": 0, "season": 12}),
+    ("Linear Regression ( lags = 2 , season=4 )", {"lags": 2, "window": 7, "season": 4}),
+])
+def test_lag_options_parse_the_model_type(model_type, expected):
+    assert ml_engine.lag_options(model_type) == expected
+
+
+@pytest.mark.parametrize("model_type, message", [
+    ("Random Forest (lags=3, trend=1)", "Unknown lag option 'trend'"),
+    ("Random Forest (lags=three)", "must be an integer"),
+    ("Random Forest (lags=0)", "lags must be between 1"),
+    ("Random Forest (lags=3, window=1)", "window must be 0 or between 2"),
+    (f"Random Forest (lags=3, season={ml_engine.MAX_LAG + 1})", "season must be 0 or between 2"),
+])
+def test_lag_options_reject_bad_values(model_type, message):
+    with pytest.raises(ValueError, match=message):
+        ml_engine.lag_options(model_type)
+
+
+def test_lag_matrix_builds_lags_mean_and_season():
+    options = {"lags": 2, "window": 3, "season": 4}
+    windows = np.array([[1.0, 2.0, 3.0, 4.0], [2.0, 3.0, 4.0, 5.0]])
+
+    X = ml_engine._lag_matrix(windows, options, positions=np.array([4, 5]))
+
+    assert ml_engine._lag_feature_names(options) == [
+        "lag_1", "lag_2", "rolling_mean_3", "season_lag_4", "season_sin", "season_cos",
+    ]
+    np.testing.assert_allclose(X, [[4, 3, 3, 1, 0, 1], [5, 4, 4, 2, 1, 0]], atol=1e-12)
+
+
+def test_lag_features_predict_each_value_from_the_ones_before():
+    series = np.arange(10, dtype=float)
+    X = ml_engine._lag_features(series, {"lags": 3, "window": 0, "season": 0})
+
+    assert X.shape == (7, 3)
+    np.testing.assert_array_equal(X[:, 0], series[2:-1])   # lag_1 of series[3:]
+    np.testing.assert_array_equal(X[:, 2], series[:-3])
+
+
+def test_lag_dataset_splits_chronologically():
+    options = {"lags": 2, "window": 0, "season": 0}
+    data = ml_engine._lag_dataset(ml_engine._split_dataset(_records(22)), options)
+
+    assert data["n_rows"] == 20 and data["last_idx"] == 21
+    assert (len(data["y_train"]), len(data["y_test"])) == (16, 4)
+    np.testing.assert_array_equal(data["y_test"], data["y"][-4:])
+    np.testing.assert_array_equal(data["X_test"][:, 0], data["history"][-5:-1])
+
+
+def test_lag_dataset_needs_enough_points():
+    with pytest.raises(ValueError, match="at least 11 points"):
+        ml_engine._lag_dataset(ml_engine._split_dataset(_records(10)), {"lags": 7, "window": 0, "season": 0})
+
+
+class _NextValue:
+    """Predicts lag_1 + 1."""
+
+    def predict(self, X):
+        return X[:, 0] + 1.0
+
+
+def test_recursive_paths_feed_predictions_back():
+    options = {"lags": 2, "window": 0, "season": 0}
+    history = np.array([5.0, 6.0, 7.0])
+
+    path = ml_engine._recursive_paths(_NextValue(), history, options, first=3, steps=4)
+    noisy = ml_engine._recursive_paths(
+        _NextValue(), history, options, first=3, steps=3, noise=np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]),
+    )
+
+    np.testing.assert_array_equal(path, [[8, 9, 10, 11]])
+    # Noise added at one step carries into every later step
+    np.testing.assert_array_equal(noisy, [[8, 9, 10], [9, 11, 13]])
@@ -0,0 +1,147 @@
+"""Bulk ingestion: parsers, row-level errors and unparseable bodies."""
+
+import asyncio
+import json
+
+import pytest
+
+from backend import crud, ingest, models
+
+
+async def _chunks(body: bytes, size: int = 7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _ingest(body: bytes, fmt: str, batch_size: int = 2):
+    batches = []
+
+    async def insert_batch(records):
+        batches.append(records)
+        return len(records)
+
+    result = asyncio.run(ingest.ingest_business_data(_chunks(body), fmt, insert_batch, batch_size))
+    return result, batches
+
+
+ROWS = [
+    {"data_type": "Sales", "data": {"region": "North", "value": 1}},
+    {"data_type": "Sales", "data": "not an object"},
+    {"data_type": "Costs", "data": {"region": "South", "value": 2.5}},
+]
+
+
+@pytest.mark.parametrize("fmt, body", [
+    ("json", json.dumps(ROWS).encode()),
+    ("ndjson", "\n".join(json.dumps(row) for row in ROWS).encode()),
+])
+def test_invalid_rows_are_reported_and_skipped(fmt, body):
+    result, batches = _ingest(body, fmt)
+
+    assert (result["received"], result["inserted"], result["failed"]) == (3, 2, 1)
+    assert [error["row"] for error in result["errors"]] == [2]
+    assert [b["failed"] for b in result["batches"]] == [1, 0]
+    assert [r.data_type for batch in batches for r in batch] == ["Sales", "Costs"]
+
+
+def test_csv_rows_map_onto_payload_columns():
+    body = 'data_type,region,value\nSales,North,3\nSales,"South\nEast",x\nSales,West\n'.encode()
+    result, batches = _ingest(body, "csv")
+
+    records = [r for batch in batches for r in batch]
+    assert records[0].data == {"region": "North", "value": 3}
+    assert records[1].data == {"region": "South\nEast", "value": "x"}
+    assert result["errors"] == [{"row": 3, "error": "Expected 3 columns, got 2."}]
+
+
+@pytest.mark.parametrize("body, row", [
+    (b'{"data_type": "Sales"}', 1),
+    (b'[{"data_type": "Sales", "data": {}}, {"data_type": ', 2),
+    (b'[{"data_type": "Sales", "data": {}}, {"data_type" "Sales"}]', 2),
+])
+def test_unparseable_json_names_the_row(body, row):
+    with pytest.raises(ingest.MalformedBody) as caught:
+        _ingest(body, "json")
+    assert caught.value.row == row
+
+
+@pytest.mark.parametrize("body, row, message", [
+    (b'[{"data_type": "Sales", "data": {}},, {"data_type": "Sales", "data": {}}]', 2, "Expected a record"),
+    (b'[{"data_type": "Sales", "data": {}},]', 2, "Expected a record"),
+    (b'[, {"data_type": "Sales", "data": {}}]', 1, "Expected a record"),
+    (b'[{"data_type": "Sales", "data": {}} {"data_type": "Sales", "data": {}}]', 2, "Expected ',' or ']'"),
+    (b'[{"data_type": "Sales", "data": {}}] garbage', 2, "after the closing"),
+])
+def test_json_array_separators_are_strict(body, row, message):
+    with pytest.raises(ingest.MalformedBody, match=message) as caught:
+        _ingest(body, "json")
+    assert caught.value.row == row
+
+
+def test_json_array_allows_whitespace_around_and_empty_arrays():
+    assert _ingest(b" [ ] \n", "json")[0]["received"] == 0
+    body = b'\n[ {"data_type": "Sales", "data": {}} ,\n {"data_type": "Sales", "data": {}} ]\n\n'
+    assert _ingest(body, "json")[0]["inserted"] == 2
+
+
+def test_csv_stray_quote_in_an_unquoted_field_is_literal():
+    body = b'data_type,item,value\nSales,5" screen,3\nSales,"quoted, with comma",4\n'
+    result, batches = _ingest(body, "csv", batch_size=10)
+
+    assert result["failed"] == 0
+    assert [r.data["item"] for r in batches[0]] == ['5" screen', "quoted, with comma"]
+
+
+@pytest.mark.parametrize("body, row", [
+    (b'data_type,region\nSales,North\nSales,"North', 2),
+    (b'data_type,region\nSales,"North\n', 1),
+    (b'data_type,region\nSales,"No"rth\nSales,South\n', 1),
+])
+def test_csv_quoting_errors_stop_the_upload(body, row):
+    with pytest.raises(ingest.MalformedBody, match="Malformed CSV") as caught:
+        _ingest(body, "csv")
+    assert caught.value.row == row
+
+
+@pytest.mark.parametrize("fmt, body", [
+    ("json", b'[{"data_type": "Sales", "data": {}}, {"data_type": "' + b"x" * 200),
+    ("ndjson", b'{"data_type": "Sales", "data": {}}\n{"data_type": "' + b"x" * 200),
+    ("csv", b'data_type,region\nSales,North\nSales,"' + b"x" * 200),
+])
+def test_parsers_stop_buffering_past_the_record_cap(monkeypatch, fmt, body):
+    monkeypatch.setattr(ingest, "MAX_RECORD_SIZE", 64)
+    with pytest.raises(ingest.MalformedBody) as caught:
+        _ingest(body + b"y" * 10_000, fmt)
+    assert caught.value.row == 2
+
+
+def test_malformed_body_reports_committed_batches():
+    rows = [{"data_type": "Sales", "data": {"n": i}} for i in range(5)]
+    body = json.dumps(rows)[:-1].encode() + b", {"
+    with pytest.raises(ingest.MalformedBody) as caught:
+        _ingest(body, "json", batch_size=2)
+    assert (caught.value.row, caught.value.processed, caught.value.inserted) == (6, 4, 4)
+
+
+def test_bulk_endpoint_returns_400_with_row_offset(client, app_db, app_user):
+    body = b'[{"data_type": "Sales", "data": {"value": 1}}, {"data_type": "Sales", "data": {'
+    response = client.post(
+        "/business-data/bulk", content=body, headers={"Content-Type": "application/json"},
+        params={"batch_size": 1},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Row 2: Malformed or truncated JSON array.")
+    assert "1 rows before it were inserted" in response.json()["detail"]
+    assert app_db.query(models.BusinessData).filter_by(user_id=app_user.id).count() == 1
+    assert crud.get_user_stats(app_db, app_user.id)["total_data_records"] == 1
+
+
+def test_bulk_endpoint_returns_400_for_unterminated_csv_quote(client):
+    response = client.post(
+        "/business-data/bulk", content=b'data_type,region\nSales,"North',
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Row 1: Malformed CSV")
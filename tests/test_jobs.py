@@ -0,0 +1,131 @@
+"""Prediction jobs: completion callbacks, cancellation and recovery of lost jobs."""
+
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+from backend import crud, jobs, models, schemas
+
+INPUT = {"values": [{"sales": float(v)} for v in (10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35)]}
+
+
+def _pending(db, user_id, model_type="Linear Regression"):
+    prediction = schemas.PredictionCreate(name="Job", model_type=model_type, input_data=INPUT)
+    return crud.create_pending_prediction(db, prediction, user_id)
+
+
+def _finish(pred_id, future):
+    jobs.reserve()
+    jobs._finish(pred_id, "key", None, future)
+
+
+def _reload(db, pred_id):
+    db.expire_all()
+    return db.get(models.Prediction, pred_id)
+
+
+def test_finish_stores_completed_result(app_db, app_user):
+    pred = _pending(app_db, app_user.id)
+    result = {"metrics": {"r2_score": 0.9}, "confidence": 0.9, "forecast": []}
+    future = Future()
+    future.set_result(((result, None), 0.0))
+
+    _finish(pred.id, future)
+
+    record = _reload(app_db, pred.id)
+    assert record.status == "completed"
+    assert record.accuracy_score == 0.9
+    stats = crud.get_user_stats(app_db, app_user.id)
+    assert stats["completed_predictions"] == 1 and stats["failed_predictions"] == 0
+
+
+def test_finish_records_worker_exception_as_failed(app_db, app_user):
+    pred = _pending(app_db, app_user.id)
+    future = Future()
+    future.set_exception(ValueError("boom"))
+
+    _finish(pred.id, future)
+
+    record = _reload(app_db, pred.id)
+    assert record.status == "failed"
+    assert "boom" in record.output_data["error"]
+
+
+def test_cancelled_job_is_marked_failed(app_db, app_user):
+    pred = _pending(app_db, app_user.id)
+    future = Future()
+    assert future.cancel()
+
+    _finish(pred.id, future)
+
+    record = _reload(app_db, pred.id)
+    assert record.status == "failed"
+    assert record.output_data == {"error": jobs.CANCELLED_ERROR}
+    assert crud.get_user_stats(app_db, app_user.id)["failed_predictions"] == 1
+
+
+def _age(db, *preds, hours=2):
+    for pred in preds:
+        pred.created_at = pred.updated_at = datetime.utcnow() - timedelta(hours=hours)
+    db.commit()
+
+
+def test_fail_stale_only_touches_old_unowned_rows(app_db, app_user):
+    old, owned, recent = (_pending(app_db, app_user.id) for _ in range(3))
+    _age(app_db, old, owned)
+    jobs._pending_ids.add(owned.id)
+    try:
+        assert jobs.fail_stale(max_age_s=3600) == 1
+    finally:
+        jobs._pending_ids.discard(owned.id)
+
+    assert _reload(app_db, old.id).status == "failed"
+    assert _reload(app_db, old.id).output_data == {"error": jobs.LOST_ERROR}
+    assert _reload(app_db, owned.id).status == "pending"
+    assert _reload(app_db, recent.id).status == "pending"
+    stats = crud.get_user_stats(app_db, app_user.id)
+    assert stats["failed_predictions"] == 1 and stats["total_predictions"] == 3
+
+
+def test_fail_stale_spares_jobs_another_process_heartbeats(app_db, app_user):
+    # Rows queued by another API worker: this process does not own them
+    alive, dead = _pending(app_db, app_user.id), _pending(app_db, app_user.id)
+    _age(app_db, alive, dead)
+    assert crud.touch_pending_predictions(app_db, (alive.id,)) == 1
+
+    assert jobs.fail_stale(max_age_s=3600) == 1
+    assert _reload(app_db, alive.id).status == "pending"
+    assert _reload(app_db, dead.id).status == "failed"
+
+
+def test_fail_stale_heartbeats_the_jobs_it_owns(app_db, app_user):
+    owned = _pending(app_db, app_user.id)
+    _age(app_db, owned)
+    jobs._pending_ids.add(owned.id)
+    try:
+        jobs.fail_stale(max_age_s=3600)
+    finally:
+        jobs._pending_ids.discard(owned.id)
+
+    # Another process sweeping now finds the row fresh
+    assert _reload(app_db, owned.id).updated_at > datetime.utcnow() - timedelta(minutes=1)
+    assert jobs.fail_stale(max_age_s=3600) == 0
+    assert _reload(app_db, owned.id).status == "pending"
+
+
+def test_submitted_job_completes(app_db, app_user):
+    pred = _pending(app_db, app_user.id)
+    jobs.reserve()
+    jobs.submit(pred.id, pred.model_type, INPUT)
+    try:
+        deadline = time.monotonic() + 90
+        # The callback clears its claim on the prediction after writing the result
+        while pred.id in jobs._pending_ids and time.monotonic() < deadline:
+            time.sleep(0.2)
+    finally:
+        jobs.shutdown()
+
+    record = _reload(app_db, pred.id)
+    assert record.status == "completed"
+    assert len(record.output_data["forecast"]) == 5
+    assert pred.id not in jobs._pending_ids
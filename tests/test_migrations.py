@@ -0,0 +1,125 @@
+"""Schema migrations: fresh databases and upgrades of databases from earlier releases."""
+
+import sqlite3
+from datetime import date
+
+import pytest
+from sqlalchemy import inspect, text
+
+from backend import crud, migrations
+
+from conftest import make_engine
+
+# Schema created by the baseline release (``Base.metadata.create_all`` of v3.0.0)
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR NOT NULL, password VARCHAR NOT NULL,
+    name VARCHAR NOT NULL, company VARCHAR, role VARCHAR, email_verified BOOLEAN,
+    last_login DATETIME, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE business_data (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, data_type VARCHAR NOT NULL,
+    description TEXT, data JSON NOT NULL, timestamp DATETIME, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_business_data_id ON business_data (id);
+CREATE TABLE predictions (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, name VARCHAR, model_type VARCHAR NOT NULL,
+    input_data JSON NOT NULL, output_data JSON, confidence FLOAT, accuracy_score FLOAT,
+    status VARCHAR, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_predictions_id ON predictions (id);
+CREATE TABLE feedback (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, type VARCHAR NOT NULL, rating INTEGER,
+    message TEXT, status VARCHAR, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_feedback_id ON feedback (id);
+CREATE TABLE integrations (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, service VARCHAR NOT NULL, config JSON,
+    is_active BOOLEAN, created_at DATETIME, updated_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_integrations_id ON integrations (id);
+INSERT INTO users (id, email, password, name) VALUES (1, 'old@example.com', 'x', 'Old');
+INSERT INTO business_data (id, user_id, data_type, data, created_at) VALUES
+    (1, 1, 'Sales', '{"region": "EU", "value": 12.5, "date": "2026-01-05"}', '2026-01-05 10:00:00'),
+    (2, 1, 'Sales', '{"value": "n/a"}', '2026-01-06 10:00:00');
+"""
+
+MIGRATION_INDEXES = {
+    spec.name
+    for specs in (migrations._0001_INDEXES, migrations._0003_INDEXES)
+    for spec in specs
+}
+
+
+def _indexes(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def test_upgrade_from_baseline_database(tmp_path):
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    engine = make_engine(f"sqlite:///{path}")
+
+    migrations.init_db(engine)
+
+    assert migrations.current_version(engine) == migrations.MIGRATIONS[-1][0]
+    found = set().union(*(_indexes(engine, t) for t in ("business_data", "predictions", "integrations")))
+    assert MIGRATION_INDEXES <= found
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, region, value, event_date FROM business_data ORDER BY id")
+        ).all()
+    assert rows[0][1:] == ("EU", 12.5, str(date(2026, 1, 5)))
+    assert rows[1][1:] == (None, None, None)
+    assert "user_stats" in inspect(engine).get_table_names()
+
+
+def test_hot_column_migration_does_not_follow_models_or_crud(tmp_path, monkeypatch):
+    def _changed(data):
+        raise AssertionError("migration 3 must use its own copy of the extraction")
+
+    monkeypatch.setattr(crud, "extract_hot_fields", _changed)
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    engine = make_engine(f"sqlite:///{path}")
+
+    migrations.upgrade(engine)
+
+    types = {col["name"]: str(col["type"]) for col in inspect(engine).get_columns("business_data")}
+    assert (types["region"], types["value"], types["event_date"]) == ("VARCHAR", "FLOAT", "DATE")
+
+
+@pytest.mark.parametrize("data, expected", [
+    ({"region": "EU", "value": 12.5, "date": "2026-01-05T10:00:00"}, ("EU", 12.5, date(2026, 1, 5))),
+    ({"region": "", "value": "7", "date": "2026-13-01"}, (None, 7.0, None)),
+    ({"region": 3, "value": True, "date": 20260105}, ("3", None, None)),
+    ({"value": "n/a"}, (None, None, None)),
+    (["not", "a", "dict"], (None, None, None)),
+])
+def test_migration_backfill_extraction(data, expected):
+    fields = migrations._0003_hot_fields(data)
+    assert (fields["region"], fields["value"], fields["event_date"]) == expected
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    engine = make_engine(f"sqlite:///{path}")
+
+    assert migrations.upgrade(engine) == len(migrations.MIGRATIONS)
+    assert migrations.upgrade(engine) == 0
+
+
+def test_fresh_database_reaches_latest_version(engine):
+    assert migrations.current_version(engine) == migrations.MIGRATIONS[-1][0]
+    assert MIGRATION_INDEXES <= _indexes(engine, "business_data") | _indexes(engine, "predictions") \
+        | _indexes(engine, "integrations")
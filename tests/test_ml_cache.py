@@ -0,0 +1,118 @@
+"""Prediction result cache: keys, both tiers, what is stored and the counters."""
+
+import os
+
+import pytest
+
+from backend import ml_cache, ml_engine
+
+INPUT = {"values": [{"sales": float(v)} for v in (10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35)]}
+RESULT = {"metrics": {"r2_score": 0.9}, "forecast": [{"step": 1, "value": 1.0}]}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ml_cache.ResultCache(max_entries=8)
+    monkeypatch.setattr(ml_cache, "result_cache", cache)
+    return cache
+
+
+def test_cache_key_ignores_key_order_and_tracks_engine_version(monkeypatch):
+    a = ml_cache.cache_key("Random Forest", {"values": [{"a": 1, "b": 2}]})
+    b = ml_cache.cache_key("Random Forest", {"values": [{"b": 2, "a": 1}]})
+    assert a == b
+    assert a != ml_cache.cache_key("Gradient Boosting", {"values": [{"a": 1, "b": 2}]})
+    assert a != ml_cache.cache_key("Random Forest", {"values": [{"a": 1, "b": 2}]}, steps=10)
+    monkeypatch.setattr(ml_engine, "ENGINE_VERSION", "0.0.0")
+    assert a != ml_cache.cache_key("Random Forest", {"values": [{"a": 1, "b": 2}]})
+
+
+def test_hits_are_fresh_copies(cache):
+    cache.put("k", RESULT)
+    hit = cache.get("k")
+    hit["metrics"]["r2_score"] = 0.0
+    assert cache.get("k") == RESULT
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ml_cache.ResultCache(max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1 and stats["memory_entries"] == 2
+
+
+def test_disk_tier_serves_other_processes_and_stays_under_its_budget(tmp_path):
+    entry = {"payload": "x" * 1000}
+    writer = ml_cache.ResultCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=3200)
+    for key in ("a", "b", "c"):
+        writer.put(key, entry)
+        os.utime(tmp_path / f"{key}.json", (1000 + ord(key), 1000 + ord(key)))
+    writer.put("d", entry)   # over budget: oldest files go until under 90 %
+
+    assert sorted(os.listdir(tmp_path)) == ["c.json", "d.json"]
+    assert writer.stats()["disk_evictions"] == 2
+    assert writer.stats()["disk_bytes"] <= 0.9 * 3200
+
+    reader = ml_cache.ResultCache(max_entries=4, disk_dir=str(tmp_path))
+    assert reader.stats()["disk_bytes"] == writer.stats()["disk_bytes"]
+    assert reader.get("d") == entry and reader.get("d") == entry
+    assert (reader.stats()["disk_hits"], reader.stats()["memory_hits"]) == (1, 1)
+
+
+@pytest.mark.parametrize("result", [
+    {"error": "Need at least 2 rows"},
+    dict(RESULT, degraded=True, degraded_reason="time budget"),
+])
+def test_failed_and_degraded_results_are_not_stored(cache, result):
+    ml_cache.store("Linear Regression", INPUT, result)
+    assert cache.stats()["stores"] == 0
+    assert cache.get(ml_cache.cache_key("Linear Regression", INPUT)) is None
+
+
+def test_train_model_serves_repeats_from_the_cache(cache):
+    first, bundle = ml_cache.train_model("Linear Regression", INPUT)
+    second, no_bundle = ml_cache.train_model("Linear Regression", INPUT)
+
+    assert bundle is not None and no_bundle is None
+    assert second == first
+    assert (cache.stats()["misses"], cache.stats()["hits"], cache.stats()["stores"]) == (1, 1, 1)
+
+
+def test_lookup_many_splits_hits_from_misses_in_request_order(cache):
+    ml_cache.store("Random Forest", INPUT, RESULT)
+
+    cached, missing = ml_cache.lookup_many(
+        ["Linear Regression", "Random Forest", "Gradient Boosting", "Linear Regression"], INPUT,
+    )
+
+    assert cached == {"Random Forest": RESULT}
+    assert missing == ["Linear Regression", "Gradient Boosting"]
+
+
+def test_clear_resets_entries_and_counters(tmp_path):
+    cache = ml_cache.ResultCache(disk_dir=str(tmp_path))
+    cache.put("a", RESULT)
+    cache.get("a")
+    cache.clear()
+
+    assert os.listdir(tmp_path) == []
+    stats = cache.stats()
+    assert stats["hits"] == stats["stores"] == stats["memory_entries"] == stats["disk_bytes"] == 0
+
+
+def test_cache_endpoint_reports_the_counters(client, cache):
+    cache.put("a", RESULT)
+    cache.get("a")
+    cache.get("b")
+
+    body = client.get("/ml/cache").json()
+
+    assert (body["hits"], body["misses"], body["stores"]) == (1, 1, 1)
+    assert body["hit_ratio"] == 0.5
+    assert body["engine_version"] == ml_engine.ENGINE_VERSION
@@ -0,0 +1,97 @@
+"""ML engine: closed-form fits against the sklearn pipelines, and batched per-series forecasts."""
+
+import numpy as np
+import pytest
+
+from backend import ml_engine
+
+
+def _series(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 100 + 2.5 * t + 0.03 * t ** 2 + rng.normal(0, 4, n)
+
+
+def _records(y, key="sales"):
+    return {"values": [{key: float(v)} for v in y]}
+
+
+@pytest.mark.parametrize("model_type", ["Linear Regression", "Polynomial Regression"])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_closed_form_matches_sklearn(model_type, columnar):
+    y = _series()
+    input_data = {"columns": {"sales": list(map(float, y))}} if columnar else _records(y)
+
+    fast, fast_bundle = ml_engine.fit_closed_form(model_type, input_data)
+    slow, _ = ml_engine._fit_and_evaluate(model_type, ml_engine._split_dataset(input_data))
+
+    assert isinstance(fast_bundle["pipeline"], ml_engine.ClosedFormModel)
+    assert fast["training_samples"] == slow["training_samples"]
+    assert fast["test_samples"] == slow["test_samples"]
+    for name in ("r2_score", "mae", "rmse"):
+        assert fast["metrics"][name] == pytest.approx(slow["metrics"][name], abs=1e-3)
+    for a, b in zip(fast["forecast"], slow["forecast"]):
+        assert a["value"] == pytest.approx(b["value"], abs=0.02)
+        assert a["lower"] == pytest.approx(b["lower"], abs=0.02)
+
+
+def test_closed_form_declines_inputs_it_cannot_parse():
+    assert ml_engine.fit_closed_form("Linear Regression", _records(_series(5))) is None
+    assert ml_engine.fit_closed_form("Random Forest", _records(_series())) is None
+    records = _records(_series())
+    records["values"][3]["sales"] = None
+    assert ml_engine.fit_closed_form("Linear Regression", records) is None
+
+
+def _long_frame():
+    """Three series in shuffled row order; one too short to fit, one with a gap."""
+    import pandas as pd
+
+    rows = []
+    for region, y in (("North", _series(30, seed=1)), ("South", _series(24, seed=2)), ("East", _series(6))):
+        rows += [{"data_type": "Sales", "region": region, "value": v, "order": i} for i, v in enumerate(y)]
+    rows.append({"data_type": "Sales", "region": "South", "value": None, "order": 99})
+    return pd.DataFrame(rows).sample(frac=1, random_state=0)
+
+
+def _per_series(frame, model_type, steps):
+    """The same fit through train_model + forecast, one series at a time."""
+    expected = {}
+    for region, group in frame.dropna(subset=["value"]).sort_values("order").groupby("region"):
+        if len(group) < ml_engine.CLOSED_FORM_MIN_ROWS:
+            continue
+        result, bundle = ml_engine.train_model(
+            model_type, {"values": [{"value": float(v)} for v in group["value"]]}, deadline_s=0,
+        )
+        expected[region] = (result, ml_engine.forecast(bundle, steps))
+    return expected
+
+
+@pytest.mark.parametrize("model_type", ["Linear Regression", "Polynomial Regression", "Random Forest"])
+@pytest.mark.parametrize("steps", [ml_engine.DEFAULT_FORECAST_STEPS, 4])
+def test_forecast_series_matches_fitting_each_series_alone(model_type, steps):
+    frame = _long_frame()
+    outputs = ml_engine.forecast_series(frame, model_type, order_col="order", steps=steps, deadline_s=0)
+    expected = _per_series(frame, model_type, steps)
+
+    assert [o["series"]["region"] for o in outputs] == ["East", "North", "South"]
+    assert [o["points"] for o in outputs] == [6, 30, 24]
+    assert "error" in outputs[0]
+    for out in outputs[1:]:
+        result, points = expected[out["series"]["region"]]
+        assert out["training_samples"] == result["training_samples"]
+        assert out["test_samples"] == result["test_samples"]
+        for name in ("r2_score", "mae", "rmse"):
+            assert out["metrics"][name] == pytest.approx(result["metrics"][name], abs=1e-3)
+        assert len(out["forecast"]) == steps
+        for a, b in zip(out["forecast"], points):
+            assert a["value"] == pytest.approx(b["value"], abs=0.02)
+            assert a["lower"] == pytest.approx(b["lower"], abs=0.02)
+
+
+def test_forecast_series_of_an_empty_frame_is_empty():
+    import pandas as pd
+
+    empty = pd.DataFrame(columns=["data_type", "region", "value"])
+    assert ml_engine.forecast_series(empty, "Linear Regression") == []
+    assert ml_engine.forecast_series(empty, "Random Forest") == []
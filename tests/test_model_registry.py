@@ -0,0 +1,143 @@
+"""Model registry: disk store, in-memory LRU, invalidation and the forecast endpoint."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from backend import crud, ml_engine, model_registry, schemas
+
+INPUT = {"values": [{"sales": float(v)} for v in (10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35)]}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(model_registry, "_loaded", model_registry.OrderedDict())
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return ml_engine.train_model("Linear Regression", INPUT)[1]
+
+
+def test_save_then_load_from_disk(registry, bundle):
+    assert model_registry.save(1, bundle)
+    assert (registry / "1.joblib").exists()
+    assert not [p for p in os.listdir(registry) if p.endswith(".tmp")]
+
+    model_registry._loaded.clear()
+    loaded = model_registry.load(1)
+
+    assert loaded is not bundle and loaded["last_idx"] == bundle["last_idx"]
+    assert ml_engine.forecast(loaded) == ml_engine.forecast(bundle)
+    assert model_registry.load(1) is loaded   # now served from memory
+
+
+def test_memory_lru_keeps_the_most_recent_bundles(registry, bundle, monkeypatch):
+    monkeypatch.setattr(model_registry, "MAX_LOADED", 2)
+    for pred_id in (1, 2, 3):
+        model_registry.save(pred_id, dict(bundle))
+    model_registry.load(2)
+    model_registry.save(4, dict(bundle))
+
+    assert list(model_registry._loaded) == [2, 4]
+    assert model_registry.load(1) is not None   # still on disk
+
+
+def test_disk_store_evicts_least_recently_used_files(registry, bundle, monkeypatch):
+    monkeypatch.setattr(model_registry, "MAX_MODELS", 2)
+    model_registry.save(1, bundle)
+    model_registry.save(2, bundle)
+    past = time.time() - 60
+    os.utime(registry / "1.joblib", (past, past))
+    os.utime(registry / "2.joblib", (past - 60, past - 60))
+    model_registry._loaded.clear()
+    model_registry.load(2)   # refreshes 2's mtime
+
+    model_registry.save(3, bundle)
+
+    assert sorted(os.listdir(registry)) == ["2.joblib", "3.joblib"]
+    assert 1 not in model_registry._loaded
+
+
+def test_other_engine_version_or_unreadable_file_is_ignored(registry, bundle):
+    model_registry.save(1, dict(bundle, engine_version="0.0.0"))
+    (registry / "2.joblib").write_bytes(b"not a joblib file")
+    model_registry._loaded.clear()
+
+    assert model_registry.load(1) is None
+    assert model_registry.load(2) is None
+    assert model_registry.load(3) is None
+
+
+def test_delete_removes_memory_and_disk_copies(registry, bundle):
+    model_registry.save(1, bundle)
+    model_registry.delete(1)
+    model_registry.delete(1)
+
+    assert model_registry.load(1) is None
+    assert not (registry / "1.joblib").exists()
+
+
+def test_failed_write_reports_false(registry, bundle, monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_DIR", str(registry / "file"))
+    (registry / "file").write_text("")
+    assert model_registry.save(1, bundle) is False
+    assert 1 not in model_registry._loaded
+
+
+def test_load_or_fit_refits_missing_models(registry):
+    bundle, refitted = model_registry.load_or_fit(7, "Linear Regression", INPUT)
+    assert refitted and bundle is not None
+    assert model_registry.load_or_fit(7, "Linear Regression", INPUT) == (bundle, False)
+
+
+def test_file_io_does_not_hold_the_registry_lock(registry, bundle, monkeypatch):
+    import joblib
+
+    started, release = threading.Event(), threading.Event()
+    real_dump = joblib.dump
+
+    def slow_dump(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return real_dump(*args, **kwargs)
+
+    model_registry.save(1, bundle)
+    monkeypatch.setattr(joblib, "dump", slow_dump)
+    writer = threading.Thread(target=model_registry.save, args=(2, bundle))
+    writer.start()
+    started.wait(5)
+    loaded = []
+    reader = threading.Thread(target=lambda: loaded.append(model_registry.load(1)))
+    reader.start()
+    reader.join(2)
+    # Served while the other save is still serialising
+    done = not reader.is_alive()
+    release.set()
+    writer.join()
+    reader.join()
+    assert done and loaded == [bundle]
+    assert model_registry.load(2) is bundle
+
+
+def test_forecast_endpoint_uses_the_stored_model(client, app_db, app_user):
+    result, bundle = ml_engine.train_model("Linear Regression", INPUT)
+    prediction = schemas.PredictionCreate(name="F", model_type="Linear Regression", input_data=INPUT)
+    pred = crud.create_prediction(app_db, prediction, result, app_user.id)
+    model_registry.save(pred.id, bundle)
+
+    response = client.get(f"/predictions/{pred.id}/forecast",
+                          params={"steps": 8, "coverage": 0.9, "interval": "bootstrap"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["refitted"] is False and body["interval_method"] == "bootstrap"
+    assert body["forecast"] == ml_engine.forecast(bundle, 8, 0.9, "bootstrap")
+
+    model_registry.delete(pred.id)
+    assert client.get(f"/predictions/{pred.id}/forecast").json()["refitted"] is True
+    assert client.get("/predictions/999999/forecast").status_code == 404
@@ -0,0 +1,119 @@
+"""Incremental model updates: engine parity and serialised appends."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from backend import crud, main, ml_engine, model_registry, models, schemas
+
+SALES = [10, 12, 15, 14, 18, 21, 22, 25, 27, 30, 31, 35, 36, 40, 41, 45]
+
+
+def _input(values):
+    return {"values": [{"sales": float(v)} for v in values]}
+
+
+def test_closed_form_update_matches_refit():
+    result, bundle = ml_engine.train_model("Linear Regression", _input(SALES[:12]))
+    updated, bundle = ml_engine.update_model(bundle, result, _input(SALES[12:])["values"])
+
+    # Same as a least-squares fit on the training split plus the new points
+    data = ml_engine._split_dataset(_input(SALES[:12]))
+    x = np.concatenate((data["X_train"].ravel(), np.arange(12, len(SALES))))
+    y = np.concatenate((data["y_train"], SALES[12:]))
+    slope, intercept = np.polyfit(x, y, 1)
+    future = np.arange(len(SALES), len(SALES) + 3).reshape(-1, 1)
+
+    assert updated["incremental"]["method"] == "sufficient_statistics"
+    assert updated["incremental"]["appended_points"] == 4
+    np.testing.assert_allclose(bundle["pipeline"].predict(future).ravel(), slope * future.ravel() + intercept)
+
+
+@pytest.mark.parametrize("model_type, method", [
+    ("Random Forest", "tree_replacement"),
+    ("Gradient Boosting", "warm_start"),
+])
+def test_ensemble_update_advances_the_model(model_type, method):
+    result, bundle = ml_engine.train_model(model_type, _input(SALES[:12]), deadline_s=0)
+    updated, bundle = ml_engine.update_model(bundle, result, _input(SALES[12:])["values"])
+
+    assert updated["incremental"]["method"] == method
+    assert bundle["last_idx"] == len(SALES) - 1
+    assert updated["training_samples"] == result["training_samples"] + 4
+    assert updated["forecast"][0]["step"] == 1
+
+
+def test_fold_members_are_updated_with_distinct_seeds():
+    ensemble = ml_engine.FoldEnsemble([
+        ml_engine._build_pipeline(ml_engine.engine_config("Random Forest", 12)) for _ in range(3)
+    ])
+    x = np.arange(12, dtype=float).reshape(-1, 1)
+    y = np.asarray(SALES[:12], dtype=float)
+    for member in ensemble.members:
+        member.fit(x, y)
+    before = [member.named_steps["model"].estimators_[-1] for member in ensemble.members]
+
+    ml_engine._update_pipeline(ensemble, x, y, {}, n_updates=0)
+
+    seeds = {member.named_steps["model"].estimators_[-1].random_state for member in ensemble.members}
+    assert len(seeds) == len(ensemble.members)
+    assert all(m.named_steps["model"].estimators_[-1] is not b for m, b in zip(ensemble.members, before))
+
+
+def test_concurrent_updates_keep_every_record(app_db, app_user):
+    result, bundle = ml_engine.train_model("Linear Regression", _input(SALES[:12]))
+    prediction = schemas.PredictionCreate(
+        name="Update", model_type="Linear Regression", input_data=_input(SALES[:12])
+    )
+    pred = crud.create_prediction(app_db, prediction, result, app_user.id)
+    model_registry.save(pred.id, bundle)
+
+    threads = [
+        threading.Thread(target=main._apply_prediction_update, args=(pred.id, _input([v])["values"]))
+        for v in SALES[12:]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    app_db.expire_all()
+    record = app_db.get(models.Prediction, pred.id)
+    assert len(record.input_data["values"]) == len(SALES)
+    assert record.output_data["incremental"]["updates"] == len(SALES) - 12
+    assert model_registry.load(pred.id)["last_idx"] == len(SALES) - 1
+
+
+def _stored(pred_id, values=SALES[:12]):
+    _, bundle = ml_engine.train_model("Linear Regression", _input(values))
+    model_registry.save(pred_id, bundle)
+    return bundle
+
+
+def test_failed_commit_leaves_the_stored_model_alone():
+    bundle = _stored(9001)
+
+    def _fail(updated):
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        model_registry.update(9001, "Linear Regression", _input(SALES[:12]), {}, _input([40])["values"], commit=_fail)
+
+    assert model_registry.load(9001) is bundle
+    assert bundle["last_idx"] == 11 and "incremental" not in bundle
+    model_registry._loaded.clear()
+    assert model_registry.load(9001)["last_idx"] == 11
+
+
+def test_model_is_dropped_when_it_cannot_be_stored_after_commit(monkeypatch):
+    _stored(9002)
+    committed = []
+    monkeypatch.setattr(model_registry, "save", lambda pred_id, bundle: False)
+
+    updated, _ = model_registry.update(
+        9002, "Linear Regression", _input(SALES[:12]), {}, _input([40])["values"], commit=committed.append,
+    )
+
+    assert committed == [updated]
+    assert model_registry.load(9002) is None
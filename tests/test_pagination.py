@@ -0,0 +1,85 @@
+"""Keyset pagination on ``(created_at, id)``."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import crud, models, schemas
+
+
+def _walk(fetch, limit):
+    """Follow next_cursor to the end; returns the pages' row ids."""
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch(limit=limit, cursor=cursor)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def business_rows(db, user):
+    # One batch shares one created_at, so every row ties on it
+    records = [
+        schemas.BusinessDataCreate(data_type="Sales", data={"region": "North" if i % 2 else "South", "n": i})
+        for i in range(10)
+    ]
+    crud.bulk_create_business_data(db, records, user.id)
+    return [row.id for row in db.query(models.BusinessData).order_by(models.BusinessData.id.desc())]
+
+
+def test_pages_cover_tied_timestamps_once_newest_first(db, user, business_rows):
+    pages = _walk(lambda **kw: crud.get_business_data_page(db, user.id, **kw), limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert [row_id for page in pages for row_id in page] == business_rows
+
+
+def test_exact_multiple_of_limit_ends_without_cursor(db, user, business_rows):
+    rows, cursor = crud.get_business_data_page(db, user.id, limit=10)
+    assert len(rows) == 10 and cursor is None
+
+
+def test_cursor_combines_with_payload_filters(db, user, business_rows):
+    fetch = lambda **kw: crud.get_business_data_page(db, user.id, data_filters={"region": "North"}, **kw)
+    ids = [row_id for page in _walk(fetch, limit=2) for row_id in page]
+
+    assert len(ids) == 5
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_prediction_pages_order_by_created_at_then_id(db, user):
+    start = datetime(2024, 1, 1)
+    for i, offset in enumerate([0, 2, 1, 2, 0]):
+        db.add(models.Prediction(user_id=user.id, name=f"p{i}", model_type="Linear Regression",
+                                 input_data={}, output_data={}, status="completed",
+                                 created_at=start + timedelta(days=offset)))
+    db.commit()
+    expected = [
+        p.id for p in db.query(models.Prediction).filter_by(user_id=user.id)
+        .order_by(models.Prediction.created_at.desc(), models.Prediction.id.desc())
+    ]
+
+    pages = _walk(lambda **kw: crud.get_predictions_page(db, user.id, **kw), limit=2)
+
+    assert [row_id for page in pages for row_id in page] == expected
+    summary_pages = _walk(lambda **kw: crud.get_prediction_summaries_page(db, user.id, **kw), limit=2)
+    assert summary_pages == pages
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10", crud._encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_malformed_cursor_is_rejected(db, user, cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        crud.get_business_data_page(db, user.id, cursor=cursor)
+
+
+def test_api_pages_and_rejects_bad_cursors(client, app_db, app_user):
+    records = [schemas.BusinessDataCreate(data_type="Sales", data={"n": i}) for i in range(3)]
+    crud.bulk_create_business_data(app_db, records, app_user.id)
+
+    first = client.get("/business-data", params={"limit": 2}).json()
+    second = client.get("/business-data", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [item["data"]["n"] for item in first["items"] + second["items"]] == [2, 1, 0]
+    assert second["next_cursor"] is None
+    assert client.get("/business-data", params={"cursor": "garbage"}).status_code == 400
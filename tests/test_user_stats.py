@@ -0,0 +1,34 @@
+"""Dashboard KPI counters served from user_stats."""
+
+from sqlalchemy import event
+
+from backend import crud, models, schemas
+
+
+def test_stats_without_a_row_are_computed_without_writing(db, user):
+    # Rows written behind crud's back, as for a user that predates user_stats
+    db.add_all([
+        models.BusinessData(user_id=user.id, data_type="Sales", data={"value": 1}),
+        models.Prediction(user_id=user.id, name="p", model_type="Linear Regression",
+                          input_data={}, output_data={}, status="completed", confidence=0.8),
+    ])
+    db.commit()
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+
+    stats = crud.get_user_stats(db, user.id)
+
+    assert stats["total_data_records"] == 1
+    assert stats["completed_predictions"] == 1 and stats["avg_confidence"] == 0.8
+    assert commits == [] and not db.new and not db.dirty
+    assert db.get(models.UserStats, user.id) is None
+
+
+def test_stats_row_is_seeded_by_the_next_write(db, user):
+    db.add(models.BusinessData(user_id=user.id, data_type="Sales", data={"value": 1}))
+    db.commit()
+
+    crud.bulk_create_business_data(db, [schemas.BusinessDataCreate(data_type="Sales", data={})], user.id)
+
+    assert db.get(models.UserStats, user.id).total_data_records == 2
+    assert crud.get_user_stats(db, user.id)["total_data_records"] == 2